@@ -2,22 +2,70 @@
 Main Privacy-First Personal Agent Orchestrator.
 Coordinates all modules and provides a unified interface.
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Iterator
 
-from modules.journal.journal_agent import JournalAgent
-from modules.finance.finance_agent import FinanceAgent
-from modules.documents.document_agent import DocumentAgent
 from llm_handler import get_llm_handler
-from database import PrivacyDatabase
-from config import FEATURES
+from database import PrivacyDatabase, get_shared_database
+from encryption import get_encryption_manager
+from config import ENABLED_FEATURES
 from utils import setup_logging
-from excel_export import ExcelExporter
-from global_search import GlobalSearch
-from tags_favorites import FavoritesManager
+
+# orjson is optional - fall back to the stdlib encoder if it's missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+
+def _json_bytes(obj: Any) -> bytes:
+    """Serialize a single record to compact JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(
+        obj, ensure_ascii=False,
+        default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o)
+    ).encode()
+
 
 logger = setup_logging()
 
+# How long audit/status reads are served from memory (writes invalidate sooner)
+READ_CACHE_TTL_SECONDS = 5
+
+
+# Module factories import lazily so disabled features (and their heavy
+# dependencies like spaCy or VADER) cost nothing at startup
+
+def _load_journal(db: PrivacyDatabase):
+    from modules.journal.journal_agent import JournalAgent
+    return JournalAgent(db)
+
+
+def _load_finance(db: PrivacyDatabase):
+    from modules.finance.finance_agent import FinanceAgent
+    return FinanceAgent(db)
+
+
+def _load_documents(db: PrivacyDatabase):
+    from modules.documents.document_agent import DocumentAgent
+    return DocumentAgent(db)
+
+
+def _load_search(db: PrivacyDatabase):
+    from global_search import GlobalSearch
+    return GlobalSearch(db)
+
+
+def _load_favorites(db: PrivacyDatabase):
+    from tags_favorites import FavoritesManager
+    return FavoritesManager(db)
+
 
 class PrivacyAgent:
     """Main agent orchestrating all privacy-first modules."""
@@ -26,28 +74,76 @@ class PrivacyAgent:
         """Initialize the privacy agent and all modules."""
         logger.info("Initializing Privacy-First Personal Agent...")
         
-        # Initialize LLM handler
+        # Initialize shared singletons up front so worker threads never race
+        # to create them (a race on the encryption manager could mint two keys)
         self.llm = get_llm_handler()
+        get_encryption_manager()
+        
+        # One connection shared by every module: a single page cache and
+        # statement cache instead of one per module. It is the process-wide
+        # one, which the auditor also uses; the modules keep their LLM
+        # responses in it.
+        self.db = get_shared_database()
+        
+        # Module construction is independent (spaCy load, ...),
+        # so run it concurrently and join once
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            journal = executor.submit(_load_journal, self.db) if 'journal' in ENABLED_FEATURES else None
+            finance = executor.submit(_load_finance, self.db) if 'finance' in ENABLED_FEATURES else None
+            documents = executor.submit(_load_documents, self.db) if 'document' in ENABLED_FEATURES else None
+            search = executor.submit(_load_search, self.db)
+            favorites = executor.submit(_load_favorites, self.db)
         
-        # Initialize modules based on feature flags
-        self.journal = JournalAgent() if FEATURES['journal_enabled'] else None
-        self.finance = FinanceAgent() if FEATURES['finance_enabled'] else None
-        self.documents = DocumentAgent() if FEATURES['document_enabled'] else None
+        self.journal = journal.result() if journal else None
+        self.finance = finance.result() if finance else None
+        self.documents = documents.result() if documents else None
         
-        # Database for privacy audit
-        self.db = PrivacyDatabase()
-        self.db.connect()
+        # Memoized audit/status reads: key -> (generation, stored_at, value).
+        # Every write through the agent bumps the generation.
+        self._read_cache: Dict[tuple, tuple] = {}
+        self._generation = 0
         
-        # Additional features
-        self.excel_exporter = ExcelExporter()
-        self.search = GlobalSearch()
-        self.favorites = FavoritesManager()
+        # Additional features (the Excel exporter is created on first use)
+        self._excel_exporter = None
+        self.search = search.result()
+        self.favorites = favorites.result()
         
         logger.info("[OK] Privacy-First Personal Agent initialized")
-        logger.info(f"  LLM Available: {self.llm.available}")
-        logger.info(f"  Journal Module: {'[OK]' if self.journal else '[X]'}")
-        logger.info(f"  Finance Module: {'[OK]' if self.finance else '[X]'}")
-        logger.info(f"  Document Module: {'[OK]' if self.documents else '[X]'}")
+        logger.info("  LLM Available: %s", self.llm.available)
+        logger.info("  Journal Module: %s", '[OK]' if self.journal else '[X]')
+        logger.info("  Finance Module: %s", '[OK]' if self.finance else '[X]')
+        logger.info("  Document Module: %s", '[OK]' if self.documents else '[X]')
+    
+    @property
+    def excel_exporter(self):
+        """Excel exporter, created on first use so openpyxl only loads for exports."""
+        if self._excel_exporter is None:
+            from excel_export import ExcelExporter
+            self._excel_exporter = ExcelExporter()
+        return self._excel_exporter
+    
+    def _cached(self, key: tuple, compute):
+        """
+        Return a memoized read, recomputing it once the TTL has passed or
+        anything was written through the agent since it was stored.
+        
+        Args:
+            key: Cache key (method name and arguments)
+            compute: Zero-argument callable producing the fresh value
+        """
+        now = time.monotonic()
+        entry = self._read_cache.get(key)
+        if entry and entry[0] == self._generation and now - entry[1] < READ_CACHE_TTL_SECONDS:
+            return entry[2]
+        
+        value = compute()
+        self._read_cache[key] = (self._generation, now, value)
+        return value
+    
+    def _record_write(self, result):
+        """Invalidate memoized reads after a write and pass its result through."""
+        self._generation += 1
+        return result
     
     # ========== Journal Methods ==========
     
@@ -55,13 +151,13 @@ class PrivacyAgent:
         """Add a journal entry."""
         if not self.journal:
             return {"error": "Journal module not enabled"}
-        return self.journal.add_entry(content, tags)
+        return self._record_write(self.journal.add_entry(content, tags))
     
-    def get_journal_entries(self, days: int = 7) -> list:
-        """Get recent journal entries."""
+    def get_journal_entries(self, days: Optional[int] = 7, limit: Optional[int] = 50) -> list:
+        """Get recent journal entries (days=None / limit=None for everything)."""
         if not self.journal:
             return []
-        return self.journal.get_entries(days=days)
+        return self.journal.get_entries(days=days, limit=limit)
     
     def get_mood_trends(self, days: int = 30) -> Dict[str, Any]:
         """Get mood trends."""
@@ -81,19 +177,26 @@ class PrivacyAgent:
         """Add transaction from SMS."""
         if not self.finance:
             return {"error": "Finance module not enabled"}
-        return self.finance.add_from_sms(sms_text)
+        return self._record_write(self.finance.add_from_sms(sms_text))
+    
+    def add_transactions_from_sms(self, sms_texts: list) -> Dict[str, Any]:
+        """Add transactions from many SMS messages, written in batches."""
+        if not self.finance:
+            return {"error": "Finance module not enabled"}
+        return self._record_write(self.finance.add_from_sms_batch(sms_texts))
     
     def add_transaction(self, amount: float, transaction_type: str, **kwargs) -> Dict[str, Any]:
         """Add transaction manually."""
         if not self.finance:
             return {"error": "Finance module not enabled"}
-        return self.finance.add_transaction(amount, transaction_type, **kwargs)
+        return self._record_write(self.finance.add_transaction(amount, transaction_type, **kwargs))
     
-    def get_transactions(self, days: int = 30, category: str = None) -> list:
-        """Get recent transactions."""
+    def get_transactions(self, days: Optional[int] = 30, category: str = None,
+                         limit: Optional[int] = 100) -> list:
+        """Get recent transactions (days=None / limit=None for everything)."""
         if not self.finance:
             return []
-        return self.finance.get_transactions(days=days, category=category)
+        return self.finance.get_transactions(days=days, category=category, limit=limit)
     
     def get_spending_summary(self, days: int = 30) -> Dict[str, Any]:
         """Get spending summary."""
@@ -118,7 +221,13 @@ class PrivacyAgent:
         """Process a document."""
         if not self.documents:
             return {"error": "Document module not enabled"}
-        return self.documents.process_document(file_path)
+        return self._record_write(self.documents.process_document(file_path))
+    
+    def process_documents(self, file_paths: list) -> list:
+        """Process many documents, extracting entities in one batch."""
+        if not self.documents:
+            return [{"error": "Document module not enabled"} for _ in file_paths]
+        return self._record_write(self.documents.process_documents(file_paths))
     
     def query_document(self, document_id: int, question: str) -> str:
         """Ask question about a document."""
@@ -126,8 +235,15 @@ class PrivacyAgent:
             return "Document module not enabled"
         return self.documents.query_document(document_id, question)
     
-    def get_documents(self, limit: int = 50) -> list:
-        """Get processed documents."""
+    def query_document_stream(self, document_id: int, question: str) -> Iterator[str]:
+        """Ask question about a document, yielding the answer as it is generated."""
+        if not self.documents:
+            yield "Document module not enabled"
+            return
+        yield from self.documents.query_document_stream(document_id, question)
+    
+    def get_documents(self, limit: Optional[int] = 50) -> list:
+        """Get processed documents (limit=None for all)."""
         if not self.documents:
             return []
         return self.documents.get_documents(limit=limit)
@@ -141,8 +257,11 @@ class PrivacyAgent:
     # ========== Privacy & Audit Methods ==========
     
     def get_privacy_audit(self, module: str = None, days: int = 7) -> list:
-        """Get privacy audit logs."""
-        return self.db.get_audit_log(module=module, days=days)
+        """Get privacy audit logs (memoized for a few seconds)."""
+        return self._cached(
+            ('audit', module, days),
+            lambda: self.db.get_audit_log(module=module, days=days)
+        )
     
     # ========== Excel Export Methods ==========
     
@@ -156,18 +275,19 @@ class PrivacyAgent:
         Returns:
             Path to exported file
         """
+        # Hand the exporter lazy row iterators so nothing is buffered in memory
+        journal_rows = self.journal.iter_entries() if self.journal else []
+        transaction_rows = self.finance.iter_transactions() if self.finance else []
+        document_rows = self.documents.iter_documents() if self.documents else []
+        
         if module == "all":
-            return self.excel_exporter.export_all(
-                self.get_journal_entries(days=9999),
-                self.get_transactions(days=9999),
-                self.get_documents(limit=9999)
-            )
+            return self.excel_exporter.export_all(journal_rows, transaction_rows, document_rows)
         elif module == "journal":
-            return self.excel_exporter.export_journal(self.get_journal_entries(days=9999))
+            return self.excel_exporter.export_journal(journal_rows)
         elif module == "finance":
-            return self.excel_exporter.export_transactions(self.get_transactions(days=9999))
+            return self.excel_exporter.export_transactions(transaction_rows)
         elif module == "documents":
-            return self.excel_exporter.export_documents(self.get_documents(limit=9999))
+            return self.excel_exporter.export_documents(document_rows)
     
     # ========== Global Search Methods ==========
     
@@ -190,51 +310,69 @@ class PrivacyAgent:
         return self.favorites.get_favorites(module)
     
     def export_data(self, export_path: str = None) -> str:
-        """Export all data (for GDPR-like data portability)."""
-        import json
-        from datetime import datetime
+        """
+        Export all data (for GDPR-like data portability).
         
+        The JSON file is written section by section, one record per line,
+        straight from the database cursors so memory use stays flat no
+        matter how much history is exported.
+        """
+        # One timestamp for both the filename and the export_date field
+        exported_at = datetime.now()
         if export_path is None:
-            export_path = f"privacy_agent_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            export_path = f"privacy_agent_export_{exported_at:%Y%m%d_%H%M%S}.json"
         
-        export_data = {
-            "export_date": datetime.now().isoformat(),
-            "journal_entries": self.get_journal_entries(days=9999) if self.journal else [],
-            "transactions": self.get_transactions(days=9999) if self.finance else [],
-            "documents": [
-                {k: v for k, v in doc.items() if k != 'content'}  # Exclude full content
-                for doc in self.get_documents(limit=1000)
-            ] if self.documents else [],
+        sections = {
+            "journal_entries": self.journal.iter_entries() if self.journal else [],
+            "transactions": self.finance.iter_transactions() if self.finance else [],
+            "documents": (
+                # Exclude full content (keys are filtered before any value is
+                # read, so the lazy row never decrypts it)
+                {key: doc[key] for key in doc if key != 'content'}
+                for doc in self.documents.iter_documents()
+            ) if self.documents else [],
             "audit_log": self.get_privacy_audit(days=90)
         }
         
-        with open(export_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        with open(export_path, 'wb') as f:
+            f.write(b'{\n"export_date": ' + _json_bytes(exported_at))
+            for name, records in sections.items():
+                f.write(b',\n"' + name.encode() + b'": [')
+                separator = b'\n'
+                for record in records:
+                    f.write(separator + _json_bytes(record))
+                    separator = b',\n'
+                f.write(b'\n]')
+            f.write(b'\n}\n')
         
-        logger.info(f"✓ Data exported to {export_path}")
+        logger.info("✓ Data exported to %s", export_path)
         return export_path
     
     def get_system_status(self) -> Dict[str, Any]:
-        """Get system status and statistics."""
+        """Get system status and statistics (memoized for a few seconds)."""
+        return self._cached(('status',), self._compute_system_status)
+    
+    def _compute_system_status(self) -> Dict[str, Any]:
+        """Collect system status and statistics from the modules."""
         status = {
             "llm_available": self.llm.available,
             "modules": {
-                "journal": FEATURES['journal_enabled'],
-                "finance": FEATURES['finance_enabled'],
-                "documents": FEATURES['document_enabled']
+                "journal": 'journal' in ENABLED_FEATURES,
+                "finance": 'finance' in ENABLED_FEATURES,
+                "documents": 'document' in ENABLED_FEATURES
             },
             "statistics": {}
         }
         
         # Get statistics from each module
         if self.journal:
-            status['statistics']['journal_entries'] = len(self.get_journal_entries(days=9999))
+            status['statistics']['journal_entries'] = self.journal.count_entries()
         
         if self.finance:
-            status['statistics']['transactions'] = len(self.get_transactions(days=9999))
+            status['statistics']['transactions'] = self.finance.count_transactions()
         
         if self.documents:
-            status['statistics']['documents'] = len(self.get_documents(limit=9999))
+            status['statistics']['documents'] = self.documents.count_documents()
         
         return status
     
@@ -250,6 +388,7 @@ class PrivacyAgent:
             self.documents.close()
         
         self.db.close()
+        self.llm.close()
         
         logger.info("[OK] Agent closed")
     
@@ -2,157 +2,227 @@
 Command-Line Interface for Privacy-First Personal Agent.
 Interactive menu system for all agent features.
 """
+import asyncio
+import re
 import sys
-from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 from colorama import init, Fore, Style
 init()
 
 from agent import PrivacyAgent
-from utils import color_text, format_currency, create_table
+from utils import format_currency, create_table
+
+# prompt_toolkit gives history and async prompts; fall back to input() without it
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import ANSI
+    from prompt_toolkit.history import InMemoryHistory
+    PROMPT_TOOLKIT_AVAILABLE = True
+except ImportError:
+    PROMPT_TOOLKIT_AVAILABLE = False
+
+_session = PromptSession(history=InMemoryHistory()) if PROMPT_TOOLKIT_AVAILABLE else None
+
+# Background LLM warmup started by main(), awaited before the first LLM call
+_warmup: Optional[asyncio.Task] = None
+
+# ANSI prefixes resolved once instead of per printed line
+CYAN = Fore.CYAN
+GREEN = Fore.GREEN
+YELLOW = Fore.YELLOW
+RED = Fore.RED
+RESET = Style.RESET_ALL
+
+CHOICE_PROMPT = f"{YELLOW}\nChoice: {RESET}"
+
+# Comma separator with surrounding whitespace, so tags need no per-item strip()
+_TAG_SPLIT = re.compile(r"\s*,\s*")
+
+
+def emit(*lines: str) -> None:
+    """Write a whole screen of lines with a single write and flush."""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
+async def ask(message: str = "") -> str:
+    """Read a line of input without blocking the event loop."""
+    if _session is not None:
+        return await _session.prompt_async(ANSI(message))
+    return await asyncio.to_thread(input, message)
+
+
+async def wait_for_llm():
+    """Make sure the background model warmup has finished."""
+    if _warmup is not None and not _warmup.done():
+        emit(f"{YELLOW}Waiting for the local model to finish loading...{RESET}")
+        await _warmup
 
 
 def print_header():
     """Print application header."""
-    print("\n" + "="*60)
-    print(color_text("🔒 PRIVACY-FIRST PERSONAL AGENT 🔒", "cyan"))
-    print(color_text("100% Local • Zero Cloud • Maximum Privacy", "yellow"))
-    print("="*60 + "\n")
+    emit(
+        "\n" + "="*60,
+        f"{CYAN}🔒 PRIVACY-FIRST PERSONAL AGENT 🔒{RESET}",
+        f"{YELLOW}100% Local • Zero Cloud • Maximum Privacy{RESET}",
+        "="*60 + "\n",
+    )
 
 
 def print_menu():
     """Print main menu."""
-    print(color_text("\n📋 MAIN MENU:", "cyan"))
-    print("  1. 📓 Journal Module")
-    print("  2. 💰 Finance Module")
-    print("  3. 📄 Document Module")
-    print("  4. 🔍 Privacy Audit")
-    print("  5. 📊 System Status")
-    print("  6. 💾 Export Data")
-    print("  0. ❌ Exit")
+    emit(
+        f"{CYAN}\n📋 MAIN MENU:{RESET}",
+        "  1. 📓 Journal Module",
+        "  2. 💰 Finance Module",
+        "  3. 📄 Document Module",
+        "  4. 🔍 Privacy Audit",
+        "  5. 📊 System Status",
+        "  6. 💾 Export Data",
+        "  0. ❌ Exit",
+    )
 
 
-def journal_menu(agent: PrivacyAgent):
+async def journal_menu(agent: PrivacyAgent):
     """Journal module submenu."""
     while True:
-        print(color_text("\n📓 JOURNAL MODULE:", "cyan"))
-        print("  1. Add new entry")
-        print("  2. View recent entries")
-        print("  3. Mood trends")
-        print("  4. Get insights")
-        print("  0. Back to main menu")
+        emit(
+            f"{CYAN}\n📓 JOURNAL MODULE:{RESET}",
+            "  1. Add new entry",
+            "  2. View recent entries",
+            "  3. Mood trends",
+            "  4. Get insights",
+            "  0. Back to main menu",
+        )
         
-        choice = input(color_text("\nChoice: ", "yellow"))
+        choice = await ask(CHOICE_PROMPT)
         
         if choice == "1":
-            print(color_text("\n✍️ New Journal Entry", "green"))
-            print("(Type your entry, press Enter twice when done)")
+            emit(
+                f"{GREEN}\n✍️ New Journal Entry{RESET}",
+                "(Type your entry, press Enter twice when done)",
+            )
             
             lines = []
             while True:
-                line = input()
+                line = await ask()
                 if line == "":
                     break
                 lines.append(line)
             
             content = "\n".join(lines)
             if content.strip():
-                tags_input = input("\nTags (comma-separated, optional): ")
-                tags = [t.strip() for t in tags_input.split(",")] if tags_input else None
+                tags_input = (await ask("\nTags (comma-separated, optional): ")).strip()
+                tags = _TAG_SPLIT.split(tags_input) if tags_input else None
                 
-                result = agent.add_journal_entry(content, tags)
+                await wait_for_llm()
+                result = await asyncio.to_thread(agent.add_journal_entry, content, tags)
                 
                 if 'error' not in result:
-                    print(color_text(f"\n✓ Entry saved!", "green"))
-                    print(f"Mood: {result['mood_category']}")
-                    print(f"Sentiment: {result['sentiment_score']:.3f}")
-                    print(f"\n{result['feedback']}")
+                    out = [
+                        f"{GREEN}\n✓ Entry saved!{RESET}",
+                        f"Mood: {result['mood_category']}",
+                        f"Sentiment: {result['sentiment_score']:.3f}",
+                        f"\n{result['feedback']}",
+                    ]
                     
                     if 'llm_analysis' in result and 'insight' in result['llm_analysis']:
-                        print(color_text(f"\n💡 AI Insight:", "cyan"))
-                        print(f"  {result['llm_analysis']['insight']}")
+                        out.append(f"{CYAN}\n💡 AI Insight:{RESET}")
+                        out.append(f"  {result['llm_analysis']['insight']}")
+                    emit(*out)
                 else:
-                    print(color_text(f"\n✗ Error: {result['error']}", "red"))
+                    emit(f"{RED}\n✗ Error: {result['error']}{RESET}")
         
         elif choice == "2":
-            days = input("\nDays to look back (default 7): ")
+            days = await ask("\nDays to look back (default 7): ")
             days = int(days) if days.isdigit() else 7
             
             entries = agent.get_journal_entries(days=days)
             
             if entries:
-                print(color_text(f"\n📖 Last {len(entries)} entries:", "cyan"))
+                out = [f"{CYAN}\n📖 Last {len(entries)} entries:{RESET}"]
                 for entry in entries[:10]:  # Show last 10
-                    timestamp = datetime.fromisoformat(entry['timestamp'])
-                    print(f"\n{timestamp.strftime('%Y-%m-%d %H:%M')} | {entry['mood_category']}")
-                    print(f"  {entry['content'][:100]}...")
+                    out.append(f"\n{entry['timestamp'].strftime('%Y-%m-%d %H:%M')} | {entry['mood_category']}")
+                    out.append(f"  {entry['content'][:100]}...")
+                emit(*out)
             else:
-                print(color_text("\nNo entries found.", "yellow"))
+                emit(f"{YELLOW}\nNo entries found.{RESET}")
         
         elif choice == "3":
-            days = input("\nDays to analyze (default 30): ")
+            days = await ask("\nDays to analyze (default 30): ")
             days = int(days) if days.isdigit() else 30
             
             trends = agent.get_mood_trends(days=days)
             
             if 'error' not in trends and trends.get('total_entries', 0) > 0:
-                print(color_text(f"\n📊 Mood Trends (last {days} days):", "cyan"))
-                print(f"Total entries: {trends['total_entries']}")
-                print(f"Average sentiment: {trends['average_sentiment']:.3f}")
-                print(f"\nMood Distribution:")
+                out = [
+                    f"{CYAN}\n📊 Mood Trends (last {days} days):{RESET}",
+                    f"Total entries: {trends['total_entries']}",
+                    f"Average sentiment: {trends['average_sentiment']:.3f}",
+                    "\nMood Distribution:",
+                ]
                 for mood, count in trends.get('mood_distribution', {}).items():
-                    print(f"  {mood}: {count}")
+                    out.append(f"  {mood}: {count}")
+                emit(*out)
             else:
-                print(color_text("\nNo data available yet.", "yellow"))
+                emit(f"{YELLOW}\nNo data available yet.{RESET}")
         
         elif choice == "4":
-            days = input("\nDays to analyze (default 30): ")
+            days = await ask("\nDays to analyze (default 30): ")
             days = int(days) if days.isdigit() else 30
             
-            insights = agent.get_journal_insights(days=days)
-            print(color_text(f"\n💡 Insights:", "cyan"))
-            print(f"  {insights}")
+            await wait_for_llm()
+            insights = await asyncio.to_thread(agent.get_journal_insights, days=days)
+            emit(f"{CYAN}\n💡 Insights:{RESET}", f"  {insights}")
         
         elif choice == "0":
             break
 
 
-def finance_menu(agent: PrivacyAgent):
+async def finance_menu(agent: PrivacyAgent):
     """Finance module submenu."""
     while True:
-        print(color_text("\n💰 FINANCE MODULE:", "cyan"))
-        print("  1. Add transaction from SMS")
-        print("  2. Add transaction manually")
-        print("  3. View recent transactions")
-        print("  4. Spending summary")
-        print("  5. Get insights")
-        print("  6. Set budget")
-        print("  0. Back to main menu")
+        emit(
+            f"{CYAN}\n💰 FINANCE MODULE:{RESET}",
+            "  1. Add transaction from SMS",
+            "  2. Add transaction manually",
+            "  3. View recent transactions",
+            "  4. Spending summary",
+            "  5. Get insights",
+            "  6. Set budget",
+            "  0. Back to main menu",
+        )
         
-        choice = input(color_text("\nChoice: ", "yellow"))
+        choice = await ask(CHOICE_PROMPT)
         
         if choice == "1":
-            print(color_text("\n📱 Paste SMS text:", "cyan"))
-            sms = input()
+            emit(f"{CYAN}\n📱 Paste SMS text:{RESET}")
+            sms = await ask()
             
-            result = agent.add_transaction_from_sms(sms)
+            await wait_for_llm()
+            result = await asyncio.to_thread(agent.add_transaction_from_sms, sms)
             
             if 'error' not in result:
-                print(color_text(f"\n✓ Transaction added!", "green"))
-                print(f"Amount: {format_currency(result['amount'])}")
-                print(f"Type: {result['type']}")
-                print(f"Category: {result['category']}")
+                emit(
+                    f"{GREEN}\n✓ Transaction added!{RESET}",
+                    f"Amount: {format_currency(result['amount'])}",
+                    f"Type: {result['type']}",
+                    f"Category: {result['category']}",
+                )
             else:
-                print(color_text(f"\n✗ {result['error']}", "red"))
+                emit(f"{RED}\n✗ {result['error']}{RESET}")
         
         elif choice == "2":
-            print(color_text("\n➕ Manual Transaction:", "cyan"))
-            amount = float(input("Amount: "))
-            txn_type = input("Type (debit/credit): ").lower()
-            merchant = input("Merchant (optional): ") or None
-            category = input("Category (optional): ") or None
+            emit(f"{CYAN}\n➕ Manual Transaction:{RESET}")
+            amount = float(await ask("Amount: "))
+            txn_type = (await ask("Type (debit/credit): ")).lower()
+            merchant = await ask("Merchant (optional): ") or None
+            category = await ask("Category (optional): ") or None
             
-            result = agent.add_transaction(
+            await wait_for_llm()
+            result = await asyncio.to_thread(
+                agent.add_transaction,
                 amount=amount,
                 transaction_type=txn_type,
                 merchant=merchant,
@@ -160,144 +230,158 @@ def finance_menu(agent: PrivacyAgent):
             )
             
             if 'error' not in result:
-                print(color_text(f"\n✓ Transaction added!", "green"))
-                print(f"Category: {result['category']}")
+                emit(f"{GREEN}\n✓ Transaction added!{RESET}", f"Category: {result['category']}")
             else:
-                print(color_text(f"\n✗ {result['error']}", "red"))
+                emit(f"{RED}\n✗ {result['error']}{RESET}")
         
         elif choice == "3":
-            days = input("\nDays to look back (default 30): ")
+            days = await ask("\nDays to look back (default 30): ")
             days = int(days) if days.isdigit() else 30
             
             transactions = agent.get_transactions(days=days)
             
             if transactions:
-                print(color_text(f"\n💳 Last {len(transactions)} transactions:", "cyan"))
-                
                 rows = []
                 for txn in transactions[:20]:  # Show last 20
-                    timestamp = datetime.fromisoformat(txn['timestamp'])
                     rows.append([
-                        timestamp.strftime('%Y-%m-%d'),
+                        txn['timestamp'].strftime('%Y-%m-%d'),
                         format_currency(txn['amount']),
                         txn['transaction_type'],
                         txn.get('category', 'N/A'),
                         (txn.get('merchant') or 'N/A')[:20]
                     ])
                 
-                print(create_table(
-                    ["Date", "Amount", "Type", "Category", "Merchant"],
-                    rows
-                ))
+                emit(
+                    f"{CYAN}\n💳 Last {len(transactions)} transactions:{RESET}",
+                    create_table(["Date", "Amount", "Type", "Category", "Merchant"], rows),
+                )
             else:
-                print(color_text("\nNo transactions found.", "yellow"))
+                emit(f"{YELLOW}\nNo transactions found.{RESET}")
         
         elif choice == "4":
-            days = input("\nDays to analyze (default 30): ")
+            days = await ask("\nDays to analyze (default 30): ")
             days = int(days) if days.isdigit() else 30
             
             summary = agent.get_spending_summary(days=days)
             
             if 'error' not in summary:
-                print(color_text(f"\n📊 Spending Summary (last {days} days):", "cyan"))
-                print(f"Total Spent: {format_currency(summary['total_spent'])}")
-                print(f"Total Income: {format_currency(summary['total_income'])}")
-                print(f"Net: {format_currency(summary['net'])}")
-                print(f"\nTop Categories:")
+                out = [
+                    f"{CYAN}\n📊 Spending Summary (last {days} days):{RESET}",
+                    f"Total Spent: {format_currency(summary['total_spent'])}",
+                    f"Total Income: {format_currency(summary['total_income'])}",
+                    f"Net: {format_currency(summary['net'])}",
+                    "\nTop Categories:",
+                ]
                 for cat in summary.get('top_categories', []):
-                    print(f"  {cat['category']}: {format_currency(cat['total'])}")
+                    out.append(f"  {cat['category']}: {format_currency(cat['total'])}")
+                emit(*out)
             else:
-                print(color_text(f"\n✗ {summary['error']}", "red"))
+                emit(f"{RED}\n✗ {summary['error']}{RESET}")
         
         elif choice == "5":
-            days = input("\nDays to analyze (default 30): ")
+            days = await ask("\nDays to analyze (default 30): ")
             days = int(days) if days.isdigit() else 30
             
-            insights = agent.get_finance_insights(days=days)
-            print(color_text(f"\n💡 Insights:", "cyan"))
-            print(f"  {insights}")
+            await wait_for_llm()
+            insights = await asyncio.to_thread(agent.get_finance_insights, days=days)
+            emit(f"{CYAN}\n💡 Insights:{RESET}", f"  {insights}")
         
         elif choice == "6":
-            category = input("\nCategory: ")
-            limit = float(input("Monthly limit: "))
+            category = await ask("\nCategory: ")
+            limit = float(await ask("Monthly limit: "))
             agent.set_budget(category, limit)
-            print(color_text(f"\n✓ Budget set for {category}: {format_currency(limit)}", "green"))
+            emit(f"{GREEN}\n✓ Budget set for {category}: {format_currency(limit)}{RESET}")
         
         elif choice == "0":
             break
 
 
-def document_menu(agent: PrivacyAgent):
+async def document_menu(agent: PrivacyAgent):
     """Document module submenu."""
     while True:
-        print(color_text("\n📄 DOCUMENT MODULE:", "cyan"))
-        print("  1. Process new document")
-        print("  2. View processed documents")
-        print("  3. Ask question about document")
-        print("  4. Search documents")
-        print("  0. Back to main menu")
+        emit(
+            f"{CYAN}\n📄 DOCUMENT MODULE:{RESET}",
+            "  1. Process new document",
+            "  2. View processed documents",
+            "  3. Ask question about document",
+            "  4. Search documents",
+            "  0. Back to main menu",
+        )
         
-        choice = input(color_text("\nChoice: ", "yellow"))
+        choice = await ask(CHOICE_PROMPT)
         
         if choice == "1":
-            file_path = input("\nDocument file path: ")
+            file_path = await ask("\nDocument file path: ")
             
-            result = agent.process_document(file_path)
+            await wait_for_llm()
+            result = await asyncio.to_thread(agent.process_document, file_path)
             
             if 'error' not in result:
-                print(color_text(f"\n✓ Document processed!", "green"))
-                print(f"File: {result['filename']}")
-                print(f"Text length: {result['text_length']} characters")
+                out = [
+                    f"{GREEN}\n✓ Document processed!{RESET}",
+                    f"File: {result['filename']}",
+                    f"Text length: {result['text_length']} characters",
+                ]
                 
                 if result.get('summary'):
-                    print(color_text("\n📝 Summary:", "cyan"))
-                    print(f"  {result['summary']}")
+                    out.append(f"{CYAN}\n📝 Summary:{RESET}")
+                    out.append(f"  {result['summary']}")
                 
                 if result.get('entities'):
-                    print(color_text(f"\n🏷️ Entities found: {len(result['entities'])}", "cyan"))
-                    print(f"  {', '.join(result['entities'][:10])}")
+                    out.append(f"{CYAN}\n🏷️ Entities found: {len(result['entities'])}{RESET}")
+                    out.append(f"  {', '.join(result['entities'][:10])}")
+                emit(*out)
             else:
-                print(color_text(f"\n✗ {result['error']}", "red"))
+                emit(f"{RED}\n✗ {result['error']}{RESET}")
         
         elif choice == "2":
             documents = agent.get_documents(limit=50)
             
             if documents:
-                print(color_text(f"\n📚 Processed Documents ({len(documents)}):", "cyan"))
+                out = [f"{CYAN}\n📚 Processed Documents ({len(documents)}):{RESET}"]
                 for i, doc in enumerate(documents[:20], 1):
-                    print(f"\n{i}. [{doc['id']}] {doc['filename']}")
-                    print(f"   Processed: {doc['processed_at'][:10]}")
+                    out.append(f"\n{i}. [{doc['id']}] {doc['filename']}")
+                    out.append(f"   Processed: {doc['processed_at'].strftime('%Y-%m-%d')}")
                     if doc.get('summary'):
-                        print(f"   Summary: {doc['summary'][:80]}...")
+                        out.append(f"   Summary: {doc['summary'][:80]}...")
+                emit(*out)
             else:
-                print(color_text("\nNo documents processed yet.", "yellow"))
+                emit(f"{YELLOW}\nNo documents processed yet.{RESET}")
         
         elif choice == "3":
-            doc_id = int(input("\nDocument ID: "))
-            question = input("Your question: ")
+            doc_id = int(await ask("\nDocument ID: "))
+            question = await ask("Your question: ")
             
-            answer = agent.query_document(doc_id, question)
-            print(color_text(f"\n💭 Answer:", "cyan"))
-            print(f"  {answer}")
+            await wait_for_llm()
+            # Print the answer as the model generates it
+            emit(f"{CYAN}\n💭 Answer:{RESET}")
+            sys.stdout.write("  ")
+            # Each chunk is pulled on a worker thread so the loop stays free
+            stream = agent.query_document_stream(doc_id, question)
+            while (chunk := await asyncio.to_thread(next, stream, None)) is not None:
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+            sys.stdout.write("\n")
         
         elif choice == "4":
-            query = input("\nSearch query: ")
-            results = agent.search_documents(query)
+            query = await ask("\nSearch query: ")
+            results = await asyncio.to_thread(agent.search_documents, query)
             
             if results:
-                print(color_text(f"\n🔍 Found {len(results)} documents:", "cyan"))
+                out = [f"{CYAN}\n🔍 Found {len(results)} documents:{RESET}"]
                 for doc in results[:10]:
-                    print(f"\n[{doc['id']}] {doc['filename']}")
+                    out.append(f"\n[{doc['id']}] {doc['filename']}")
                     if doc.get('summary'):
-                        print(f"  {doc['summary'][:100]}...")
+                        out.append(f"  {doc['summary'][:100]}...")
+                emit(*out)
             else:
-                print(color_text("\nNo matching documents found.", "yellow"))
+                emit(f"{YELLOW}\nNo matching documents found.{RESET}")
         
         elif choice == "0":
             break
 
 
-def main():
+async def main():
     """Main CLI application."""
     print_header()
     
@@ -305,56 +389,66 @@ def main():
     try:
         agent = PrivacyAgent()
     except Exception as e:
-        print(color_text(f"✗ Failed to initialize agent: {e}", "red"))
+        emit(f"{RED}✗ Failed to initialize agent: {e}{RESET}")
         return
     
+    # Load the model in the background while the user reads the menu
+    global _warmup
+    _warmup = asyncio.create_task(asyncio.to_thread(agent.llm.warmup))
+    
     try:
         while True:
             print_menu()
-            choice = input(color_text("\nChoice: ", "yellow"))
+            choice = await ask(CHOICE_PROMPT)
             
             if choice == "1":
-                journal_menu(agent)
+                await journal_menu(agent)
             
             elif choice == "2":
-                finance_menu(agent)
+                await finance_menu(agent)
             
             elif choice == "3":
-                document_menu(agent)
+                await document_menu(agent)
             
             elif choice == "4":
-                days = input("\nDays to look back (default 7): ")
+                days = await ask("\nDays to look back (default 7): ")
                 days = int(days) if days.isdigit() else 7
                 
                 logs = agent.get_privacy_audit(days=days)
                 
                 if logs:
-                    print(color_text(f"\n🔍 Privacy Audit Log ({len(logs)} events):", "cyan"))
+                    out = [f"{CYAN}\n🔍 Privacy Audit Log ({len(logs)} events):{RESET}"]
                     for log in logs[:20]:
-                        print(f"\n{log['timestamp']} | {log['module']} | {log['action_type']}")
-                        print(f"  Details: {log['details']}")
+                        out.append(f"\n{log['timestamp']} | {log['module']} | {log['action_type']}")
+                        out.append(f"  Details: {log['details']}")
+                    emit(*out)
                 else:
-                    print(color_text("\nNo audit logs found.", "yellow"))
+                    emit(f"{YELLOW}\nNo audit logs found.{RESET}")
             
             elif choice == "5":
                 status = agent.get_system_status()
                 
-                print(color_text("\n📊 SYSTEM STATUS:", "cyan"))
-                print(f"LLM Available: {'✓' if status['llm_available'] else '✗'}")
-                print(f"\nEnabled Modules:")
+                out = [
+                    f"{CYAN}\n📊 SYSTEM STATUS:{RESET}",
+                    f"LLM Available: {'✓' if status['llm_available'] else '✗'}",
+                    "\nEnabled Modules:",
+                ]
                 for module, enabled in status['modules'].items():
-                    print(f"  {module}: {'✓' if enabled else '✗'}")
-                print(f"\nStatistics:")
+                    out.append(f"  {module}: {'✓' if enabled else '✗'}")
+                out.append("\nStatistics:")
                 for key, value in status.get('statistics', {}).items():
-                    print(f"  {key}: {value}")
+                    out.append(f"  {key}: {value}")
+                emit(*out)
             
             elif choice == "6":
-                export_path = agent.export_data()
-                print(color_text(f"\n✓ Data exported to: {export_path}", "green"))
+                export_path = await asyncio.to_thread(agent.export_data)
+                emit(f"{GREEN}\n✓ Data exported to: {export_path}{RESET}")
             
             elif choice == "0":
-                print(color_text("\nThank you for using Privacy-First Personal Agent!", "cyan"))
-                print(color_text("Your data stays private and secure on your device. 🔒", "yellow"))
+                emit(
+                    f"{CYAN}\nThank you for using Privacy-First Personal Agent!{RESET}",
+                    f"{YELLOW}Your data stays private and secure on your device. 🔒{RESET}",
+                )
                 break
     
     finally:
@@ -362,4 +456,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
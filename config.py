@@ -3,6 +3,7 @@ Configuration management for Privacy-First Personal Agent.
 All settings are local-only with privacy-first defaults.
 """
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,11 +27,14 @@ DATABASE_ENCRYPTION_KEY_NAME = "privacy_agent_db_key"
 # Ollama Configuration (Local LLM)
 OLLAMA_BASE_URL = "http://localhost:11434"
 DEFAULT_MODEL = "llama3.2:3b"  # Lightweight model, can be changed
+# Requests batch calls keep in flight; match the Ollama server's own setting
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
 ALTERNATIVE_MODELS = [
     "phi3:mini",      # Even lighter alternative
     "llama3.2:1b",    # Smallest option
     "mistral:7b",     # More capable but heavier
 ]
+LLM_CACHE_SIZE = 4096  # Responses kept in memory; all are also stored (encrypted) in the database
 
 # Privacy Settings
 DATA_RETENTION_DAYS = {
@@ -38,13 +42,14 @@ DATA_RETENTION_DAYS = {
     "finance": 730,      # Keep financial data for 2 years
     "documents": 180,    # Keep analyzed documents for 6 months
     "audit_logs": 90,    # Keep privacy audit logs for 3 months
+    "llm_cache": 180,    # Cached LLM answers (summaries quote documents)
 }
 
 AUTO_DELETE_ENABLED = False  # User must explicitly enable auto-deletion
 EXPORT_FORMAT = "json"       # Options: json, csv
 
 # Encryption Settings
-ENCRYPTION_ALGORITHM = "Fernet"
+ENCRYPTION_ALGORITHM = "AES-256-GCM"  # Fernet tokens from older versions still decrypt
 KEY_DERIVATION_ITERATIONS = 100000
 SALT_LENGTH = 32
 
@@ -82,6 +87,14 @@ FINANCE_CONFIG = {
         "merchant": r"(?:at|to|from)\s+([A-Z\s]+?)(?:\s+on|\s+dated|\.|\,)"
     },
     "budget_alert_threshold": 0.9,  # Alert when 90% of budget spent
+    "sms_ingest_batch_size": 500,   # Parsed SMS written per transaction when importing in bulk
+    "insights_cache_ttl": 600,      # Seconds a generated spending insight is reused for unchanged totals
+}
+
+# Compile SMS patterns once at load instead of on every parsed message
+FINANCE_CONFIG["bank_sms_patterns_compiled"] = {
+    name: re.compile(pattern)
+    for name, pattern in FINANCE_CONFIG["bank_sms_patterns"].items()
 }
 
 # Document Module Configuration
@@ -91,6 +104,9 @@ DOCUMENT_CONFIG = {
     "pii_entities": ["PERSON", "ORG", "GPE", "DATE", "MONEY", "CARDINAL"],
     "summary_max_length": 500,
     "chunk_size": 1000,  # For processing large documents
+    "pdf_pages_per_worker": 10,  # PDF pages per extraction process (smaller PDFs stay serial)
+    "ner_chunk_size": 20000,  # Characters per spaCy NER chunk (split at whitespace)
+    "ner_batch_size": 32,  # Texts per spaCy nlp.pipe batch in process_documents
 }
 
 # NLP Settings
@@ -105,10 +121,16 @@ WEB_CONFIG = {
     "host": "127.0.0.1",  # Localhost only for security
     "port": 5000,
     "debug": False,
-    "secret_key": os.environ.get("SECRET_KEY", os.urandom(24).hex()),
+    "secret_key": os.environ.get("SECRET_KEY"),  # Generated on first use if unset
     "session_timeout_minutes": 30,
 }
 
+def get_web_secret_key() -> str:
+    """Return the web session secret, generating a random one on first use."""
+    if not WEB_CONFIG["secret_key"]:
+        WEB_CONFIG["secret_key"] = os.urandom(24).hex()
+    return WEB_CONFIG["secret_key"]
+
 # Logging Configuration
 LOG_CONFIG = {
     "level": "INFO",
@@ -135,6 +157,12 @@ FEATURES = {
     "llm_enabled": True,  # Can disable if Ollama not available
 }
 
+# Feature flags never change after load, so freeze the enabled names once
+# (e.g. "journal", "finance", "document")
+ENABLED_FEATURES = frozenset(
+    name[:-len("_enabled")] for name, enabled in FEATURES.items() if enabled
+)
+
 def get_config():
     """Return all configuration as a dictionary."""
     return {
@@ -2,14 +2,594 @@
 Encrypted local database handler for privacy-first data storage.
 Uses SQLite with encryption for all sensitive data.
 """
+import asyncio
+import atexit
 import sqlite3
-import json
+import hashlib
+import itertools
+import operator
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping as MappingABC
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Callable, Tuple, Iterable, Iterator, Final
 
 from config import DATABASE_PATH, DATA_RETENTION_DAYS, AUTO_DELETE_ENABLED
 from encryption import get_encryption_manager
+from utils import json_dumps, json_loads
+
+# Event times (timestamp / processed_at) are stored as integer Unix epoch
+# seconds so range filters compare integers, not ISO text. They are declared
+# EPOCHINT - INTEGER affinity, plus a name detect_types can hook - and handed
+# back as datetime objects; writes bind them with _epoch(). created_at
+# columns keep SQLite's DATETIME text.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("EPOCHINT", lambda value: datetime.fromtimestamp(int(value)))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+# Current time as epoch seconds, for column defaults
+EPOCH_NOW = "(CAST(strftime('%s', 'now') AS INTEGER))"
+
+TABLE_SCHEMAS = {
+    "journal_entries": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp EPOCHINT NOT NULL,
+        content_encrypted BLOB NOT NULL,
+        sentiment_score INTEGER,
+        mood_category TEXT,
+        tags TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    """,
+    "transactions": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp EPOCHINT NOT NULL,
+        amount REAL NOT NULL,
+        transaction_type TEXT NOT NULL,
+        category TEXT,
+        merchant_encrypted BLOB,
+        description_encrypted BLOB,
+        account_number_encrypted BLOB,
+        tags TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    """,
+    "budgets": """
+        category TEXT PRIMARY KEY,
+        monthly_limit REAL NOT NULL,
+        alert_threshold REAL DEFAULT 0.9,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    "documents": f"""
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        filename TEXT NOT NULL,
+        filepath_encrypted BLOB,
+        content_encrypted BLOB NOT NULL,
+        file_type TEXT,
+        summary_encrypted BLOB,
+        entities_encrypted BLOB,
+        processed_at EPOCHINT DEFAULT {EPOCH_NOW},
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    """,
+    "audit_log": f"""
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        action_type TEXT NOT NULL,
+        module TEXT NOT NULL,
+        details_encrypted BLOB,
+        timestamp EPOCHINT DEFAULT {EPOCH_NOW}
+    """,
+    # Debit totals per category and local calendar month (ym = YYYYMM),
+    # kept current by triggers on transactions. Uncategorized spending is
+    # stored under '' since key columns can't be NULL here.
+    "monthly_spend": """
+        category TEXT NOT NULL,
+        ym INTEGER NOT NULL,
+        total REAL NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (category, ym)
+    """,
+    # One row per (journal entry, tag), kept current by triggers on
+    # journal_entries, so tag lookups and counts use an index instead of
+    # expanding every entry's JSON tags. Tags are plaintext metadata already.
+    "journal_tags": """
+        entry_id INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (entry_id, tag)
+    """,
+    # Fast key for re-ingested files: the blind-indexed absolute path plus
+    # the size and mtime it had when processed. A match means the file is
+    # unchanged and its existing document row can be reused as is.
+    "document_cache": """
+        path_key TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        doc_id INTEGER NOT NULL
+    """,
+    # LLM responses (categories, summaries) keyed by the blind-indexed
+    # request, so repeated inputs skip the model across restarts
+    "llm_cache": f"""
+        request_key TEXT PRIMARY KEY,
+        response_encrypted BLOB NOT NULL,
+        created_at INTEGER NOT NULL DEFAULT {EPOCH_NOW}
+    """,
+}
+
+# STRICT tables need SQLite 3.37+; older libraries just skip the type checks
+STRICT_TABLES = sqlite3.sqlite_version_info >= (3, 37, 0)
+
+# Trailing table options. budgets is small rows looked up by category, so it
+# is clustered on that key (one B-tree lookup instead of index + rowid).
+# The blob-heavy tables keep their rowid, which suits large rows better.
+TABLE_OPTIONS = {
+    "budgets": "WITHOUT ROWID, STRICT" if STRICT_TABLES else "WITHOUT ROWID",
+    "monthly_spend": "WITHOUT ROWID, STRICT" if STRICT_TABLES else "WITHOUT ROWID",
+    "journal_tags": "WITHOUT ROWID, STRICT" if STRICT_TABLES else "WITHOUT ROWID",
+    "document_cache": "WITHOUT ROWID, STRICT" if STRICT_TABLES else "WITHOUT ROWID",
+    "llm_cache": "WITHOUT ROWID, STRICT" if STRICT_TABLES else "WITHOUT ROWID",
+}
+
+# Sentiment scores are stored as integers in steps of 1/SENTIMENT_SCALE
+# (VADER reports four decimals, so nothing is lost): SQLite then keeps each
+# in one or two bytes instead of an 8-byte REAL. Converted at the row
+# decoder and in the SQL aggregates.
+SENTIMENT_SCALE = 10000
+
+# Columns older databases stored differently: (declared type they have now,
+# SQL converting an old value). Tables with an outdated column are rebuilt.
+# Journal and transaction times were written by Python as local time; the
+# DEFAULT CURRENT_TIMESTAMP columns already hold UTC and must not be shifted.
+EPOCH_CONVERSION = ("EPOCHINT", "CAST(strftime('%s', {column}, 'utc') AS INTEGER)")
+UTC_EPOCH_CONVERSION = ("EPOCHINT", "CAST(strftime('%s', {column}) AS INTEGER)")
+COLUMN_CONVERSIONS = {
+    "journal_entries": {
+        "timestamp": EPOCH_CONVERSION,
+        "sentiment_score": ("INTEGER", f"CAST(ROUND({{column}} * {SENTIMENT_SCALE}) AS INTEGER)"),
+    },
+    "transactions": {"timestamp": EPOCH_CONVERSION},
+    "documents": {"processed_at": UTC_EPOCH_CONVERSION},
+    "audit_log": {"timestamp": UTC_EPOCH_CONVERSION},
+}
+
+# Applied to every connection. WAL turns each commit into an append to the
+# log instead of a rollback-journal fsync cycle; with synchronous=NORMAL a
+# commit is durable across application crashes (only an OS crash or power
+# loss can drop the last few). Note WAL keeps "-wal" and "-shm" sidecar
+# files next to the database file while it is open.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # ~64 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA foreign_keys=ON",
+)
+
+# DATA_RETENTION_DAYS key -> (table, event-time column) it expires rows from
+RETENTION_TARGETS: Final = {
+    "journal": ("journal_entries", "timestamp"),
+    "finance": ("transactions", "timestamp"),
+    "documents": ("documents", "processed_at"),
+    "audit_logs": ("audit_log", "timestamp"),
+    "llm_cache": ("llm_cache", "created_at"),
+}
+
+# Document content whose ciphertext is at least this large (about a page) is
+# written to a content-addressed file under "<database dir>/blobs", and the
+# row keeps only a reference: this prefix byte plus the file's SHA-256 hex.
+EXTERNAL_CONTENT_MIN_SIZE = 4096
+EXTERNAL_REF_PREFIX = b"\x03"
+
+# Words fed to the blind search index
+WORD_PATTERN = re.compile(r"\w+")
+
+# Size of sqlite3's per-connection prepared statement cache. Hot statements
+# are kept as constant strings below so every call hits that cache instead
+# of being re-parsed and re-planned.
+STATEMENT_CACHE_SIZE = 256
+
+# Rows pulled from a cursor per fetchmany() call by the read methods; each
+# batch is decrypted column by column before the next one is fetched
+FETCH_BATCH_SIZE = 128
+
+# Async callers get one writer thread (WAL allows a single writer at a time,
+# so more would only queue on the lock) and a few reader threads. Each has
+# its own connection: sqlite3 transactions belong to the connection, so
+# sharing the main one would let a commit on one thread take another's
+# half-done write with it.
+READER_THREADS = 4
+READER_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+INSERT_JOURNAL_SQL: Final[str] = """
+    INSERT INTO journal_entries (timestamp, content_encrypted, sentiment_score, mood_category, tags)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_TRANSACTION_SQL: Final[str] = """
+    INSERT INTO transactions (timestamp, amount, transaction_type, category, 
+                             merchant_encrypted, description_encrypted, 
+                             account_number_encrypted, tags)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_DOCUMENT_SQL: Final[str] = """
+    INSERT INTO documents (filename, filepath_encrypted, content_encrypted, 
+                          file_type, summary_encrypted, entities_encrypted)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_DOCUMENT_CACHE_SQL: Final[str] = """
+    INSERT OR REPLACE INTO document_cache (path_key, size, mtime_ns, doc_id)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Triggers fire on every connection (including the cleanup one), so expired
+# or deleted documents take their cache entries with them
+DOCUMENT_CACHE_DELETE_TRIGGER: Final[str] = """
+    CREATE TRIGGER IF NOT EXISTS document_cache_delete AFTER DELETE ON documents
+    BEGIN DELETE FROM document_cache WHERE doc_id = old.id; END
+"""
+
+UPSERT_LLM_CACHE_SQL: Final[str] = """
+    INSERT OR REPLACE INTO llm_cache (request_key, response_encrypted) VALUES (?, ?)
+"""
+
+CACHED_LLM_RESPONSE_SQL: Final[str] = """
+    SELECT response_encrypted FROM llm_cache WHERE request_key = ?
+"""
+
+INSERT_AUDIT_SQL: Final[str] = """
+    INSERT INTO audit_log (action_type, module, details_encrypted, timestamp)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Buffered audit records are written once this many are pending (writes,
+# audit reads and close() also flush them)
+AUDIT_FLUSH_SIZE = 64
+
+MOOD_STATISTICS_SQL: Final[str] = f"""
+    SELECT mood_category, COUNT(*) as count, AVG(sentiment_score) / {SENTIMENT_SCALE}.0 as avg_sentiment
+    FROM journal_entries
+    WHERE timestamp >= ?
+    GROUP BY mood_category
+"""
+
+# Entry count and sentiment total per (local weekday, mood); weekday 0 is Sunday
+MOOD_AGGREGATES_SQL: Final[str] = f"""
+    SELECT CAST(strftime('%w', timestamp, 'unixepoch', 'localtime') AS INTEGER) AS dow,
+           mood_category, COUNT(*), TOTAL(sentiment_score) / {SENTIMENT_SCALE}
+    FROM journal_entries
+    WHERE timestamp >= ?
+    GROUP BY dow, mood_category
+    ORDER BY mood_category, dow
+"""
+
+SPENDING_BY_CATEGORY_SQL: Final[str] = """
+    SELECT category, SUM(amount) as total, COUNT(*) as count
+    FROM transactions
+    WHERE timestamp BETWEEN ? AND ? AND transaction_type = 'debit'
+    GROUP BY category
+    ORDER BY total DESC
+"""
+
+PERIOD_TOTALS_SQL: Final[str] = """
+    SELECT COALESCE(SUM(CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END), 0),
+           COUNT(*)
+    FROM transactions
+    WHERE timestamp BETWEEN ? AND ?
+"""
+
+# Same result, with whole calendar months read from the monthly_spend
+# rollup; only the partial months at either end of the range touch
+# transactions. Params: head start/end, tail start/end, first/last ym.
+SPENDING_BY_CATEGORY_ROLLUP_SQL: Final[str] = """
+    SELECT category, SUM(total) as total, SUM(count) as count
+    FROM (
+        SELECT category, amount AS total, 1 AS count
+        FROM transactions
+        WHERE ((timestamp >= ? AND timestamp < ?) OR (timestamp BETWEEN ? AND ?))
+          AND transaction_type = 'debit'
+        UNION ALL
+        SELECT NULLIF(category, ''), total, count
+        FROM monthly_spend
+        WHERE ym BETWEEN ? AND ?
+    )
+    GROUP BY category
+    ORDER BY total DESC
+"""
+
+# One category's debit total for one month: a primary-key lookup in the rollup
+MONTH_CATEGORY_SPEND_SQL: Final[str] = """
+    SELECT total FROM monthly_spend WHERE category = IFNULL(?, '') AND ym = ?
+"""
+
+# Local calendar month of a transactions row, as stored in monthly_spend.ym
+_ROW_MONTH = "CAST(strftime('%Y%m', {row}.timestamp, 'unixepoch', 'localtime') AS INTEGER)"
+
+MONTHLY_SPEND_TRIGGERS: Final = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS monthly_spend_insert AFTER INSERT ON transactions
+    WHEN new.transaction_type = 'debit'
+    BEGIN
+        INSERT INTO monthly_spend (category, ym, total, count)
+        VALUES (IFNULL(new.category, ''), {_ROW_MONTH.format(row='new')}, new.amount, 1)
+        ON CONFLICT (category, ym) DO UPDATE SET
+            total = total + excluded.total,
+            count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS monthly_spend_delete AFTER DELETE ON transactions
+    WHEN old.transaction_type = 'debit'
+    BEGIN
+        UPDATE monthly_spend SET total = total - old.amount, count = count - 1
+        WHERE category = IFNULL(old.category, '') AND ym = {_ROW_MONTH.format(row='old')};
+        DELETE FROM monthly_spend
+        WHERE category = IFNULL(old.category, '') AND ym = {_ROW_MONTH.format(row='old')} AND count <= 0;
+    END
+    """,
+)
+
+MONTHLY_SPEND_BACKFILL_SQL: Final[str] = f"""
+    INSERT INTO monthly_spend (category, ym, total, count)
+    SELECT IFNULL(category, ''), {_ROW_MONTH.format(row='transactions')}, SUM(amount), COUNT(*)
+    FROM transactions
+    WHERE transaction_type = 'debit'
+    GROUP BY 1, 2
+"""
+
+UPSERT_BUDGET_SQL: Final[str] = """
+    INSERT INTO budgets (category, monthly_limit, alert_threshold)
+    VALUES (?, ?, ?)
+    ON CONFLICT(category) DO UPDATE SET
+        monthly_limit = ?,
+        alert_threshold = ?,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _next_month(month_start: datetime) -> datetime:
+    """First day of the month after month_start's."""
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+def _previous_month(month_start: datetime) -> datetime:
+    """First day of the month before month_start's."""
+    if month_start.month == 1:
+        return month_start.replace(year=month_start.year - 1, month=12)
+    return month_start.replace(month=month_start.month - 1)
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    """A datetime as bound to an EPOCHINT column (integer Unix seconds)."""
+    return int(value.timestamp()) if value is not None else None
+
+
+def _quantize_sentiment(score: Optional[float]) -> Optional[int]:
+    """A sentiment score in its stored form (see SENTIMENT_SCALE)."""
+    return round(score * SENTIMENT_SCALE) if score is not None else None
+
+
+def _fetch_batches(cursor: sqlite3.Cursor) -> Iterator[List[tuple]]:
+    """Iterate over an executed cursor's result set FETCH_BATCH_SIZE rows at a time."""
+    cursor.arraysize = FETCH_BATCH_SIZE
+    return iter(cursor.fetchmany, [])
+
+
+def _build_filter_queries(select: str, conditions: Tuple[str, ...],
+                          order_by: str) -> Dict[Tuple[bool, ...], str]:
+    """
+    Precompose one SQL string per combination of optional filters.
+    
+    Args:
+        select: SELECT ... FROM part of the query
+        conditions: Optional WHERE conditions, each with one placeholder
+        order_by: ORDER BY expression
+    
+    Returns:
+        Queries keyed by one flag per condition plus a final LIMIT flag
+    """
+    queries = {}
+    for flags in itertools.product((False, True), repeat=len(conditions) + 1):
+        query = select
+        active = [condition for condition, on in zip(conditions, flags) if on]
+        if active:
+            query += " WHERE " + " AND ".join(active)
+        query += " ORDER BY " + order_by
+        if flags[-1]:
+            query += " LIMIT ?"
+        queries[flags] = query
+    return queries
+
+
+# Explicit column lists: rows are decoded straight into result dicts, so the
+# SELECTs name exactly the columns those dicts are built from. Rows come back
+# as plain tuples (no row factory); the decoders unpack them in this order.
+JOURNAL_COLUMNS = "id, timestamp, content_encrypted, sentiment_score, mood_category, tags, created_at"
+TRANSACTION_COLUMNS = (
+    "id, timestamp, amount, transaction_type, category, merchant_encrypted, "
+    "description_encrypted, account_number_encrypted, tags, created_at"
+)
+TRANSACTION_SUMMARY_COLUMNS = "id, timestamp, amount, transaction_type, category"
+DOCUMENT_COLUMNS = (
+    "id, filename, filepath_encrypted, content_encrypted, file_type, "
+    "summary_encrypted, entities_encrypted, processed_at, created_at"
+)
+AUDIT_COLUMNS = "id, action_type, module, details_encrypted, timestamp"
+
+JOURNAL_QUERIES: Final = _build_filter_queries(
+    f"SELECT {JOURNAL_COLUMNS} FROM journal_entries",
+    ("timestamp >= ?", "timestamp <= ?"),
+    "timestamp DESC"
+)
+
+# Tags are plaintext, so tag lookups run in SQL (on the journal_tags index)
+# and only the matching entries are decrypted. NOCASE folds ASCII letters
+# only. The unary + keeps the planner from walking every entry in timestamp
+# order; the few matches are fetched by id and sorted instead.
+JOURNAL_BY_TAG_SQL: Final[str] = f"""
+    SELECT {JOURNAL_COLUMNS} FROM journal_entries
+    WHERE id IN (SELECT entry_id FROM journal_tags WHERE tag = ? COLLATE NOCASE)
+    ORDER BY +timestamp DESC
+"""
+
+JOURNAL_TAG_COUNTS_SQL: Final[str] = """
+    SELECT tag, COUNT(*) AS count
+    FROM journal_tags
+    GROUP BY tag
+    ORDER BY count DESC, tag
+"""
+
+JOURNAL_TAGS_TRIGGERS: Final = (
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_tags_insert AFTER INSERT ON journal_entries
+    WHEN new.tags IS NOT NULL
+    BEGIN
+        INSERT OR IGNORE INTO journal_tags (entry_id, tag)
+        SELECT new.id, value FROM json_each(new.tags) WHERE type = 'text';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_tags_delete AFTER DELETE ON journal_entries
+    WHEN old.tags IS NOT NULL
+    BEGIN
+        DELETE FROM journal_tags WHERE entry_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_tags_update AFTER UPDATE OF tags ON journal_entries
+    BEGIN
+        DELETE FROM journal_tags WHERE entry_id = old.id;
+        INSERT OR IGNORE INTO journal_tags (entry_id, tag)
+        SELECT new.id, value FROM json_each(new.tags) WHERE new.tags IS NOT NULL AND type = 'text';
+    END
+    """,
+)
+
+JOURNAL_TAGS_BACKFILL_SQL: Final[str] = """
+    INSERT OR IGNORE INTO journal_tags (entry_id, tag)
+    SELECT journal_entries.id, json_each.value
+    FROM journal_entries, json_each(journal_entries.tags)
+    WHERE journal_entries.tags IS NOT NULL AND json_each.type = 'text'
+"""
+
+TRANSACTION_QUERIES: Final = _build_filter_queries(
+    f"SELECT {TRANSACTION_COLUMNS} FROM transactions",
+    ("timestamp >= ?", "timestamp <= ?", "category = ?"),
+    "timestamp DESC"
+)
+
+# Same filters without the encrypted columns, for callers that only need amounts
+TRANSACTION_SUMMARY_QUERIES: Final = _build_filter_queries(
+    f"SELECT {TRANSACTION_SUMMARY_COLUMNS} FROM transactions",
+    ("timestamp >= ?", "timestamp <= ?", "category = ?"),
+    "timestamp DESC"
+)
+
+DOCUMENT_QUERIES: Final = _build_filter_queries(
+    f"SELECT {DOCUMENT_COLUMNS} FROM documents",
+    ("processed_at >= ?", "processed_at <= ?"),
+    "processed_at DESC"
+)
+
+CACHED_DOCUMENT_SQL: Final[str] = f"""
+    SELECT {DOCUMENT_COLUMNS} FROM documents
+    WHERE id = (SELECT doc_id FROM document_cache WHERE path_key = ? AND size = ? AND mtime_ns = ?)
+"""
+
+DOCUMENT_BY_ID_SQL: Final[str] = f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = ?"
+
+AUDIT_QUERIES: Final = _build_filter_queries(
+    f"SELECT {AUDIT_COLUMNS} FROM audit_log",
+    ("timestamp >= ?", "module = ?"),
+    "timestamp DESC"
+)
+
+AUDIT_SUMMARY_SQL: Final[str] = """
+    SELECT module, action_type, COUNT(*)
+    FROM audit_log
+    WHERE timestamp >= ?
+    GROUP BY module, action_type
+"""
+
+
+class LazyRow(MappingABC):
+    """
+    Read-only result row that decrypts its encrypted fields on first access.
+    
+    Behaves like the dicts returned by the eager read paths (``row['merchant']``,
+    ``.get()``, ``in``, iteration in the same key order), and also allows
+    attribute access (``row.merchant``). A field that is never read is never
+    decrypted; one that is read is decrypted once and memoized.
+    """
+    __slots__ = ("_row", "_decrypt", "_encrypted", "_cache")
+    
+    # Encrypted fields holding JSON text
+    JSON_FIELDS = frozenset({'entities'})
+    
+    def __init__(self, fields: Dict[str, Any], encrypted: Dict[str, Optional[bytes]],
+                 decrypt: Callable[[bytes], str]):
+        """
+        Args:
+            fields: Plain (already decoded) columns
+            encrypted: Encrypted values by field name; unset (None) fields are
+                left out, matching the eager dicts
+            decrypt: Function turning one encrypted value into text
+        """
+        self._row = fields
+        self._decrypt = decrypt
+        self._encrypted = {name: value for name, value in encrypted.items() if value}
+        self._cache: Dict[str, Any] = {}
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._row:
+            return self._row[key]
+        if key in self._cache:
+            return self._cache[key]
+        if key not in self._encrypted:
+            raise KeyError(key)
+        
+        value = self._decrypt(self._encrypted[key])
+        if key in self.JSON_FIELDS:
+            value = json_loads(value)
+        self._cache[key] = value
+        return value
+    
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    def __contains__(self, key: object) -> bool:
+        # Membership never needs a decrypt
+        return key in self._row or key in self._encrypted
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self._row
+        yield from self._encrypted
+    
+    def __len__(self) -> int:
+        return len(self._row) + len(self._encrypted)
+    
+    def __repr__(self) -> str:
+        return f"LazyRow({self._row!r}, encrypted={list(self._encrypted)})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Decrypt every field and return a plain dict."""
+        return {key: self[key] for key in self}
 
 
 class PrivacyDatabase:
@@ -23,118 +603,324 @@ class PrivacyDatabase:
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
+        self.blob_dir = Path(db_path).parent / "blobs"
         self.encryption_manager = get_encryption_manager()
         self.conn: Optional[sqlite3.Connection] = None
-        
+        self.fts_available = False
+        self._audit_buffer: deque = deque()
+        self._cleanup_thread: Optional[threading.Thread] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._reader_local = threading.local()
+        self._reader_connections: List[sqlite3.Connection] = []
+        self._writer_view: Optional["PrivacyDatabase"] = None
+    
     def connect(self) -> None:
         """Establish database connection and create tables if needed."""
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.conn.row_factory = sqlite3.Row  # Access columns by name
+        # The connection is shared by all modules (see PrivacyAgent.__init__),
+        # which may be constructed on worker threads; use is one thread at a time
+        self.conn = sqlite3.connect(
+            str(self.db_path),
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        
+        for pragma in CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
         self._create_tables()
         
+        # Threads are only spawned on first use
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault-writer")
+        self._readers = ThreadPoolExecutor(max_workers=READER_THREADS, thread_name_prefix="vault-reader")
+        self._externalize_document_content()
+        self._create_search_index()
+        
         if AUTO_DELETE_ENABLED:
-            self._cleanup_old_data()
+            # Retention cleanup can touch a lot of rows; keep it off the
+            # startup path so the first query isn't stuck behind it
+            self._cleanup_thread = threading.Thread(
+                target=self._cleanup_old_data, name="vault-cleanup", daemon=True
+            )
+            self._cleanup_thread.start()
     
     def _create_tables(self) -> None:
         """Create all necessary tables."""
         cursor = self.conn.cursor()
         
-        # Journal entries table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS journal_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                content_encrypted BLOB NOT NULL,
-                sentiment_score REAL,
-                mood_category TEXT,
-                tags TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        for table, columns in TABLE_SCHEMAS.items():
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns}) {TABLE_OPTIONS.get(table, '')}")
         
-        # Financial transactions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                amount REAL NOT NULL,
-                transaction_type TEXT NOT NULL,
-                category TEXT,
-                merchant_encrypted BLOB,
-                description_encrypted BLOB,
-                account_number_encrypted BLOB,
-                tags TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        self._migrate_column_types(cursor)
+        self._migrate_budgets(cursor)
+        self._create_spending_rollup(cursor)
+        self._create_tag_index(cursor)
+        cursor.execute(DOCUMENT_CACHE_DELETE_TRIGGER)
+        
+        # Create indexes for faster queries
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_timestamp ON journal_entries(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_processed ON documents(processed_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp)")
+        
+        # Composite indexes let filtered reads seek straight to one module's /
+        # category's date range instead of scanning by date and filtering
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_module_ts ON audit_log(module, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_txn_cat_ts ON transactions(category, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_tags_tag ON journal_tags(tag COLLATE NOCASE)")
+        # Superseded by idx_txn_cat_ts (category is its leading column)
+        cursor.execute("DROP INDEX IF EXISTS idx_transactions_category")
+        
+        self.conn.commit()
+    
+    def _migrate_column_types(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Rebuild tables created before a column's storage format changed.
+        
+        Event times used to be DATETIME text (now epoch seconds) and sentiment
+        scores REALs (now scaled integers). SQLite can't change a column's
+        type in place, so each old table is copied into a fresh one, with its
+        outdated columns converted per COLUMN_CONVERSIONS, then swapped in.
+        Indexes and triggers are recreated afterwards by the normal setup.
+        """
+        for table, conversions in COLUMN_CONVERSIONS.items():
+            info = cursor.execute(f"PRAGMA table_info({table})").fetchall()
+            # table_info rows are (cid, name, type, notnull, dflt_value, pk)
+            outdated = {
+                name for _, name, col_type, *_ in info
+                if name in conversions and col_type != conversions[name][0]
+            }
+            if not outdated:
+                continue
+            
+            select = ", ".join(
+                conversions[name][1].format(column=name) if name in outdated else name
+                for _, name, *_ in info
             )
-        """)
+            with self.conn:
+                cursor.execute(f"CREATE TABLE {table}_migrated ({TABLE_SCHEMAS[table]})")
+                cursor.execute(f"INSERT INTO {table}_migrated SELECT {select} FROM {table}")
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {table}_migrated RENAME TO {table}")
+    
+    def _create_spending_rollup(self, cursor: sqlite3.Cursor) -> None:
+        """Install the monthly_spend triggers, filling the rollup if it's new."""
+        for trigger in MONTHLY_SPEND_TRIGGERS:
+            cursor.execute(trigger)
         
-        # Budget tracking table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS budgets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL UNIQUE,
-                monthly_limit REAL NOT NULL,
-                alert_threshold REAL DEFAULT 0.9,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        # An empty rollup was just created (or there are no debits, and this
+        # is a no-op)
+        if cursor.execute("SELECT 1 FROM monthly_spend LIMIT 1").fetchone() is None:
+            cursor.execute(MONTHLY_SPEND_BACKFILL_SQL)
+    
+    def _create_tag_index(self, cursor: sqlite3.Cursor) -> None:
+        """Install the journal_tags triggers, filling the table if it's new."""
+        for trigger in JOURNAL_TAGS_TRIGGERS:
+            cursor.execute(trigger)
+        
+        # An empty table was just created (or no entry has tags, and this is
+        # a no-op)
+        if cursor.execute("SELECT 1 FROM journal_tags LIMIT 1").fetchone() is None:
+            cursor.execute(JOURNAL_TAGS_BACKFILL_SQL)
+    
+    def _migrate_budgets(self, cursor: sqlite3.Cursor) -> None:
+        """Rebuild a budgets table created with a rowid as a WITHOUT ROWID table."""
+        sql = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'budgets'"
+        ).fetchone()[0]
+        if "WITHOUT ROWID" in sql.upper():
+            return
+        
+        columns = "category, monthly_limit, alert_threshold, created_at, updated_at"
+        with self.conn:
+            cursor.execute(
+                f"CREATE TABLE budgets_migrated ({TABLE_SCHEMAS['budgets']}) {TABLE_OPTIONS['budgets']}"
             )
-        """)
+            cursor.execute(f"INSERT INTO budgets_migrated ({columns}) SELECT {columns} FROM budgets")
+            cursor.execute("DROP TABLE budgets")
+            cursor.execute("ALTER TABLE budgets_migrated RENAME TO budgets")
+    
+    def _blob_path(self, digest: str) -> Path:
+        """Location of an externally stored document body."""
+        return self.blob_dir / digest[:2] / digest
+    
+    def _store_document_content(self, content_enc: bytes) -> bytes:
+        """
+        Move large encrypted document content out of the row.
+        
+        Args:
+            content_enc: Encrypted (compressed) content
+            
+        Returns:
+            Value for the content_encrypted column: the ciphertext itself if
+            small, otherwise a reference to the file now holding it
+        """
+        if len(content_enc) < EXTERNAL_CONTENT_MIN_SIZE:
+            return content_enc
+        
+        digest = hashlib.sha256(content_enc).hexdigest()
+        path = self._blob_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(content_enc)
+        os.replace(temp_path, path)
+        
+        return EXTERNAL_REF_PREFIX + digest.encode()
+    
+    def _decrypt_document_value(self, value: bytes) -> str:
+        """Decrypt a documents column, loading externally stored content first."""
+        if value[:1] == EXTERNAL_REF_PREFIX:
+            value = self._blob_path(value[1:].decode()).read_bytes()
+        return self.encryption_manager.decrypt_compressed(value)
+    
+    def _external_blob_paths(self, cursor: sqlite3.Cursor, query: str, params: tuple) -> List[Path]:
+        """Blob files referenced by the content_encrypted values a query selects."""
+        return [
+            self._blob_path(value[1:].decode())
+            for (value,) in cursor.execute(query, params).fetchall()
+            if value[:1] == EXTERNAL_REF_PREFIX
+        ]
+    
+    def _externalize_document_content(self) -> None:
+        """Move large document bodies stored inline by older versions to blob files."""
+        cursor = self.conn.cursor()
+        rows = cursor.execute(
+            "SELECT id, content_encrypted FROM documents WHERE length(content_encrypted) >= ?",
+            (EXTERNAL_CONTENT_MIN_SIZE,)
+        ).fetchall()
+        if not rows:
+            return
+        
+        with self.conn:
+            for doc_id, content_enc in rows:
+                cursor.execute("UPDATE documents SET content_encrypted = ? WHERE id = ?",
+                               (self._store_document_content(content_enc), doc_id))
+        
+        # Reclaim the pages the inline bodies used
+        self.conn.execute("VACUUM")
+    
+    def _create_search_index(self) -> None:
+        """
+        Create FTS5 tables holding blind-indexed (HMAC'd) word tokens.
+        
+        Plain FTS over content would write decrypted text into the database
+        file, so only keyed token hashes are indexed. Rows are indexed from
+        Python on insert; deletes are mirrored by triggers.
+        """
+        cursor = self.conn.cursor()
+        
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts USING fts5(tokens)")
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(tokens)")
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 - searches fall back to scanning
+            return
         
-        # Documents table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                filename TEXT NOT NULL,
-                filepath_encrypted BLOB,
-                content_encrypted BLOB NOT NULL,
-                file_type TEXT,
-                summary_encrypted BLOB,
-                entities_encrypted BLOB,
-                processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
+            CREATE TRIGGER IF NOT EXISTS journal_fts_delete AFTER DELETE ON journal_entries
+            BEGIN DELETE FROM journal_fts WHERE rowid = old.id; END
         """)
-        
-        # Privacy audit log table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                action_type TEXT NOT NULL,
-                module TEXT NOT NULL,
-                details_encrypted BLOB,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
+            CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents
+            BEGIN DELETE FROM documents_fts WHERE rowid = old.id; END
         """)
         
-        # Create indexes for faster queries
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_timestamp ON journal_entries(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_processed ON documents(processed_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp)")
+        # Index rows written before the search index existed
+        for row in cursor.execute(
+            f"SELECT {JOURNAL_COLUMNS} FROM journal_entries WHERE id NOT IN (SELECT rowid FROM journal_fts)"
+        ).fetchall():
+            entry = self._decode_journal_row(row)
+            self._index_journal_entry(cursor, entry['id'], entry['content'],
+                                      entry['mood_category'], entry['tags'])
+        
+        for row in cursor.execute(
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id NOT IN (SELECT rowid FROM documents_fts)"
+        ).fetchall():
+            doc = self._decode_document_row(row)
+            self._index_document(cursor, doc['id'], doc['filename'], doc['content'],
+                                 doc.get('summary'), doc.get('entities'))
         
         self.conn.commit()
+        self.fts_available = True
+    
+    def _index_tokens(self, *texts: Optional[str]) -> str:
+        """Blind-index every distinct word in the given texts."""
+        words = set()
+        for text in texts:
+            if text:
+                words.update(WORD_PATTERN.findall(text.lower()))
+        return " ".join(self.encryption_manager.blind_index(word) for word in words)
+    
+    def _match_expression(self, query: str) -> Optional[str]:
+        """Build an FTS5 MATCH expression requiring every word of the query."""
+        words = set(WORD_PATTERN.findall(query.lower()))
+        if not words:
+            return None
+        return " AND ".join(f'"{self.encryption_manager.blind_index(word)}"' for word in words)
+    
+    def _index_journal_entry(self, cursor: sqlite3.Cursor, entry_id: int, content: str,
+                             mood_category: str, tags: Optional[List[str]]) -> None:
+        """Add a journal entry to the blind search index."""
+        cursor.execute(
+            "INSERT OR REPLACE INTO journal_fts (rowid, tokens) VALUES (?, ?)",
+            (entry_id, self._index_tokens(content, mood_category, *(tags or [])))
+        )
+    
+    def _index_document(self, cursor: sqlite3.Cursor, doc_id: int, filename: str, content: str,
+                        summary: Optional[str], entities: Optional[List[str]]) -> None:
+        """Add a document to the blind search index."""
+        cursor.execute(
+            "INSERT OR REPLACE INTO documents_fts (rowid, tokens) VALUES (?, ?)",
+            (doc_id, self._index_tokens(filename, content, summary, *(entities or [])))
+        )
     
     def _cleanup_old_data(self) -> None:
-        """Remove old data based on retention policies."""
-        cursor = self.conn.cursor()
+        """
+        Remove old data based on retention policies.
         
-        for table, days in DATA_RETENTION_DAYS.items():
-            if table == "audit_logs":
-                table = "audit_log"
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            if table == "journal_entries":
-                cursor.execute("DELETE FROM journal_entries WHERE timestamp < ?", (cutoff_date,))
-            elif table == "finance":
-                cursor.execute("DELETE FROM transactions WHERE timestamp < ?", (cutoff_date,))
-            elif table == "documents":
-                cursor.execute("DELETE FROM documents WHERE processed_at < ?", (cutoff_date,))
-            elif table == "audit_log":
-                cursor.execute("DELETE FROM audit_log WHERE timestamp < ?", (cutoff_date,))
+        Runs on a background thread (see connect()) with its own connection,
+        so its transaction can't interleave with writes on the shared one.
+        """
+        expired_blobs: List[Path] = []
+        conn = sqlite3.connect(str(self.db_path))
         
-        self.conn.commit()
+        try:
+            # All deletes run in one transaction (committed once, rolled back on error)
+            with conn:
+                cursor = conn.cursor()
+                now = int(time.time())
+                
+                for key, (table, column) in RETENTION_TARGETS.items():
+                    days = DATA_RETENTION_DAYS.get(key)
+                    if not days:
+                        continue
+                    
+                    # Bound as epoch seconds, so the DELETEs are range scans on
+                    # the timestamp indexes
+                    cutoff = now - days * 86400
+                    if not self._has_rows_before(cursor, table, column, cutoff):
+                        continue
+                    
+                    if table == "documents":
+                        expired_blobs = self._external_blob_paths(
+                            cursor, "SELECT content_encrypted FROM documents WHERE processed_at < ?", (cutoff,)
+                        )
+                    cursor.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,))
+        except sqlite3.Error as e:
+            print(f"Warning: Retention cleanup failed: {e}")
+            return
+        finally:
+            conn.close()
+        
+        # Files go only once the rows pointing at them are gone
+        for path in expired_blobs:
+            path.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _has_rows_before(cursor: sqlite3.Cursor, table: str, column: str, cutoff: int) -> bool:
+        """Cheap index probe: does the table hold anything older than cutoff?"""
+        query = f"SELECT 1 FROM {table} WHERE {column} < ? LIMIT 1"
+        return cursor.execute(query, (cutoff,)).fetchone() is not None
     
     # ========== Journal Methods ==========
     
@@ -143,66 +929,175 @@ class PrivacyDatabase:
         self._log_audit("add_entry", "journal", {"length": len(content)})
         
         encrypted_content = self.encryption_manager.encrypt(content)
-        tags_json = json.dumps(tags) if tags else None
+        tags_json = json_dumps(tags).decode() if tags else None
         
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO journal_entries (timestamp, content_encrypted, sentiment_score, mood_category, tags)
-            VALUES (?, ?, ?, ?, ?)
-        """, (datetime.now(), encrypted_content, sentiment_score, mood_category, tags_json))
+        cursor.execute(INSERT_JOURNAL_SQL,
+                       (int(time.time()), encrypted_content, _quantize_sentiment(sentiment_score),
+                        mood_category, tags_json))
+        entry_id = cursor.lastrowid
         
+        if self.fts_available:
+            self._index_journal_entry(cursor, entry_id, content, mood_category, tags)
+        
+        self._write_audit_buffer()
         self.conn.commit()
-        return cursor.lastrowid
+        return entry_id
     
-    def get_journal_entries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Retrieve journal entries within a date range."""
-        self._log_audit("read_entries", "journal", {"start": str(start_date), "end": str(end_date)})
+    def add_journal_entries_bulk(self, entries: Iterable[Tuple[str, float, str, Optional[List[str]]]]) -> List[int]:
+        """
+        Add many journal entries in a single transaction.
         
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM journal_entries WHERE 1=1"
-        params = []
+        Args:
+            entries: (content, sentiment_score, mood_category, tags) tuples
+        
+        Returns:
+            IDs of the new entries, in input order
+        """
+        now = int(time.time())
+        encrypt = self.encryption_manager.encrypt
+        entries = list(entries)
+        rows = [
+            (now, encrypt(content), _quantize_sentiment(sentiment_score), mood_category,
+             json_dumps(tags).decode() if tags else None)
+            for content, sentiment_score, mood_category, tags in entries
+        ]
+        if not rows:
+            return []
         
-        if start_date:
-            query += " AND timestamp >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND timestamp <= ?"
-            params.append(end_date)
+        self._log_audit("add_entries_bulk", "journal", {"count": len(rows)})
+        
+        # Rows are inserted one by one (still one commit) because each new id
+        # is needed for the search index
+        entry_ids = []
+        with self.conn:
+            self._write_audit_buffer()
+            cursor = self.conn.cursor()
+            for row, (content, _, mood_category, tags) in zip(rows, entries):
+                cursor.execute(INSERT_JOURNAL_SQL, row)
+                entry_ids.append(cursor.lastrowid)
+                if self.fts_available:
+                    self._index_journal_entry(cursor, cursor.lastrowid, content, mood_category, tags)
+        
+        return entry_ids
+    
+    def get_journal_entries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """Retrieve journal entries within a date range (limit=None for no cap)."""
+        self._log_audit("read_entries", "journal", {
+            "start": _epoch(start_date),
+            "end": _epoch(end_date),
+        })
         
-        query += " ORDER BY timestamp DESC LIMIT ?"
-        params.append(limit)
+        filters = (start_date, end_date)
+        params = [_epoch(value) for value in filters if value]
+        if limit is not None:
+            params.append(limit)
+        query = JOURNAL_QUERIES[tuple(bool(value) for value in filters) + (limit is not None,)]
         
+        cursor = self.conn.cursor()
         cursor.execute(query, params)
-        rows = cursor.fetchall()
         
         entries = []
-        for row in rows:
-            entry = dict(row)
-            entry['content'] = self.encryption_manager.decrypt(entry['content_encrypted'])
-            entry['tags'] = json.loads(entry['tags']) if entry['tags'] else []
-            del entry['content_encrypted']
-            entries.append(entry)
+        for batch in _fetch_batches(cursor):
+            entries.extend(self._decode_journal_rows(batch))
+        return entries
+    
+    def count_journal_entries(self) -> int:
+        """Return the total number of journal entries."""
+        cursor = self.conn.cursor()
+        return cursor.execute("SELECT COUNT(*) FROM journal_entries").fetchone()[0]
+    
+    def iter_journal_entries(self) -> Iterator[Dict[str, Any]]:
+        """Yield every journal entry, newest first, straight from the cursor."""
+        self._log_audit("read_entries", "journal", {"start": "all", "end": "all"})
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {JOURNAL_COLUMNS} FROM journal_entries ORDER BY timestamp DESC")
+        for batch in _fetch_batches(cursor):
+            yield from self._decode_journal_rows(batch)
+    
+    def _decode_journal_row(self, row: tuple) -> Dict[str, Any]:
+        """Convert a journal_entries row (JOURNAL_COLUMNS) into a decrypted dict."""
+        return self._decode_journal_rows([row])[0]
+    
+    def _decode_journal_rows(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Decode a batch of journal_entries rows with one decrypt_many call."""
+        contents = self.encryption_manager.decrypt_many([content_enc for _, _, content_enc, *_ in rows])
+        return [
+            {
+                'id': entry_id,
+                'timestamp': timestamp,
+                'sentiment_score': sentiment_score / SENTIMENT_SCALE if sentiment_score is not None else None,
+                'mood_category': mood_category,
+                'tags': json_loads(tags) if tags else [],
+                'created_at': created_at,
+                'content': content,
+            }
+            for (entry_id, timestamp, _, sentiment_score, mood_category, tags, created_at), content
+            in zip(rows, contents)
+        ]
+    
+    def get_journal_entries_by_tag(self, tag: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Journal entries carrying a tag (case-insensitive), newest first.
+        
+        Args:
+            tag: Tag to look for
+            limit: Maximum entries to return (None for no cap)
+            
+        Returns:
+            Matching, decrypted entries
+        """
+        self._log_audit("read_entries", "journal", {"tag": True})
+        
+        query = JOURNAL_BY_TAG_SQL
+        params = [tag]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
         
+        entries = []
+        for batch in _fetch_batches(cursor):
+            entries.extend(self._decode_journal_rows(batch))
         return entries
     
+    def get_journal_tag_counts(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Journal tags with the number of entries using each, most used first (limit=None for all)."""
+        cursor = self.conn.cursor()
+        if limit is None:
+            return cursor.execute(JOURNAL_TAG_COUNTS_SQL).fetchall()
+        return cursor.execute(JOURNAL_TAG_COUNTS_SQL + " LIMIT ?", (limit,)).fetchall()
+    
     def get_mood_statistics(self, days: int = 30) -> Dict[str, Any]:
         """Get mood statistics for the past N days."""
         start_date = datetime.now() - timedelta(days=days)
         cursor = self.conn.cursor()
         
-        cursor.execute("""
-            SELECT mood_category, COUNT(*) as count, AVG(sentiment_score) as avg_sentiment
-            FROM journal_entries
-            WHERE timestamp >= ?
-            GROUP BY mood_category
-        """, (start_date,))
+        cursor.execute(MOOD_STATISTICS_SQL, (_epoch(start_date),))
         
         results = cursor.fetchall()
         return {
-            "statistics": [dict(row) for row in results],
+            "statistics": [
+                {'mood_category': mood_category, 'count': count, 'avg_sentiment': avg_sentiment}
+                for mood_category, count, avg_sentiment in results
+            ],
             "period_days": days
         }
     
+    def get_mood_aggregates(self, start_date: datetime) -> List[Tuple[int, str, int, float]]:
+        """
+        Journal entry counts and sentiment totals since a date, without reading entries.
+        
+        Returns:
+            (weekday, mood_category, count, sentiment_total) rows, weekday 0 being Sunday
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(MOOD_AGGREGATES_SQL, (_epoch(start_date),))
+        return cursor.fetchall()
+    
     # ========== Finance Methods ==========
     
     def add_transaction(self, timestamp: datetime, amount: float, transaction_type: str, 
@@ -214,189 +1109,798 @@ class PrivacyDatabase:
         merchant_enc = self.encryption_manager.encrypt(merchant) if merchant else None
         description_enc = self.encryption_manager.encrypt(description) if description else None
         account_enc = self.encryption_manager.encrypt(account_number) if account_number else None
-        tags_json = json.dumps(tags) if tags else None
+        tags_json = json_dumps(tags).decode() if tags else None
         
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO transactions (timestamp, amount, transaction_type, category, 
-                                     merchant_encrypted, description_encrypted, 
-                                     account_number_encrypted, tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (timestamp, amount, transaction_type, category, merchant_enc, description_enc, account_enc, tags_json))
+        cursor.execute(INSERT_TRANSACTION_SQL,
+                       (_epoch(timestamp), amount, transaction_type, category,
+                        merchant_enc, description_enc, account_enc, tags_json))
         
+        self._write_audit_buffer()
         self.conn.commit()
         return cursor.lastrowid
     
+    def ingest_transactions(self, transactions: Iterable[Tuple]) -> int:
+        """
+        Stream many transactions into one executemany in a single transaction.
+        
+        Rows are encrypted as executemany pulls them, so a generator of
+        parsed messages is never materialized as a list.
+        
+        Args:
+            transactions: Tuples in add_transaction's argument order:
+                (timestamp, amount, transaction_type, category,
+                 merchant, description, account_number, tags)
+        
+        Returns:
+            Number of transactions added
+        """
+        encrypt = self.encryption_manager.encrypt
+        count = 0
+        
+        def encrypted_rows():
+            nonlocal count
+            for (timestamp, amount, transaction_type, category,
+                 merchant, description, account_number, tags) in transactions:
+                count += 1
+                yield (_epoch(timestamp), amount, transaction_type, category,
+                       encrypt(merchant) if merchant else None,
+                       encrypt(description) if description else None,
+                       encrypt(account_number) if account_number else None,
+                       json_dumps(tags).decode() if tags else None)
+        
+        with self.conn:
+            self._write_audit_buffer()
+            self.conn.executemany(INSERT_TRANSACTION_SQL, encrypted_rows())
+        
+        if count:
+            self._log_audit("ingest_transactions", "finance", {"count": count})
+        return count
+    
     def get_transactions(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, 
-                        category: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Retrieve transactions."""
+                        category: Optional[str] = None, limit: Optional[int] = 100) -> List[LazyRow]:
+        """
+        Retrieve transactions (limit=None for no cap).
+        
+        Merchant, description and account number are decrypted only when read.
+        """
         self._log_audit("read_transactions", "finance", {"category": category})
         
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM transactions WHERE 1=1"
-        params = []
-        
-        if start_date:
-            query += " AND timestamp >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND timestamp <= ?"
-            params.append(end_date)
+        filters = (start_date, end_date, category)
+        params = [_epoch(value) for value in (start_date, end_date) if value]
         if category:
-            query += " AND category = ?"
             params.append(category)
+        if limit is not None:
+            params.append(limit)
+        query = TRANSACTION_QUERIES[tuple(bool(value) for value in filters) + (limit is not None,)]
         
-        query += " ORDER BY timestamp DESC LIMIT ?"
-        params.append(limit)
-        
+        cursor = self.conn.cursor()
         cursor.execute(query, params)
-        rows = cursor.fetchall()
         
         transactions = []
-        for row in rows:
-            txn = dict(row)
-            if txn['merchant_encrypted']:
-                txn['merchant'] = self.encryption_manager.decrypt(txn['merchant_encrypted'])
-            if txn['description_encrypted']:
-                txn['description'] = self.encryption_manager.decrypt(txn['description_encrypted'])
-            if txn['account_number_encrypted']:
-                txn['account_number'] = self.encryption_manager.decrypt(txn['account_number_encrypted'])
-            txn['tags'] = json.loads(txn['tags']) if txn['tags'] else []
-            
-            # Remove encrypted fields
-            for key in ['merchant_encrypted', 'description_encrypted', 'account_number_encrypted']:
-                if key in txn:
-                    del txn[key]
-            
+        for batch in _fetch_batches(cursor):
+            transactions.extend(map(self._lazy_transaction_row, batch))
+        return transactions
+    
+    def count_transactions(self) -> int:
+        """Return the total number of transactions."""
+        cursor = self.conn.cursor()
+        return cursor.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    
+    def iter_transactions(self) -> Iterator[Dict[str, Any]]:
+        """Yield every transaction, newest first, straight from the cursor."""
+        self._log_audit("read_transactions", "finance", {"category": None})
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {TRANSACTION_COLUMNS} FROM transactions ORDER BY timestamp DESC")
+        for batch in _fetch_batches(cursor):
+            yield from self._decode_transaction_rows(batch)
+    
+    def _decode_transaction_row(self, row: tuple) -> Dict[str, Any]:
+        """Convert a transactions row (TRANSACTION_COLUMNS) into a decrypted dict."""
+        return self._decode_transaction_rows([row])[0]
+    
+    def _decode_transaction_rows(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Decode a whole result set, decrypting one column at a time."""
+        decrypt_many = self.encryption_manager.decrypt_many
+        merchants = decrypt_many([row[5] for row in rows])
+        descriptions = decrypt_many([row[6] for row in rows])
+        account_numbers = decrypt_many([row[7] for row in rows])
+        
+        transactions = []
+        for row, merchant, description, account_number in zip(rows, merchants, descriptions, account_numbers):
+            txn_id, timestamp, amount, transaction_type, category, _, _, _, tags, created_at = row
+            txn = {
+                'id': txn_id,
+                'timestamp': timestamp,
+                'amount': amount,
+                'transaction_type': transaction_type,
+                'category': category,
+                'tags': json_loads(tags) if tags else [],
+                'created_at': created_at,
+            }
+            # Optional fields are only present when set
+            if merchant is not None:
+                txn['merchant'] = merchant
+            if description is not None:
+                txn['description'] = description
+            if account_number is not None:
+                txn['account_number'] = account_number
             transactions.append(txn)
         
         return transactions
     
+    def _lazy_transaction_row(self, row: tuple) -> LazyRow:
+        """Wrap a transactions row, deferring decryption until a field is read."""
+        (txn_id, timestamp, amount, transaction_type, category,
+         merchant_enc, description_enc, account_number_enc, tags, created_at) = row
+        return LazyRow(
+            {
+                'id': txn_id,
+                'timestamp': timestamp,
+                'amount': amount,
+                'transaction_type': transaction_type,
+                'category': category,
+                'tags': json_loads(tags) if tags else [],
+                'created_at': created_at,
+            },
+            {
+                'merchant': merchant_enc,
+                'description': description_enc,
+                'account_number': account_number_enc,
+            },
+            self.encryption_manager.decrypt
+        )
+    
+    def get_transaction_summaries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                  category: Optional[str] = None, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """
+        Transactions without their encrypted fields (no decryption needed).
+        
+        Returns:
+            Dicts with id, timestamp, amount, transaction_type and category
+        """
+        self._log_audit("read_transactions", "finance", {"category": category, "summary": True})
+        
+        filters = (start_date, end_date, category)
+        params = [_epoch(value) for value in (start_date, end_date) if value]
+        if category:
+            params.append(category)
+        if limit is not None:
+            params.append(limit)
+        query = TRANSACTION_SUMMARY_QUERIES[tuple(bool(value) for value in filters) + (limit is not None,)]
+        
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        
+        return [
+            {'id': txn_id, 'timestamp': timestamp, 'amount': amount,
+             'transaction_type': transaction_type, 'category': category}
+            for txn_id, timestamp, amount, transaction_type, category in cursor.fetchall()
+        ]
+    
     def get_spending_by_category(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Get spending statistics by category."""
+        """
+        Get spending statistics by category.
+        
+        Calendar months lying entirely inside the range are summed from the
+        monthly_spend rollup; only the partial months at the ends are
+        aggregated from individual transactions.
+        """
+        # First month boundary at or after start_date, and the start of end_date's month
+        first_full = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if first_full < start_date:
+            first_full = _next_month(first_full)
+        last_partial = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT category, SUM(amount) as total, COUNT(*) as count
-            FROM transactions
-            WHERE timestamp BETWEEN ? AND ? AND transaction_type = 'debit'
-            GROUP BY category
-            ORDER BY total DESC
-        """, (start_date, end_date))
+        if first_full >= last_partial:
+            cursor.execute(SPENDING_BY_CATEGORY_SQL, (_epoch(start_date), _epoch(end_date)))
+        else:
+            last_full = _previous_month(last_partial)
+            cursor.execute(SPENDING_BY_CATEGORY_ROLLUP_SQL, (
+                _epoch(start_date), _epoch(first_full), _epoch(last_partial), _epoch(end_date),
+                first_full.year * 100 + first_full.month, last_full.year * 100 + last_full.month,
+            ))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return [
+            {'category': category, 'total': total, 'count': count}
+            for category, total, count in cursor.fetchall()
+        ]
+    
+    def get_period_totals(self, start_date: datetime, end_date: datetime) -> Tuple[float, float, int]:
+        """
+        Credit total, debit total and transaction count for a date range.
+        
+        Returns:
+            Tuple of (total_credit, total_debit, count), from a single aggregate query
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(PERIOD_TOTALS_SQL, (_epoch(start_date), _epoch(end_date)))
+        return cursor.fetchone()
+    
+    def get_month_spending(self, category: Optional[str], month: datetime) -> float:
+        """Debit total of one category in the calendar month containing month."""
+        row = self.conn.execute(MONTH_CATEGORY_SPEND_SQL, (category, month.year * 100 + month.month)).fetchone()
+        return row[0] if row else 0
     
     def set_budget(self, category: str, monthly_limit: float, alert_threshold: float = 0.9) -> None:
         """Set or update a budget for a category."""
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO budgets (category, monthly_limit, alert_threshold)
-            VALUES (?, ?, ?)
-            ON CONFLICT(category) DO UPDATE SET
-                monthly_limit = ?,
-                alert_threshold = ?,
-                updated_at = CURRENT_TIMESTAMP
-        """, (category, monthly_limit, alert_threshold, monthly_limit, alert_threshold))
+        cursor.execute(UPSERT_BUDGET_SQL,
+                       (category, monthly_limit, alert_threshold, monthly_limit, alert_threshold))
         
         self.conn.commit()
     
     # ========== Document Methods ==========
     
     def add_document(self, filename: str, filepath: str, content: str, file_type: str,
-                    summary: str = None, entities: List[str] = None) -> int:
-        """Add a processed document."""
+                    summary: str = None, entities: List[str] = None,
+                    fast_key: Optional[Tuple[str, int, int]] = None) -> int:
+        """
+        Add a processed document.
+        
+        fast_key is the source file's (absolute path, size, mtime_ns); when
+        given, get_document_by_fastkey() returns this document until the
+        file changes.
+        """
         self._log_audit("add_document", "documents", {"filename": filename})
         
+        # Document text can be large, so it is compressed before encryption
+        encrypt_compressed = self.encryption_manager.encrypt_compressed
         filepath_enc = self.encryption_manager.encrypt(filepath)
-        content_enc = self.encryption_manager.encrypt(content)
-        summary_enc = self.encryption_manager.encrypt(summary) if summary else None
-        entities_enc = self.encryption_manager.encrypt(json.dumps(entities)) if entities else None
+        content_enc = self._store_document_content(encrypt_compressed(content))
+        summary_enc = encrypt_compressed(summary) if summary else None
+        entities_enc = encrypt_compressed(json_dumps(entities)) if entities else None
         
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO documents (filename, filepath_encrypted, content_encrypted, 
-                                  file_type, summary_encrypted, entities_encrypted)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (filename, filepath_enc, content_enc, file_type, summary_enc, entities_enc))
+        cursor.execute(INSERT_DOCUMENT_SQL,
+                       (filename, filepath_enc, content_enc, file_type, summary_enc, entities_enc))
+        doc_id = cursor.lastrowid
         
+        if self.fts_available:
+            self._index_document(cursor, doc_id, filename, content, summary, entities)
+        
+        if fast_key is not None:
+            path, size, mtime_ns = fast_key
+            cursor.execute(UPSERT_DOCUMENT_CACHE_SQL,
+                           (self.encryption_manager.blind_index(path), size, mtime_ns, doc_id))
+        
+        self._write_audit_buffer()
         self.conn.commit()
-        return cursor.lastrowid
+        return doc_id
     
-    def get_documents(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Retrieve processed documents."""
+    def get_document_by_fastkey(self, fast_key: Tuple[str, int, int]) -> Optional[LazyRow]:
+        """
+        Look up the document last processed from an unchanged file.
+        
+        Args:
+            fast_key: (absolute path, size, mtime_ns) of the source file
+            
+        Returns:
+            The stored document, or None if the file is new or has changed
+        """
+        path, size, mtime_ns = fast_key
+        cursor = self.conn.cursor()
+        row = cursor.execute(
+            CACHED_DOCUMENT_SQL, (self.encryption_manager.blind_index(path), size, mtime_ns)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        self._log_audit("read_documents", "documents", {"cached": True})
+        return self._lazy_document_row(row)
+    
+    def get_documents(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                      limit: Optional[int] = 50) -> List[LazyRow]:
+        """
+        Retrieve processed documents (limit=None for no cap).
+        
+        The date range is applied in SQL against the processed_at index.
+        Path, content, summary and entities are decrypted only when read.
+        """
         self._log_audit("read_documents", "documents", {})
         
+        filters = (start_date, end_date)
+        params = [_epoch(value) for value in filters if value]
+        if limit is not None:
+            params.append(limit)
+        query = DOCUMENT_QUERIES[tuple(bool(value) for value in filters) + (limit is not None,)]
+        
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM documents
-            ORDER BY processed_at DESC
-            LIMIT ?
-        """, (limit,))
+        cursor.execute(query, params)
         
-        rows = cursor.fetchall()
         documents = []
+        for batch in _fetch_batches(cursor):
+            documents.extend(map(self._lazy_document_row, batch))
+        return documents
+    
+    def get_document(self, doc_id: int) -> Optional[LazyRow]:
+        """
+        Retrieve one document by ID (a primary-key lookup).
         
-        for row in rows:
-            doc = dict(row)
-            doc['filepath'] = self.encryption_manager.decrypt(doc['filepath_encrypted'])
-            doc['content'] = self.encryption_manager.decrypt(doc['content_encrypted'])
-            if doc['summary_encrypted']:
-                doc['summary'] = self.encryption_manager.decrypt(doc['summary_encrypted'])
-            if doc['entities_encrypted']:
-                doc['entities'] = json.loads(self.encryption_manager.decrypt(doc['entities_encrypted']))
-            
-            # Remove encrypted fields
-            for key in ['filepath_encrypted', 'content_encrypted', 'summary_encrypted', 'entities_encrypted']:
-                if key in doc:
-                    del doc[key]
+        Args:
+            doc_id: Document ID
             
+        Returns:
+            The document, or None if there is no such document
+        """
+        self._log_audit("read_documents", "documents", {"id": doc_id})
+        
+        row = self.conn.execute(DOCUMENT_BY_ID_SQL, (doc_id,)).fetchone()
+        return self._lazy_document_row(row) if row is not None else None
+    
+    def search_documents(self, query: str, limit: int = 500) -> List[LazyRow]:
+        """
+        Candidate documents for a text search, newest first.
+        
+        Always includes the most recent documents. The blind search index
+        only knows whole words, so it can only add candidates: up to `limit`
+        older documents containing every word of the query. A partial word
+        (e.g. "Lond") is matched by callers against the recent documents,
+        the same as without FTS5. Callers still verify the match.
+        """
+        match = self._match_expression(query) if self.fts_available else None
+        if match is None:
+            return self.get_documents(limit=limit)
+        
+        self._log_audit("search_documents", "documents", {})
+        
+        cursor = self.conn.cursor()
+        cursor.execute(
+            self._MODULE_SEARCH_QUERIES['documents'][1],
+            (match, limit, 2 * limit)
+        )
+        
+        documents = []
+        for batch in _fetch_batches(cursor):
+            documents.extend(map(self._lazy_document_row, batch))
+        return documents
+    
+    def count_documents(self) -> int:
+        """Return the total number of processed documents."""
+        cursor = self.conn.cursor()
+        return cursor.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    
+    def iter_documents(self) -> Iterator[LazyRow]:
+        """
+        Yield every document, newest first, straight from the cursor.
+        
+        Rows are lazy, so exports that skip the content never decrypt it
+        (or read an externalized body from disk).
+        """
+        self._log_audit("read_documents", "documents", {})
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {DOCUMENT_COLUMNS} FROM documents ORDER BY processed_at DESC")
+        for batch in _fetch_batches(cursor):
+            yield from map(self._lazy_document_row, batch)
+    
+    def _lazy_document_row(self, row: tuple) -> LazyRow:
+        """Wrap a documents row, deferring decryption until a field is read."""
+        (doc_id, filename, filepath_enc, content_enc, file_type,
+         summary_enc, entities_enc, processed_at, created_at) = row
+        return LazyRow(
+            {
+                'id': doc_id,
+                'filename': filename,
+                'file_type': file_type,
+                'processed_at': processed_at,
+                'created_at': created_at,
+            },
+            {
+                'filepath': filepath_enc,
+                'content': content_enc,
+                'summary': summary_enc,
+                'entities': entities_enc,
+            },
+            self._decrypt_document_value
+        )
+    
+    def _decode_document_row(self, row: tuple) -> Dict[str, Any]:
+        """Convert a documents row (DOCUMENT_COLUMNS) into a decrypted dict."""
+        return self._decode_document_rows([row])[0]
+    
+    def _decode_document_rows(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Decode a whole result set, decrypting one column at a time."""
+        decrypt_many = self.encryption_manager.decrypt_many
+        filepaths = decrypt_many([row[2] for row in rows])
+        contents = [self._decrypt_document_value(row[3]) for row in rows]
+        summaries = decrypt_many([row[5] for row in rows], compressed=True)
+        entities = decrypt_many([row[6] for row in rows], compressed=True)
+        
+        documents = []
+        for row, filepath, content, summary, entity_list in zip(rows, filepaths, contents, summaries, entities):
+            doc_id, filename, _, _, file_type, _, _, processed_at, created_at = row
+            doc = {
+                'id': doc_id,
+                'filename': filename,
+                'file_type': file_type,
+                'processed_at': processed_at,
+                'created_at': created_at,
+                'filepath': filepath,
+                'content': content,
+            }
+            # Optional fields are only present when set
+            if summary is not None:
+                doc['summary'] = summary
+            if entity_list is not None:
+                doc['entities'] = json_loads(entity_list)
             documents.append(doc)
         
         return documents
     
-    # ========== Audit Methods ==========
+    # ========== Search Methods ==========
     
-    def _log_audit(self, action_type: str, module: str, details: Dict[str, Any]) -> None:
-        """Log an action for privacy audit trail."""
-        details_enc = self.encryption_manager.encrypt(json.dumps(details))
+    # Every branch of the cross-module search query projects the same column
+    # layout; these pick each module's columns back out of a result row, in
+    # that module's *_COLUMNS order, so the usual row decoders apply.
+    _SEARCH_LAYOUT = {
+        'journal': operator.itemgetter(1, 2, 4, 11, 8, 10, 3),
+        'transactions': operator.itemgetter(1, 2, 11, 9, 8, 4, 5, 6, 10, 3),
+        'documents': operator.itemgetter(1, 8, 7, 4, 9, 5, 6, 2, 3),
+    }
+    
+    _SEARCH_QUERY_TEMPLATE = """
+        SELECT * FROM (
+            SELECT 'journal' AS src, id, timestamp, created_at,
+                   content_encrypted, NULL, NULL, NULL,
+                   mood_category, NULL, tags, sentiment_score
+            FROM journal_entries {journal_filter} ORDER BY timestamp DESC LIMIT ?
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'transactions', id, timestamp, created_at,
+                   merchant_encrypted, description_encrypted, account_number_encrypted, NULL,
+                   category, transaction_type, tags, amount
+            FROM transactions ORDER BY timestamp DESC LIMIT ?
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'documents', id, processed_at, created_at,
+                   content_encrypted, summary_encrypted, entities_encrypted, filepath_encrypted,
+                   filename, file_type, NULL, NULL
+            FROM documents {documents_filter} ORDER BY processed_at DESC LIMIT ?
+        )
+    """
+    _SEARCH_QUERY = _SEARCH_QUERY_TEMPLATE.format(journal_filter="", documents_filter="")
+    # The blind index only matches whole words, so it may only add candidates:
+    # the most recent rows are always kept, plus older rows containing every
+    # query word. The recent rows sort first, so a LIMIT of twice the recent
+    # count never cuts them.
+    _INDEXED_FILTER = (
+        "WHERE id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)"
+        " OR id IN (SELECT id FROM {table} ORDER BY {order} DESC LIMIT ?)"
+    )
+    _JOURNAL_INDEXED_FILTER = _INDEXED_FILTER.format(
+        fts="journal_fts", table="journal_entries", order="timestamp")
+    _DOCUMENTS_INDEXED_FILTER = _INDEXED_FILTER.format(
+        fts="documents_fts", table="documents", order="processed_at")
+    _SEARCH_QUERY_INDEXED = _SEARCH_QUERY_TEMPLATE.format(
+        journal_filter=_JOURNAL_INDEXED_FILTER,
+        documents_filter=_DOCUMENTS_INDEXED_FILTER,
+    )
+    
+    # Per-module candidate queries for get_search_candidates_parallel():
+    # module -> (plain query, query widened by the blind index or None)
+    _MODULE_SEARCH_QUERIES = {
+        'journal': (
+            f"SELECT {JOURNAL_COLUMNS} FROM journal_entries ORDER BY timestamp DESC LIMIT ?",
+            f"SELECT {JOURNAL_COLUMNS} FROM journal_entries {_JOURNAL_INDEXED_FILTER}"
+            " ORDER BY timestamp DESC LIMIT ?",
+        ),
+        'transactions': (
+            f"SELECT {TRANSACTION_COLUMNS} FROM transactions ORDER BY timestamp DESC LIMIT ?",
+            None,
+        ),
+        'documents': (
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents ORDER BY processed_at DESC LIMIT ?",
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents {_DOCUMENTS_INDEXED_FILTER}"
+            " ORDER BY processed_at DESC LIMIT ?",
+        ),
+    }
+    
+    def get_search_candidates(self, limit_per_module: int = 1000,
+                              query: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the most recent rows of every module in a single round trip.
+        
+        Content is encrypted at rest, so matching has to happen after
+        decryption; this just gathers the candidates with one query (and one
+        audit entry) instead of three. When a query is given and the blind
+        search index is available, journal and document candidates also
+        include up to `limit_per_module` older rows containing every word of
+        the query. The index only knows whole words, so it never removes a
+        recent row; callers still verify the match.
+        
+        Args:
+            limit_per_module: Maximum rows to fetch from each module
+            query: Optional search text whose indexed matches are added as candidates
+        
+        Returns:
+            Decrypted rows keyed by 'journal', 'transactions' and 'documents'
+        """
+        self._log_audit("read_all", "search", {"limit_per_module": limit_per_module})
+        
+        decoders = {
+            'journal': self._decode_journal_rows,
+            'transactions': self._decode_transaction_rows,
+            'documents': self._decode_document_rows,
+        }
+        rows = {src: [] for src in decoders}
+        
+        match = self._match_expression(query) if query and self.fts_available else None
         
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO audit_log (action_type, module, details_encrypted)
-            VALUES (?, ?, ?)
-        """, (action_type, module, details_enc))
+        if match:
+            cursor.execute(self._SEARCH_QUERY_INDEXED,
+                           (match, limit_per_module, 2 * limit_per_module, limit_per_module,
+                            match, limit_per_module, 2 * limit_per_module))
+        else:
+            cursor.execute(self._SEARCH_QUERY, (limit_per_module,) * 3)
+        for row in cursor:
+            rows[row[0]].append(self._SEARCH_LAYOUT[row[0]](row))
         
-        self.conn.commit()
+        return {src: decode(rows[src]) for src, decode in decoders.items()}
     
-    def get_audit_log(self, module: Optional[str] = None, days: int = 7) -> List[Dict[str, Any]]:
-        """Retrieve privacy audit logs."""
-        start_date = datetime.now() - timedelta(days=days)
+    def get_search_candidates_parallel(self, limit_per_module: int = 1000,
+                                       query: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Same result as get_search_candidates(), one module per reader thread.
+        
+        Each module's rows are fetched and decrypted on a reader thread with
+        its own read-only connection, so the three modules overlap instead
+        of running back to back.
+        
+        Args:
+            limit_per_module: Maximum rows to fetch from each module
+            query: Optional search text whose indexed matches are added as candidates
+        
+        Returns:
+            Decrypted rows keyed by 'journal', 'transactions' and 'documents'
+        """
+        self._log_audit("read_all", "search", {"limit_per_module": limit_per_module})
+        
+        match = self._match_expression(query) if query and self.fts_available else None
+        futures = {
+            module: self._readers.submit(
+                lambda module=module: self._reader_db()._module_search_candidates(module, limit_per_module, match)
+            )
+            for module in self._MODULE_SEARCH_QUERIES
+        }
+        return {module: future.result() for module, future in futures.items()}
+    
+    def _module_search_candidates(self, module: str, limit: int, match: Optional[str]) -> List[Dict[str, Any]]:
+        """Fetch and decrypt one module's search candidates (see get_search_candidates_parallel)."""
+        decoders = {
+            'journal': self._decode_journal_rows,
+            'transactions': self._decode_transaction_rows,
+            'documents': self._decode_document_rows,
+        }
+        plain_query, indexed_query = self._MODULE_SEARCH_QUERIES[module]
+        
         cursor = self.conn.cursor()
+        if match and indexed_query:
+            cursor.execute(indexed_query, (match, limit, 2 * limit))
+        else:
+            cursor.execute(plain_query, (limit,))
         
-        query = "SELECT * FROM audit_log WHERE timestamp >= ?"
-        params = [start_date]
+        candidates = []
+        for batch in _fetch_batches(cursor):
+            candidates.extend(decoders[module](batch))
+        return candidates
+    
+    # ========== LLM Cache Methods ==========
+    
+    def get_cached_llm_response(self, request_key: str) -> Optional[str]:
+        """
+        Look up a stored LLM response.
         
-        if module:
-            query += " AND module = ?"
-            params.append(module)
+        Args:
+            request_key: Key identifying the request (model, task and inputs)
+            
+        Returns:
+            The response, or None if this request hasn't been answered
+        """
+        row = self.conn.execute(
+            CACHED_LLM_RESPONSE_SQL, (self.encryption_manager.blind_index(request_key),)
+        ).fetchone()
+        return self.encryption_manager.decrypt(row[0]) if row else None
+    
+    def cache_llm_response(self, request_key: str, response: str) -> None:
+        """Store an LLM response for get_cached_llm_response()."""
+        with self.conn:
+            self.conn.execute(UPSERT_LLM_CACHE_SQL, (self.encryption_manager.blind_index(request_key),
+                                                     self.encryption_manager.encrypt(response)))
+    
+    # ========== Audit Methods ==========
+    
+    def _log_audit(self, action_type: str, module: str, details: Dict[str, Any]) -> None:
+        """
+        Log an action for privacy audit trail.
         
-        query += " ORDER BY timestamp DESC"
+        Records are buffered in memory and written in batches, or together
+        with the next data write, instead of costing a commit each.
+        """
+        details_enc = self.encryption_manager.encrypt(json_dumps(details))
+        # Epoch seconds directly - the column's storage format, no datetime object needed
+        self._audit_buffer.append((action_type, module, details_enc, int(time.time())))
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        if len(self._audit_buffer) >= AUDIT_FLUSH_SIZE:
+            self._flush_audit()
+    
+    def _write_audit_buffer(self) -> None:
+        """Insert buffered audit records into the current transaction."""
+        if self._audit_buffer:
+            self.conn.executemany(INSERT_AUDIT_SQL, self._audit_buffer)
+            self._audit_buffer.clear()
+    
+    def _flush_audit(self) -> None:
+        """Write and commit all buffered audit records."""
+        if self._audit_buffer:
+            self._write_audit_buffer()
+            self.conn.commit()
+    
+    def get_audit_log(self, module: Optional[str] = None, days: int = 7,
+                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Retrieve privacy audit logs, newest first (limit=None for no cap)."""
+        # Include records still waiting in the buffers
+        self._flush_writer_audit()
+        self._flush_audit()
         
-        logs = []
-        for row in rows:
-            log = dict(row)
-            log['details'] = json.loads(self.encryption_manager.decrypt(log['details_encrypted']))
-            del log['details_encrypted']
-            logs.append(log)
+        start_date = datetime.now() - timedelta(days=days)
+        cursor = self.conn.cursor()
+        
+        params = [_epoch(start_date), module] if module else [_epoch(start_date)]
+        if limit is not None:
+            params.append(limit)
+        cursor.execute(AUDIT_QUERIES[(True, bool(module), limit is not None)], params)
         
+        logs = []
+        decrypt_many = self.encryption_manager.decrypt_many
+        for batch in _fetch_batches(cursor):
+            details = decrypt_many([row[3] for row in batch])
+            logs.extend(
+                {
+                    'id': log_id,
+                    'action_type': action_type,
+                    'module': module_name,
+                    'timestamp': timestamp,
+                    'details': json_loads(detail),
+                }
+                for (log_id, action_type, module_name, _, timestamp), detail in zip(batch, details)
+            )
         return logs
     
+    def get_audit_summary(self, days: int = 7) -> Tuple[Dict[str, int], Dict[str, int], int]:
+        """
+        Count audit events per module and per action type, without reading the log.
+        
+        Returns:
+            Tuple of (counts by module, counts by action type, total events)
+        """
+        # Include records still waiting in the buffers
+        self._flush_writer_audit()
+        self._flush_audit()
+        
+        start_date = datetime.now() - timedelta(days=days)
+        by_module = {}
+        by_action = {}
+        total = 0
+        for module, action_type, count in self.conn.execute(AUDIT_SUMMARY_SQL, (_epoch(start_date),)):
+            by_module[module] = by_module.get(module, 0) + count
+            by_action[action_type] = by_action.get(action_type, 0) + count
+            total += count
+        return by_module, by_action, total
+    
+    # ========== Async Methods ==========
+    
+    def _reader_db(self) -> "PrivacyDatabase":
+        """This reader thread's read-only view of the database (opened on first use)."""
+        reader = getattr(self._reader_local, "db", None)
+        if reader is None:
+            reader = PrivacyDatabase(self.db_path)
+            reader.conn = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,  # Closed from close() on the owner's thread
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for pragma in READER_PRAGMAS:
+                reader.conn.execute(pragma)
+            reader.fts_available = self.fts_available
+            # Audit records are writes too: hand them to the writer thread
+            reader._log_audit = lambda *args: self._writer.submit(
+                lambda: self._writer_db()._log_audit(*args)
+            )
+            
+            self._reader_local.db = reader
+            self._reader_connections.append(reader.conn)
+        return reader
+    
+    def _writer_db(self) -> "PrivacyDatabase":
+        """The writer thread's own view of the database (opened on first use; used only on that thread)."""
+        if self._writer_view is None:
+            writer = PrivacyDatabase(self.db_path)
+            writer.conn = sqlite3.connect(
+                str(self.db_path),
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for pragma in CONNECTION_PRAGMAS:
+                writer.conn.execute(pragma)
+            writer.fts_available = self.fts_available
+            self._writer_view = writer
+        return self._writer_view
+    
+    def _flush_writer_audit(self) -> None:
+        """Commit audit records buffered on the writer thread's connection."""
+        if self._writer is not None and self._writer_view is not None:
+            self._writer.submit(self._writer_view._flush_audit).result()
+    
+    async def _run_write(self, name: str, *args, **kwargs) -> Any:
+        """Run the named mutating method on the writer thread's own connection."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._writer, lambda: getattr(self._writer_db(), name)(*args, **kwargs)
+        )
+    
+    async def _run_read(self, name: str, *args, **kwargs) -> Any:
+        """Run the named read method on a reader thread's own connection."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._readers, lambda: getattr(self._reader_db(), name)(*args, **kwargs)
+        )
+    
+    async def add_journal_entry_async(self, *args, **kwargs) -> int:
+        """add_journal_entry() without blocking the event loop."""
+        return await self._run_write("add_journal_entry", *args, **kwargs)
+    
+    async def add_transaction_async(self, *args, **kwargs) -> int:
+        """add_transaction() without blocking the event loop."""
+        return await self._run_write("add_transaction", *args, **kwargs)
+    
+    async def add_document_async(self, *args, **kwargs) -> int:
+        """add_document() without blocking the event loop."""
+        return await self._run_write("add_document", *args, **kwargs)
+    
+    async def get_journal_entries_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """get_journal_entries() on a reader thread."""
+        return await self._run_read("get_journal_entries", *args, **kwargs)
+    
+    async def get_transactions_async(self, *args, **kwargs) -> List[LazyRow]:
+        """get_transactions() on a reader thread."""
+        return await self._run_read("get_transactions", *args, **kwargs)
+    
+    async def get_documents_async(self, *args, **kwargs) -> List[LazyRow]:
+        """get_documents() on a reader thread."""
+        return await self._run_read("get_documents", *args, **kwargs)
+    
     def close(self) -> None:
         """Close the database connection."""
+        if self._cleanup_thread is not None:
+            self._cleanup_thread.join()
+            self._cleanup_thread = None
+        if self._readers is not None:
+            self._readers.shutdown(wait=True)
+        if self._writer is not None:
+            # After the readers, which may still hand it audit records
+            if self._writer_view is not None:
+                self._writer.submit(self._writer_view.close)
+            self._writer.shutdown(wait=True)
+        self._readers = self._writer = None
+        self._writer_view = None
+        for reader_conn in self._reader_connections:
+            reader_conn.close()
+        self._reader_connections.clear()
+        self._reader_local = threading.local()
         if self.conn:
+            self._flush_audit()
+            # Refresh planner statistics where they are stale (cheap no-op otherwise)
+            self.conn.execute("PRAGMA optimize")
             self.conn.close()
+            self.conn = None
     
     def __enter__(self):
         """Context manager entry."""
@@ -408,6 +1912,28 @@ class PrivacyDatabase:
         self.close()
 
 
+
+# ========== Shared Instance ==========
+
+_shared_database: Optional[PrivacyDatabase] = None
+
+
+def get_shared_database() -> PrivacyDatabase:
+    """
+    Get the process-wide database, connecting on first use.
+    
+    Modules created without a database (search, tags, the module agents, ...)
+    share this one connection instead of each opening and configuring their
+    own. It is closed at interpreter exit, which also flushes buffered audit
+    records.
+    """
+    global _shared_database
+    if _shared_database is None or _shared_database.conn is None:
+        _shared_database = PrivacyDatabase()
+        _shared_database.connect()
+        atexit.register(_shared_database.close)
+    return _shared_database
+
 if __name__ == "__main__":
     # Test database functionality
     print("Testing Privacy Database...")
@@ -1,14 +1,26 @@
 """
 Encryption utilities for privacy-first data storage.
-All sensitive data is encrypted at rest using Fernet symmetric encryption.
+All sensitive data is encrypted at rest using AES-256-GCM; Fernet is kept
+only to decrypt tokens written by earlier versions.
 """
 import os
+import re
+import hmac
+import base64
+import functools
+import zlib
+import struct
+import tempfile
 import keyring
 import hashlib
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Union
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
 
@@ -19,6 +31,111 @@ from config import (
     DATABASE_ENCRYPTION_KEY_NAME,
 )
 
+# zstandard is optional - zlib (stdlib) is used when it's missing
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# pyahocorasick is optional - anonymize_text falls back to a regex alternation
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Leading byte of compressed ciphertexts. Plain ciphertexts (AEAD_PREFIX
+# below, or legacy Fernet tokens, which are base64 text) never start with
+# these bytes, so values stored uncompressed stay readable.
+ZLIB_PREFIX = b"\x01"
+ZSTD_PREFIX = b"\x02"
+
+# Values are sealed with AES-256-GCM as AEAD_PREFIX | nonce (12) | ciphertext + tag.
+# Values without the prefix are Fernet tokens from older versions and are
+# still decrypted with Fernet.
+AEAD_PREFIX = b"\x04"
+AEAD_NONCE_SIZE = 12
+
+# Shorter values are stored uncompressed (no gain, just framing overhead)
+COMPRESSION_MIN_SIZE = 256
+
+# Streamed file encryption: files are sealed in fixed-size AES-256-GCM
+# chunks so memory use stays constant whatever the file size. Layout:
+#   header: magic | version (u8) | chunk_size (u32) | total_chunks (u64) | base_iv (12)
+#   chunks: nonce (12) | ciphertext + tag (16)
+# Each chunk's nonce is base_iv with its index XORed into the last 4 bytes,
+# and its index and "final" flag are authenticated (with the header), so
+# chunks can't be reordered, dropped or the file truncated undetected.
+STREAM_MAGIC = b"VLTS"
+STREAM_VERSION = 1
+STREAM_HEADER = struct.Struct("<4sBIQ12s")
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_NONCE_SIZE = 12
+STREAM_TAG_SIZE = 16
+
+# Redaction-tag hash, initialized once; _fast_tag() copies it instead of
+# setting up a new BLAKE2b state per entity
+_TAG_HASH = hashlib.blake2b(digest_size=4)
+
+# secure_delete overwrites files in blocks of this size
+SECURE_DELETE_BLOCK_SIZE = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _load_key(service_name: str, key_name: str) -> Optional[str]:
+    """
+    Fetch a key from the OS keyring, once per process.
+    
+    Each keyring lookup is an IPC round trip (Secret Service / Keychain /
+    Credential Manager); every manager for the same key shares the result.
+    """
+    return keyring.get_password(service_name, key_name)
+
+
+def _is_fernet_key(stored_key: str) -> bool:
+    """Whether a keyring entry is in the old Fernet format (44 chars of urlsafe base64)."""
+    return len(stored_key) == 44 and stored_key.endswith("=")
+
+
+def _advise_sequential(f: BinaryIO) -> None:
+    """Hint the OS to read ahead aggressively on a file read front to back."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass  # Only a hint; some filesystems don't support it
+
+
+def _read_into(f: BinaryIO, buf: bytearray) -> int:
+    """Fill buf from f (short only at end of file); returns the bytes read."""
+    view = memoryview(buf)
+    filled = 0
+    while filled < len(buf):
+        n = f.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+@contextmanager
+def _replace_on_success(path: Path) -> Iterator[BinaryIO]:
+    """
+    Write to a temp file next to path, moving it into place only on success.
+    
+    A failed write (e.g. an authentication error half-way through a
+    decryption) leaves no partial output behind.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
 
 class EncryptionManager:
     """Manages encryption/decryption operations for the agent."""
@@ -33,6 +150,11 @@ class EncryptionManager:
         self.key_name = key_name
         self.service_name = "privacy_first_agent"
         self._fernet: Optional[Fernet] = None
+        self._aead: Optional[AESGCM] = None
+        self._index_key: Optional[bytes] = None
+        self._key_material: Optional[bytes] = None
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if ZSTD_AVAILABLE else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
         
     def initialize_key(self, password: Optional[str] = None) -> None:
         """
@@ -43,28 +165,100 @@ class EncryptionManager:
         """
         # Try to retrieve existing key from keyring
         try:
-            existing_key = keyring.get_password(self.service_name, self.key_name)
+            existing_key = _load_key(self.service_name, self.key_name)
             if existing_key:
-                self._fernet = Fernet(existing_key.encode())
+                if _is_fernet_key(existing_key):
+                    self._set_keys(self._migrate_fernet_key_to_raw(existing_key))
+                else:
+                    self._set_keys(bytes.fromhex(existing_key))
                 return
         except Exception as e:
             print(f"Warning: Could not retrieve key from keyring: {e}")
         
         # Generate new key
+        salt = None
         if password:
-            key = self._derive_key_from_password(password)
+            # Reuse a stored salt so the same password yields the same key again
+            salt = self._stored_salt() or os.urandom(SALT_LENGTH)
+            key = self._derive_key_from_password(password, salt)
         else:
-            key = Fernet.generate_key()
+            key = AESGCM.generate_key(bit_length=256)
+        
+        self._set_keys(key)
         
         # Store in keyring
         try:
-            keyring.set_password(self.service_name, self.key_name, key.decode())
-            self._fernet = Fernet(key)
+            keyring.set_password(self.service_name, self.key_name, key.hex())
+            if salt is not None:
+                keyring.set_password(self.service_name, f"{self.key_name}_salt", salt.hex())
+            _load_key.cache_clear()  # Don't keep serving the "no key yet" answer
             print("[OK] Encryption key initialized and stored securely")
         except Exception as e:
             print(f"Warning: Could not store key in keyring: {e}")
             print("Using in-memory key (will not persist)")
-            self._fernet = Fernet(key)
+    
+    def _set_keys(self, key: bytes) -> None:
+        """
+        Set up the ciphers from the raw 32-byte master key.
+        
+        The AES-256-GCM, search-index and file-stream keys are derived from
+        the key's Fernet (urlsafe-base64) form, which is what the keyring
+        held before keys were stored as hex, so existing data stays readable.
+        """
+        fernet_key = base64.urlsafe_b64encode(key)
+        self._fernet = Fernet(fernet_key)
+        self._aead = AESGCM(HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b"vault-aead",
+        ).derive(fernet_key))
+        self._index_key = hashlib.sha256(b"vault-search-index:" + fernet_key).digest()
+        self._key_material = fernet_key
+        
+        # Keys are ready: route calls straight to the workers, skipping the
+        # lazy-initialization check in the public methods
+        self.encrypt = self._encrypt
+        self.decrypt = self._decrypt
+        self.decrypt_bytes = self._decrypt_bytes
+    
+    def _migrate_fernet_key_to_raw(self, stored_key: str) -> bytes:
+        """
+        Convert a keyring entry from the old Fernet format to hex (one time).
+        
+        Args:
+            stored_key: urlsafe-base64 Fernet key read from the keyring
+            
+        Returns:
+            The raw 32-byte key
+        """
+        key = base64.urlsafe_b64decode(stored_key)
+        try:
+            keyring.set_password(self.service_name, self.key_name, key.hex())
+            _load_key.cache_clear()
+        except Exception as e:
+            # Still usable as is; the conversion is retried on the next start
+            print(f"Warning: Could not update key format in keyring: {e}")
+        return key
+    
+    def _file_cipher(self, base_iv: bytes) -> AESGCM:
+        """AES-256-GCM cipher for one streamed file (key derived per file via HKDF)."""
+        if self._key_material is None:
+            self.initialize_key()
+        
+        file_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=base_iv,
+            info=b"vault-file-stream",
+        ).derive(self._key_material)
+        return AESGCM(file_key)
+    
+    @staticmethod
+    def _chunk_nonce(base_iv: bytes, index: int) -> bytes:
+        """Nonce of chunk `index`: base_iv with the index XORed into its last 4 bytes."""
+        counter = int.from_bytes(base_iv[8:12], "little") ^ (index & 0xFFFFFFFF)
+        return base_iv[:8] + counter.to_bytes(4, "little")
     
     def _derive_key_from_password(self, password: str, salt: Optional[bytes] = None) -> bytes:
         """
@@ -75,7 +269,7 @@ class EncryptionManager:
             salt: Salt for key derivation (generated if not provided)
             
         Returns:
-            Derived encryption key
+            Derived 32-byte key
         """
         if salt is None:
             salt = os.urandom(SALT_LENGTH)
@@ -88,9 +282,16 @@ class EncryptionManager:
             backend=default_backend()
         )
         
-        key = kdf.derive(password.encode())
-        # Store salt with the key (prepend salt to key)
-        return Fernet.generate_key()  # For now, use Fernet's key format
+        return kdf.derive(password.encode())
+    
+    def _stored_salt(self) -> Optional[bytes]:
+        """Salt saved by an earlier password-based initialization, if any."""
+        try:
+            salt_hex = _load_key(self.service_name, f"{self.key_name}_salt")
+        except Exception as e:
+            print(f"Warning: Could not retrieve key salt from keyring: {e}")
+            return None
+        return bytes.fromhex(salt_hex) if salt_hex else None
     
     def encrypt(self, data: Union[str, bytes]) -> bytes:
         """
@@ -102,13 +303,24 @@ class EncryptionManager:
         Returns:
             Encrypted data
         """
-        if self._fernet is None:
+        if self._aead is None:
             self.initialize_key()
-        
+        return self._encrypt(data)
+    
+    def _encrypt(self, data: Union[str, bytes]) -> bytes:
+        """encrypt() once the keys are loaded."""
         if isinstance(data, str):
             data = data.encode()
         
-        return self._fernet.encrypt(data)
+        nonce = os.urandom(AEAD_NONCE_SIZE)
+        return AEAD_PREFIX + nonce + self._aead.encrypt(nonce, data, None)
+    
+    def _decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """Decrypt an AES-GCM value, or a Fernet token written by an older version."""
+        if encrypted_data[:1] == AEAD_PREFIX:
+            nonce_end = 1 + AEAD_NONCE_SIZE
+            return self._aead.decrypt(encrypted_data[1:nonce_end], encrypted_data[nonce_end:], None)
+        return self._fernet.decrypt(encrypted_data)
     
     def decrypt(self, encrypted_data: bytes) -> str:
         """
@@ -120,11 +332,97 @@ class EncryptionManager:
         Returns:
             Decrypted data as string
         """
-        if self._fernet is None:
+        if self._aead is None:
             self.initialize_key()
+        return self._decrypt(encrypted_data)
+    
+    def _decrypt(self, encrypted_data: bytes) -> str:
+        """decrypt() once the keys are loaded."""
+        return self._decrypt_bytes(encrypted_data).decode()
+    
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """
+        Decrypt data without decoding it as text.
         
-        decrypted = self._fernet.decrypt(encrypted_data)
-        return decrypted.decode()
+        Args:
+            encrypted_data: Encrypted data
+            
+        Returns:
+            Decrypted bytes
+        """
+        if self._aead is None:
+            self.initialize_key()
+        return self._decrypt_bytes(encrypted_data)
+    
+    def decrypt_many(self, encrypted_values: Iterable[Optional[bytes]],
+                     compressed: bool = False) -> List[Optional[str]]:
+        """
+        Decrypt a batch of values, e.g. one column of a result set.
+        
+        Args:
+            encrypted_values: Encrypted values; empty/None entries (unset
+                optional fields) come back as None
+            compressed: Values may have been written by encrypt_compressed
+        
+        Returns:
+            Decrypted strings in input order
+        """
+        if self._aead is None:
+            self.initialize_key()
+        
+        if compressed:
+            decrypt = self.decrypt_compressed
+            return [decrypt(value) if value else None for value in encrypted_values]
+        
+        decrypt = self._decrypt_bytes
+        return [decrypt(value).decode() if value else None for value in encrypted_values]
+    
+    def encrypt_compressed(self, data: Union[str, bytes]) -> bytes:
+        """
+        Compress (zstd, else zlib) and then encrypt data.
+        
+        Large text shrinks several times over, so less is stored, read back
+        and pushed through the cipher. Values under COMPRESSION_MIN_SIZE are
+        just encrypted.
+        
+        Args:
+            data: Data to encrypt (string or bytes)
+        
+        Returns:
+            Encrypted data, prefixed with a byte naming the compression used
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return self.encrypt(data)
+        if ZSTD_AVAILABLE:
+            return ZSTD_PREFIX + self.encrypt(self._zstd_compressor.compress(data))
+        return ZLIB_PREFIX + self.encrypt(zlib.compress(data))
+    
+    def decrypt_compressed(self, encrypted_data: bytes) -> str:
+        """
+        Decrypt data written by encrypt_compressed (or plain encrypt).
+        
+        Args:
+            encrypted_data: Encrypted data
+        
+        Returns:
+            Decrypted data as string
+        """
+        prefix = encrypted_data[:1]
+        if prefix not in (ZSTD_PREFIX, ZLIB_PREFIX):
+            return self.decrypt(encrypted_data)
+        
+        if self._aead is None:
+            self.initialize_key()
+        
+        compressed = self._decrypt_bytes(encrypted_data[1:])
+        if prefix == ZLIB_PREFIX:
+            return zlib.decompress(compressed).decode()
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("This record is zstd-compressed; install zstandard to read it")
+        return self._zstd_decompressor.decompress(compressed).decode()
     
     def encrypt_file(self, file_path: Union[str, Path], output_path: Optional[Union[str, Path]] = None) -> Path:
         """
@@ -140,16 +438,56 @@ class EncryptionManager:
         file_path = Path(file_path)
         if output_path is None:
             output_path = file_path.with_suffix(file_path.suffix + '.enc')
-        else:
-            output_path = Path(output_path)
         
-        with open(file_path, 'rb') as f:
-            data = f.read()
+        return self.encrypt_file_stream(file_path, output_path)
+    
+    def encrypt_file_stream(self, file_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+        """
+        Encrypt a file chunk by chunk (see STREAM_HEADER for the format).
         
-        encrypted_data = self.encrypt(data)
+        Only a chunk or two is held in memory at a time, whatever the
+        file size; chunks are read into two reused buffers.
         
-        with open(output_path, 'wb') as f:
-            f.write(encrypted_data)
+        Args:
+            file_path: Path to file to encrypt
+            output_path: Path for encrypted file
+            
+        Returns:
+            Path to encrypted file
+        """
+        output_path = Path(output_path)
+        base_iv = os.urandom(STREAM_NONCE_SIZE)
+        aesgcm = self._file_cipher(base_iv)
+        
+        with open(file_path, 'rb', buffering=0) as src:
+            _advise_sequential(src)
+            size = os.fstat(src.fileno()).st_size
+            total_chunks = max(1, -(-size // STREAM_CHUNK_SIZE))
+            header = STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, STREAM_CHUNK_SIZE, total_chunks, base_iv)
+            
+            with _replace_on_success(output_path) as out:
+                out.write(header)
+                
+                # Read one chunk ahead so the last one can be flagged as final;
+                # the two buffers swap roles each round
+                buffers = (bytearray(STREAM_CHUNK_SIZE), bytearray(STREAM_CHUNK_SIZE))
+                index = 0
+                length = _read_into(src, buffers[0])
+                while True:
+                    next_length = _read_into(src, buffers[(index + 1) % 2])
+                    is_final = next_length == 0
+                    nonce = self._chunk_nonce(base_iv, index)
+                    aad = header + struct.pack('<IB', index, is_final)
+                    out.write(nonce)
+                    out.write(aesgcm.encrypt(nonce, memoryview(buffers[index % 2])[:length], aad))
+                    
+                    index += 1
+                    if is_final:
+                        break
+                    length = next_length
+                
+                if index != total_chunks:
+                    raise ValueError(f"{file_path} changed size while being encrypted")
         
         return output_path
     
@@ -172,17 +510,72 @@ class EncryptionManager:
                 output_path = encrypted_file_path.with_suffix('')
             else:
                 output_path = encrypted_file_path.with_suffix('.dec')
-        else:
-            output_path = Path(output_path)
         
+        with open(encrypted_file_path, 'rb') as f:
+            streamed = f.read(len(STREAM_MAGIC)) == STREAM_MAGIC
+        if streamed:
+            return self.decrypt_file_stream(encrypted_file_path, output_path)
+        
+        # Files encrypted whole (as a single Fernet token) by older versions.
+        # Written back as bytes, so binary files survive and text isn't re-encoded.
         with open(encrypted_file_path, 'rb') as f:
             encrypted_data = f.read()
         
-        decrypted_data = self.decrypt(encrypted_data)
+        decrypted_data = self.decrypt_bytes(encrypted_data)
         
-        with open(output_path, 'w') as f:
+        with open(output_path, 'wb') as f:
             f.write(decrypted_data)
         
+        return Path(output_path)
+    
+    def decrypt_file_stream(self, encrypted_file_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+        """
+        Decrypt a file written by encrypt_file_stream, chunk by chunk.
+        
+        Output goes to a temp file that is only moved into place once every
+        chunk has authenticated, so tampered input never leaves partial
+        plaintext on disk.
+        
+        Args:
+            encrypted_file_path: Path to encrypted file
+            output_path: Path for decrypted file
+            
+        Returns:
+            Path to decrypted file
+            
+        Raises:
+            ValueError: If the file isn't a stream-encrypted file
+            cryptography.exceptions.InvalidTag: If it was modified or truncated
+        """
+        output_path = Path(output_path)
+        
+        with open(encrypted_file_path, 'rb', buffering=0) as src:
+            header = src.read(STREAM_HEADER.size)
+            if len(header) != STREAM_HEADER.size:
+                raise ValueError(f"{encrypted_file_path} is not a stream-encrypted file")
+            magic, version, chunk_size, total_chunks, base_iv = STREAM_HEADER.unpack(header)
+            if magic != STREAM_MAGIC or version != STREAM_VERSION:
+                raise ValueError(f"{encrypted_file_path} is not a stream-encrypted file")
+            
+            _advise_sequential(src)
+            aesgcm = self._file_cipher(base_iv)
+            frame = bytearray(STREAM_NONCE_SIZE + chunk_size + STREAM_TAG_SIZE)
+            frame_view = memoryview(frame)
+            
+            with _replace_on_success(output_path) as out:
+                for index in range(total_chunks):
+                    length = _read_into(src, frame)
+                    nonce = self._chunk_nonce(base_iv, index)
+                    if frame_view[:STREAM_NONCE_SIZE] != nonce:
+                        raise ValueError(f"{encrypted_file_path} is corrupt (chunk {index})")
+                    
+                    is_final = index == total_chunks - 1
+                    aad = header + struct.pack('<IB', index, is_final)
+                    out.write(aesgcm.decrypt(nonce, frame_view[STREAM_NONCE_SIZE:length], aad))
+                
+                if src.read(1):
+                    raise ValueError(f"{encrypted_file_path} has trailing data")
+        
         return output_path
     
     def hash_data(self, data: str) -> str:
@@ -197,6 +590,36 @@ class EncryptionManager:
         """
         return hashlib.sha256(data.encode()).hexdigest()
     
+    @staticmethod
+    def _fast_tag(data: str) -> str:
+        """
+        Short, stable, non-secret tag for data (8 hex chars).
+        
+        Used for redaction markers, which only need to tell entities apart;
+        BLAKE2b with a 4-byte digest is cheaper than a full SHA-256 hexdigest.
+        """
+        tag_hash = _TAG_HASH.copy()
+        tag_hash.update(data.encode())
+        return tag_hash.hexdigest()
+    
+    def blind_index(self, token: str) -> str:
+        """
+        Keyed hash of a search token (a "blind index").
+        
+        Lets encrypted text be searched by whole words without storing the
+        words themselves; without the key the hashes reveal nothing.
+        
+        Args:
+            token: Normalized (lowercased) word
+            
+        Returns:
+            Short hex digest used as the indexed term
+        """
+        if self._index_key is None:
+            self.initialize_key()
+        
+        return hmac.new(self._index_key, token.encode(), hashlib.sha256).hexdigest()[:16]
+    
     def anonymize_text(self, text: str, entities_to_mask: list) -> str:
         """
         Anonymize sensitive entities in text.
@@ -208,13 +631,43 @@ class EncryptionManager:
         Returns:
             Anonymized text
         """
-        anonymized = text
-        for entity in entities_to_mask:
-            # Replace with hash prefix for consistency
-            hash_prefix = self.hash_data(entity)[:8]
-            anonymized = anonymized.replace(entity, f"[REDACTED_{hash_prefix}]")
+        # Replace with hash prefix for consistency
+        replacements = {
+            entity: f"[REDACTED_{self._fast_tag(entity)}]"
+            for entity in entities_to_mask if entity
+        }
+        if not replacements:
+            return text
+        
+        if AHOCORASICK_AVAILABLE:
+            # One Aho-Corasick scan finds every occurrence, whatever the number
+            # of entities; then keep the leftmost, longest ones without overlaps
+            automaton = ahocorasick.Automaton()
+            for entity, marker in replacements.items():
+                automaton.add_word(entity, (len(entity), marker))
+            automaton.make_automaton()
+            matches = sorted(
+                (end - length + 1, -length, marker)
+                for end, (length, marker) in automaton.iter(text)
+            )
+            
+            parts = []
+            position = 0
+            for start, negative_length, marker in matches:
+                if start < position:
+                    continue
+                parts.append(text[position:start])
+                parts.append(marker)
+                position = start - negative_length
+            parts.append(text[position:])
+            return "".join(parts)
         
-        return anonymized
+        # Same matching with a regex: one pass over the text, longest
+        # entities first so an entity that contains another one wins
+        pattern = re.compile("|".join(
+            re.escape(entity) for entity in sorted(replacements, key=len, reverse=True)
+        ))
+        return pattern.sub(lambda match: replacements[match.group(0)], text)
     
     def secure_delete(self, file_path: Union[str, Path]) -> bool:
         """
@@ -235,9 +688,19 @@ class EncryptionManager:
             # Get file size
             file_size = file_path.stat().st_size
             
-            # Overwrite with random data
-            with open(file_path, 'wb') as f:
-                f.write(os.urandom(file_size))
+            # Overwrite in place with random data: a ChaCha20 keystream seeded
+            # from os.urandom, written block by block so memory use stays flat
+            keystream = Cipher(
+                algorithms.ChaCha20(os.urandom(32), os.urandom(16)), mode=None
+            ).encryptor()
+            zeros = bytes(SECURE_DELETE_BLOCK_SIZE)
+            with open(file_path, 'r+b', buffering=0) as f:
+                remaining = file_size
+                while remaining:
+                    n = min(remaining, SECURE_DELETE_BLOCK_SIZE)
+                    f.write(keystream.update(zeros[:n]))
+                    remaining -= n
+                os.fsync(f.fileno())
             
             # Delete the file
             file_path.unlink()
@@ -28,10 +28,11 @@ def main():
         ]
         
         print("\n📱 Parsing SMS Messages...\n")
-        for sms in sms_messages:
-            result = agent.add_transaction_from_sms(sms)
-            if 'error' not in result:
-                print(f"✓ {format_currency(result['amount']):>12} | {result['type']:>6} | {result['category']}")
+        # One batched import instead of a write (and commit) per message
+        result = agent.add_transactions_from_sms(sms_messages)
+        for sms, txn in zip(sms_messages, result['transactions']):
+            if txn is not None:
+                print(f"✓ {format_currency(txn['amount']):>12} | {txn['type']:>6} | {txn['category']}")
             else:
                 print(f"✗ Could not parse: {sms[:50]}")
         
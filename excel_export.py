@@ -2,13 +2,76 @@
 Excel export functionality for Vault.
 Export journal entries, transactions, and documents to XLSX format.
 """
-import pandas as pd
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+# xlsxwriter is optional: in constant_memory mode it flushes each row to disk
+# as it is written, so exports stay flat in memory regardless of vault size
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
 
 from config import EXPORTS_DIR
 
+# Header styles are built once and shared by every header cell
+HEADER_FONT = Font(bold=True)
+_thin = Side(style='thin')
+HEADER_BORDER = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+# Same header look for xlsxwriter workbooks
+XLSXWRITER_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+XLSXWRITER_OPTIONS = {
+    'constant_memory': True,
+    'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    'remove_timezone': True,
+}
+
+# A sheet column: header text and a function picking its value from a record
+Column = Tuple[str, Callable[[Dict[str, Any]], Any]]
+
+JOURNAL_COLUMNS: Tuple[Column, ...] = (
+    ('Date', itemgetter('timestamp')),
+    ('Mood', itemgetter('mood_category')),
+    ('Sentiment Score', itemgetter('sentiment_score')),
+    ('Content', itemgetter('content')),
+    ('Tags', lambda entry: ', '.join(entry.get('tags', []))),
+)
+
+TRANSACTION_COLUMNS: Tuple[Column, ...] = (
+    ('Date', itemgetter('timestamp')),
+    ('Amount', itemgetter('amount')),
+    ('Type', itemgetter('transaction_type')),
+    ('Category', lambda txn: txn.get('category', 'N/A')),
+    ('Merchant', lambda txn: txn.get('merchant', 'N/A')),
+    ('Description', lambda txn: txn.get('description', 'N/A')),
+)
+
+DOCUMENT_COLUMNS: Tuple[Column, ...] = (
+    ('Filename', itemgetter('filename')),
+    ('Type', itemgetter('file_type')),
+    ('Processed Date', itemgetter('processed_at')),
+    ('Summary', lambda doc: (doc.get('summary') or 'N/A')[:200]),  # Truncate long summaries
+    ('Entities', lambda doc: ', '.join((doc.get('entities') or [])[:10])),  # First 10 entities
+)
+
+# export_all's sheets are more compact: shorter headers, no description/entities
+COMBINED_JOURNAL_COLUMNS: Tuple[Column, ...] = (
+    JOURNAL_COLUMNS[:2] + (('Sentiment', itemgetter('sentiment_score')),) + JOURNAL_COLUMNS[3:]
+)
+COMBINED_TRANSACTION_COLUMNS: Tuple[Column, ...] = TRANSACTION_COLUMNS[:5]
+COMBINED_DOCUMENT_COLUMNS: Tuple[Column, ...] = (
+    DOCUMENT_COLUMNS[:2] + (('Processed', itemgetter('processed_at')),) + DOCUMENT_COLUMNS[3:4]
+)
+
 
 class ExcelExporter:
     """Export data to Excel format."""
@@ -17,148 +80,137 @@ class ExcelExporter:
         """Initialize the Excel exporter."""
         EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
     
-    def export_journal(self, entries: List[Dict[str, Any]], filename: str = None) -> str:
+    def _open_workbook(self, filepath: Path):
         """
-        Export journal entries to Excel.
+        Open a streaming workbook for filepath.
+        
+        Uses xlsxwriter in constant_memory mode when installed, otherwise an
+        openpyxl write-only workbook.
+        """
+        if XLSXWRITER_AVAILABLE:
+            return xlsxwriter.Workbook(str(filepath), XLSXWRITER_OPTIONS)
+        return Workbook(write_only=True)
+    
+    def _save_workbook(self, workbook, filepath: Path) -> None:
+        """Finish a workbook from _open_workbook and write it to filepath."""
+        if isinstance(workbook, Workbook):
+            workbook.save(filepath)
+        else:
+            workbook.close()
+    
+    def _write_sheet(self, workbook, title: str, columns: Tuple[Column, ...],
+                     records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Stream records into a new sheet of a workbook from _open_workbook.
         
         Args:
-            entries: List of journal entries
-            filename: Optional custom filename
-            
+            workbook: Workbook returned by _open_workbook
+            title: Sheet name
+            columns: (header, getter) pairs, in column order
+            records: Records to write, consumed lazily
+        """
+        headers = [header for header, _ in columns]
+        getters = [getter for _, getter in columns]
+        rows = (tuple(get(record) for get in getters) for record in records)
+        
+        if not isinstance(workbook, Workbook):
+            sheet = workbook.add_worksheet(title)
+            sheet.write_row(0, 0, headers, workbook.add_format(XLSXWRITER_HEADER_FORMAT))
+            for row_number, row in enumerate(rows, 1):
+                sheet.write_row(row_number, 0, row)
+            return
+        
+        sheet = workbook.create_sheet(title)
+        
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        
+        for row in rows:
+            sheet.append(row)
+    
+    def _export(self, filename: str, sheets: Iterable[Tuple[str, Tuple[Column, ...], Iterable]]) -> str:
+        """
+        Write one workbook with a sheet per (title, columns, records) entry.
+        
         Returns:
             Path to exported file
         """
-        if filename is None:
-            filename = f"journal_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
         filepath = EXPORTS_DIR / filename
         
-        # Prepare data for export
-        data = []
-        for entry in entries:
-            data.append({
-                'Date': entry['timestamp'],
-                'Mood': entry['mood_category'],
-                'Sentiment Score': entry['sentiment_score'],
-                'Content': entry['content'],
-                'Tags': ', '.join(entry.get('tags', [])),
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_excel(filepath, index=False, sheet_name='Journal Entries')
+        workbook = self._open_workbook(filepath)
+        for title, columns, records in sheets:
+            self._write_sheet(workbook, title, columns, records)
+        self._save_workbook(workbook, filepath)
         
         return str(filepath)
     
-    def export_transactions(self, transactions: List[Dict[str, Any]], filename: str = None) -> str:
+    @staticmethod
+    def _default_filename(prefix: str) -> str:
+        """Timestamped export filename."""
+        return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    
+    def export_journal(self, entries: Iterable[Dict[str, Any]], filename: str = None) -> str:
         """
-        Export financial transactions to Excel.
+        Export journal entries to Excel.
         
         Args:
-            transactions: List of transactions
+            entries: Journal entries (any iterable, consumed once)
             filename: Optional custom filename
-            
+        
         Returns:
             Path to exported file
         """
-        if filename is None:
-            filename = f"transactions_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        filepath = EXPORTS_DIR / filename
+        filename = filename or self._default_filename("journal_export")
+        return self._export(filename, [('Journal Entries', JOURNAL_COLUMNS, entries)])
+    
+    def export_transactions(self, transactions: Iterable[Dict[str, Any]], filename: str = None) -> str:
+        """
+        Export financial transactions to Excel.
         
-        # Prepare data
-        data = []
-        for txn in transactions:
-            data.append({
-                'Date': txn['timestamp'],
-                'Amount': txn['amount'],
-                'Type': txn['transaction_type'],
-                'Category': txn.get('category', 'N/A'),
-                'Merchant': txn.get('merchant', 'N/A'),
-                'Description': txn.get('description', 'N/A'),
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_excel(filepath, index=False, sheet_name='Transactions')
+        Args:
+            transactions: Transactions (any iterable, consumed once)
+            filename: Optional custom filename
         
-        return str(filepath)
+        Returns:
+            Path to exported file
+        """
+        filename = filename or self._default_filename("transactions_export")
+        return self._export(filename, [('Transactions', TRANSACTION_COLUMNS, transactions)])
     
-    def export_documents(self, documents: List[Dict[str, Any]], filename: str = None) -> str:
+    def export_documents(self, documents: Iterable[Dict[str, Any]], filename: str = None) -> str:
         """
         Export document metadata to Excel.
         
         Args:
-            documents: List of documents
+            documents: Documents (any iterable, consumed once)
             filename: Optional custom filename
-            
+        
         Returns:
             Path to exported file
         """
-        if filename is None:
-            filename = f"documents_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        filepath = EXPORTS_DIR / filename
-        
-        # Prepare data
-        data = []
-        for doc in documents:
-            data.append({
-                'Filename': doc['filename'],
-                'Type': doc['file_type'],
-                'Processed Date': doc['processed_at'],
-                'Summary': doc.get('summary', 'N/A')[:200],  # Truncate long summaries
-                'Entities': ', '.join(doc.get('entities', [])[:10]),  # First 10 entities
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_excel(filepath, index=False, sheet_name='Documents')
-        
-        return str(filepath)
+        filename = filename or self._default_filename("documents_export")
+        return self._export(filename, [('Documents', DOCUMENT_COLUMNS, documents)])
     
-    def export_all(self, journal_entries: List, transactions: List, documents: List) -> str:
+    def export_all(self, journal_entries: Iterable, transactions: Iterable, documents: Iterable) -> str:
         """
         Export all data to a single Excel file with multiple sheets.
         
+        Each iterable is consumed lazily, one sheet at a time.
+        
         Returns:
             Path to exported file
         """
-        filename = f"vault_complete_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = EXPORTS_DIR / filename
-        
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # Journal sheet
-            if journal_entries:
-                journal_data = [{
-                    'Date': e['timestamp'],
-                    'Mood': e['mood_category'],
-                    'Sentiment': e['sentiment_score'],
-                    'Content': e['content'],
-                    'Tags': ', '.join(e.get('tags', [])),
-                } for e in journal_entries]
-                pd.DataFrame(journal_data).to_excel(writer, sheet_name='Journal', index=False)
-            
-            # Transactions sheet
-            if transactions:
-                txn_data = [{
-                    'Date': t['timestamp'],
-                    'Amount': t['amount'],
-                    'Type': t['transaction_type'],
-                    'Category': t.get('category', 'N/A'),
-                    'Merchant': t.get('merchant', 'N/A'),
-                } for t in transactions]
-                pd.DataFrame(txn_data).to_excel(writer, sheet_name='Transactions', index=False)
-            
-            # Documents sheet
-            if documents:
-                doc_data = [{
-                    'Filename': d['filename'],
-                    'Type': d['file_type'],
-                    'Processed': d['processed_at'],
-                    'Summary': d.get('summary', 'N/A')[:200],
-                } for d in documents]
-                pd.DataFrame(doc_data).to_excel(writer, sheet_name='Documents', index=False)
-        
-        return str(filepath)
-
+        return self._export(self._default_filename("vault_complete_export"), [
+            ('Journal', COMBINED_JOURNAL_COLUMNS, journal_entries),
+            ('Transactions', COMBINED_TRANSACTION_COLUMNS, transactions),
+            ('Documents', COMBINED_DOCUMENT_COLUMNS, documents),
+        ])
 
 if __name__ == "__main__":
     # Test Excel export
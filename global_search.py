@@ -2,19 +2,20 @@
 Global search functionality across all Vault modules.
 Search journal entries, transactions, and documents.
 """
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Pattern
 from datetime import datetime
 
-from database import PrivacyDatabase
+from database import PrivacyDatabase, get_shared_database
 
 
 class GlobalSearch:
     """Search across all modules in Vault."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize global search."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
     
     def search_all(self, query: str, limit: int = 50) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -27,12 +28,16 @@ class GlobalSearch:
         Returns:
             Dictionary with results from each module
         """
-        query_lower = query.lower()
+        # Compile the case-insensitive predicate once instead of lowering every field per row
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        
+        # Modules are fetched and decrypted concurrently on the database's reader threads
+        candidates = self.db.get_search_candidates_parallel(limit_per_module=1000, query=query)
         
         results = {
-            'journal': self._search_journal(query_lower, limit),
-            'transactions': self._search_transactions(query_lower, limit),
-            'documents': self._search_documents(query_lower, limit),
+            'journal': self._search_journal(candidates['journal'], pattern, limit),
+            'transactions': self._search_transactions(candidates['transactions'], pattern, limit),
+            'documents': self._search_documents(candidates['documents'], pattern, limit),
         }
         
         # Add total count
@@ -40,49 +45,46 @@ class GlobalSearch:
         
         return results
     
-    def _search_journal(self, query: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_journal(self, entries: List[Dict[str, Any]], pattern: Pattern, limit: int) -> List[Dict[str, Any]]:
         """Search journal entries."""
-        entries = self.db.get_journal_entries(limit=1000)
-        
+        search = pattern.search
         matching = []
         for entry in entries:
             # Search in content, mood, and tags
-            if (query in entry['content'].lower() or
-                query in entry['mood_category'].lower() or
-                any(query in tag.lower() for tag in entry.get('tags', []))):
+            if (search(entry['content'] or '') or
+                search(entry['mood_category'] or '') or
+                any(search(tag) for tag in entry.get('tags') or ())):
                 matching.append(entry)
                 if len(matching) >= limit:
                     break
         
         return matching
     
-    def _search_transactions(self, query: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_transactions(self, transactions: List[Dict[str, Any]], pattern: Pattern, limit: int) -> List[Dict[str, Any]]:
         """Search financial transactions."""
-        transactions = self.db.get_transactions(limit=1000)
-        
+        search = pattern.search
         matching = []
         for txn in transactions:
             # Search in category, merchant, description
-            if (query in txn.get('category', '').lower() or
-                query in txn.get('merchant', '').lower() or
-                query in txn.get('description', '').lower()):
+            if (search(txn.get('category') or '') or
+                search(txn.get('merchant') or '') or
+                search(txn.get('description') or '')):
                 matching.append(txn)
                 if len(matching) >= limit:
                     break
         
         return matching
     
-    def _search_documents(self, query: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_documents(self, documents: List[Dict[str, Any]], pattern: Pattern, limit: int) -> List[Dict[str, Any]]:
         """Search documents."""
-        documents = self.db.get_documents(limit=1000)
-        
+        search = pattern.search
         matching = []
         for doc in documents:
             # Search in filename, content, summary, entities
-            if (query in doc['filename'].lower() or
-                query in doc['content'].lower() or
-                (doc.get('summary') and query in doc['summary'].lower()) or
-                any(query in entity.lower() for entity in doc.get('entities', []))):
+            if (search(doc['filename'] or '') or
+                search(doc['content'] or '') or
+                search(doc.get('summary') or '') or
+                any(search(entity) for entity in doc.get('entities') or ())):
                 matching.append(doc)
                 if len(matching) >= limit:
                     break
@@ -103,22 +105,19 @@ class GlobalSearch:
         return {
             'journal': self.db.get_journal_entries(start_date=start_date, end_date=end_date),
             'transactions': self.db.get_transactions(start_date=start_date, end_date=end_date),
-            'documents': [d for d in self.db.get_documents() 
-                         if start_date <= datetime.fromisoformat(d['processed_at']) <= end_date],
+            'documents': self.db.get_documents(start_date=start_date, end_date=end_date, limit=None),
         }
     
     def search_by_tag(self, tag: str) -> List[Dict[str, Any]]:
         """Search journal entries by tag."""
-        entries = self.db.get_journal_entries(limit=1000)
-        return [e for e in entries if tag.lower() in [t.lower() for t in e.get('tags', [])]]
+        return self.db.get_journal_entries_by_tag(tag, limit=1000)
     
     def search_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Search transactions by category."""
         return self.db.get_transactions(category=category, limit=1000)
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 if __name__ == "__main__":
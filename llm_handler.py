@@ -2,33 +2,111 @@
 LLM Handler - Supports both Ollama and RunAnywhere SDK
 Automatically uses RunAnywhere if available, falls back to Ollama
 """
+import asyncio
+import copy
+import hashlib
+import time
 import requests
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 import json
 
-from config import OLLAMA_BASE_URL, DEFAULT_MODEL
+from config import OLLAMA_BASE_URL, DEFAULT_MODEL, OLLAMA_NUM_PARALLEL, LLM_CACHE_SIZE
+from utils import create_http_session, json_dumps, json_loads, run_sync
 
 # Try to use RunAnywhere handler, fallback to Ollama
 try:
-    from runanywhere_handler import RunAnywhereHandler
+    from runanywhere_handler import get_runanywhere_handler
     RUNANYWHERE_AVAILABLE = True
 except ImportError:
     RUNANYWHERE_AVAILABLE = False
 
+# Optional async client for batched Ollama calls (sequential requests otherwise)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# pyahocorasick is optional - _match_category falls back to substring checks
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+TRANSACTION_CATEGORIES = ["Food & Dining", "Transportation", "Shopping",
+                          "Entertainment", "Bills & Utilities", "Healthcare",
+                          "Education", "Income", "Transfer", "Other"]
+
+# Ollama probe results by (base URL, model) -> (available, time.monotonic()),
+# reused for OLLAMA_STATUS_TTL seconds instead of probing on every construction
+OLLAMA_STATUS_TTL = 30.0
+_ollama_status: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+CATEGORY_SET = frozenset(TRANSACTION_CATEGORIES)
+CATEGORIES_LOWER = [(category, category.lower()) for category in TRANSACTION_CATEGORIES]
+
+# Prompt templates; the parts that don't depend on the input are built once
+MOOD_PROMPT_HEADER = """Analyze mood from this journal entry and respond with JSON:
+{
+  "mood": "positive/negative/neutral",
+  "mood_category": "very_positive/positive/neutral/negative/very_negative",
+  "score": -1.0 to 1.0,
+  "emotions": ["emotion1", "emotion2"],
+  "insight": "supportive message"
+}
+
+Entry: """
+CATEGORY_PROMPT = ("Categorize: {description} at {merchant}\n"
+                   "Categories: " + ", ".join(TRANSACTION_CATEGORIES) + "\n"
+                   "Respond with ONLY the category name.")
+SUMMARY_PROMPT = "Summarize in {max_length} words:\n\n{text}"
+
+# Reads the JSON object a model response starts, wherever it ends
+JSON_DECODER = json.JSONDecoder()
+
+# Request bodies are serialized to bytes up front (with orjson when
+# installed) and sent as data= with this header
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Lowercased category names -> their position in TRANSACTION_CATEGORIES,
+# built once so a response is scanned for all of them in one pass
+if AHOCORASICK_AVAILABLE:
+    CATEGORY_AUTOMATON = ahocorasick.Automaton()
+    for rank, category in enumerate(TRANSACTION_CATEGORIES):
+        CATEGORY_AUTOMATON.add_word(category.lower(), rank)
+    CATEGORY_AUTOMATON.make_automaton()
+
 
 class LocalLLMHandler:
     """Unified LLM handler supporting multiple backends."""
     
-    def __init__(self):
-        """Initialize LLM handler with best available backend."""
+    def __init__(self, cache: Any = None):
+        """
+        Initialize LLM handler with best available backend.
+        
+        Args:
+            cache: Optional store for responses beyond the in-memory LRU, with
+                get_cached_llm_response() and cache_llm_response() (e.g. a
+                PrivacyDatabase); without one responses are only kept in memory
+        """
+        self.cache = cache
         self.runanywhere = None
         self.ollama_url = OLLAMA_BASE_URL
         self.model = DEFAULT_MODEL
+        # One keep-alive connection pool for every Ollama call
+        self.session = create_http_session()
+        # Async client for the batch methods, created inside their event loop
+        self._aclient = None
+        # Recent categorizations and summaries; the rest are in the database
+        self._cache = OrderedDict()
         
         # Try RunAnywhere first
         if RUNANYWHERE_AVAILABLE:
             try:
-                self.runanywhere = RunAnywhereHandler()
+                # Shared instance, so its health check runs once per process
+                self.runanywhere = get_runanywhere_handler()
                 if self.runanywhere.available:
                     print("[OK] Using RunAnywhere SDK for AI")
                     self.available = True
@@ -42,11 +120,22 @@ class LocalLLMHandler:
         self.backend = "ollama" if self.available else "none"
     
     def _check_ollama(self) -> bool:
-        """Check if Ollama is available."""
+        """Check if Ollama is available (probing at most every OLLAMA_STATUS_TTL seconds)."""
+        key = (self.ollama_url, self.model)
+        status = _ollama_status.get(key)
+        if status is not None and time.monotonic() - status[1] < OLLAMA_STATUS_TTL:
+            return status[0]
+        
+        available = self._probe_ollama()
+        _ollama_status[key] = (available, time.monotonic())
+        return available
+    
+    def _probe_ollama(self) -> bool:
+        """Ask Ollama whether it is running and has the model."""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=2)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=2)
             if response.status_code == 200:
-                models = [m['name'] for m in response.json().get('models', [])]
+                models = [m['name'] for m in json_loads(response.content).get('models', [])]
                 if any(self.model in name for name in models):
                     print(f"[OK] Using Ollama with model: {self.model}")
                     return True
@@ -55,6 +144,17 @@ class LocalLLMHandler:
         print("[WARNING] No LLM available - using rule-based processing")
         return False
     
+    def warmup(self) -> None:
+        """Ask Ollama to load the model now so the first real request is fast."""
+        if self.backend != "ollama":
+            return
+        try:
+            # A generate call without a prompt just loads the model into memory
+            self.session.post(f"{self.ollama_url}/api/generate", data=json_dumps({"model": self.model}),
+                              headers=JSON_HEADERS, timeout=60)
+        except requests.exceptions.RequestException:
+            pass
+    
     def analyze_journal_mood(self, text: str) -> Dict[str, Any]:
         """Analyze journal mood using best available method."""
         if self.backend == "runanywhere":
@@ -65,95 +165,395 @@ class LocalLLMHandler:
         
         # Ollama fallback
         if self.backend == "ollama":
-            prompt = f"""Analyze mood from this journal entry and respond with JSON:
-{{
-  "mood": "positive/negative/neutral",
-  "mood_category": "very_positive/positive/neutral/negative/very_negative",
-  "score": -1.0 to 1.0,
-  "emotions": ["emotion1", "emotion2"],
-  "insight": "supportive message"
-}}
-
-Entry: {text}"""
-            
-            result = self._generate_ollama(prompt)
-            if result:
-                try:
-                    json_start = result.find('{')
-                    json_end = result.rfind('}') + 1
-                    if json_start >= 0:
-                        data = json.loads(result[json_start:json_end])
-                        data['_backend'] = 'ollama'
-                        return data
-                except:
-                    pass
+            return self._parse_mood(self._generate_ollama(self._mood_prompt(text)))
+        
+        return {"error": "LLM not available", "mood_category": "neutral"}
+    
+    @staticmethod
+    def _mood_prompt(text: str) -> str:
+        """Build the Ollama prompt for journal mood analysis."""
+        return MOOD_PROMPT_HEADER + text
+    
+    @staticmethod
+    def _parse_mood(result: Optional[str]) -> Dict[str, Any]:
+        """Pull the mood JSON out of an Ollama response."""
+        json_start = result.find('{') if result else -1
+        while json_start >= 0:
+            try:
+                # One pass from the brace; text after the object is ignored
+                data, _ = JSON_DECODER.raw_decode(result, json_start)
+            except json.JSONDecodeError:
+                # Not an object here (e.g. a stray brace): try the next one
+                json_start = result.find('{', json_start + 1)
+                continue
+            data['_backend'] = 'ollama'
+            return data
         
         return {"error": "LLM not available", "mood_category": "neutral"}
     
     def categorize_transaction(self, description: str, merchant: str = "") -> str:
-        """Categorize transaction."""
+        """Categorize transaction (answers are cached per description and merchant)."""
+        request_key = self._request_key("category", description, merchant)
+        cached = self._cached_response(request_key)
+        if cached is not None:
+            return cached
+        
         if self.backend == "runanywhere":
             result = self.runanywhere.parse_sms_transaction(
                 f"Transaction: {description} at {merchant}"
             )
             if result and 'category' in result:
-                return result['category']
+                return self._cache_response(request_key, result['category'])
         
         if self.backend == "ollama":
-            categories = ["Food & Dining", "Transportation", "Shopping", 
-                         "Entertainment", "Bills & Utilities", "Healthcare",
-                         "Education", "Income", "Transfer", "Other"]
-            
-            prompt = f"""Categorize: {description} at {merchant}
-Categories: {', '.join(categories)}
-Respond with ONLY the category name."""
-            
+            prompt = self._category_prompt(description, merchant)
             result = self._generate_ollama(prompt, max_tokens=20)
-            for cat in categories:
-                if cat.lower() in (result or '').lower():
-                    return cat
+            if result is not None:
+                return self._cache_response(request_key, self._match_category(result))
+        
+        return "Other"
+    
+    @staticmethod
+    def _category_prompt(description: str, merchant: str = "") -> str:
+        """Build the Ollama prompt for transaction categorization."""
+        return CATEGORY_PROMPT.format(description=description, merchant=merchant)
+    
+    @staticmethod
+    def _match_category(result: Optional[str]) -> str:
+        """Map an Ollama response to the first category (in list order) it names."""
+        # The model usually answers with just the name, as asked
+        if result in CATEGORY_SET:
+            return result
+        
+        result = (result or '').lower()
+        if AHOCORASICK_AVAILABLE:
+            ranks = [rank for _, rank in CATEGORY_AUTOMATON.iter(result)]
+            return TRANSACTION_CATEGORIES[min(ranks)] if ranks else "Other"
+        
+        for cat, cat_lower in CATEGORIES_LOWER:
+            if cat_lower in result:
+                return cat
         
         return "Other"
     
+    # ========== Batch Operations ==========
+    
+    def analyze_journal_mood_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze the mood of many journal entries.
+        
+        With Ollama and httpx, OLLAMA_NUM_PARALLEL requests are kept in
+        flight so the server can batch them (set the same OLLAMA_NUM_PARALLEL
+        for the Ollama server). Otherwise each entry goes through
+        analyze_journal_mood in turn.
+        
+        Args:
+            texts: Journal entry texts
+            
+        Returns:
+            One mood result per text, in order
+        """
+        if self.backend != "ollama" or not HTTPX_AVAILABLE:
+            return [self.analyze_journal_mood(text) for text in texts]
+        return self._run_batch(self.analyze_mood_batch(texts))
+    
+    def categorize_transactions_batch(self, rows: List[Tuple[str, str]]) -> List[str]:
+        """
+        Categorize many transactions (see analyze_journal_mood_batch).
+        
+        Args:
+            rows: (description, merchant) pairs
+            
+        Returns:
+            One category per row, in order
+        """
+        if self.backend == "runanywhere":
+            return self._categorize_runanywhere_batch(rows)
+        if self.backend != "ollama" or not HTTPX_AVAILABLE:
+            return [self.categorize_transaction(description, merchant)
+                    for description, merchant in rows]
+        return self._run_batch(self.categorize_batch(rows))
+    
+    async def analyze_mood_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Async form of analyze_journal_mood_batch for Ollama (needs httpx)."""
+        results = await self._agenerate_many([self._mood_prompt(text) for text in texts])
+        return [self._parse_mood(result) for result in results]
+    
+    async def categorize_batch(self, rows: List[Tuple[str, str]]) -> List[str]:
+        """Async form of categorize_transactions_batch for Ollama (needs httpx)."""
+        request_keys = [self._request_key("category", description, merchant)
+                        for description, merchant in rows]
+        categories = [self._cached_response(request_key) for request_key in request_keys]
+        
+        misses = self._cache_misses(request_keys, categories, rows)
+        results = await self._agenerate_many(
+            [self._category_prompt(*row) for row in misses.values()], max_tokens=20
+        )
+        answers = {
+            request_key: "Other" if result is None
+            else self._cache_response(request_key, self._match_category(result))
+            for request_key, result in zip(misses, results)
+        }
+        return [category or answers[request_key]
+                for category, request_key in zip(categories, request_keys)]
+    
+    def _categorize_runanywhere_batch(self, rows: List[Tuple[str, str]]) -> List[str]:
+        """categorize_transactions_batch on RunAnywhere, which parses the uncached rows concurrently."""
+        request_keys = [self._request_key("category", description, merchant)
+                        for description, merchant in rows]
+        categories = [self._cached_response(request_key) for request_key in request_keys]
+        
+        misses = self._cache_misses(request_keys, categories, rows)
+        results = self.runanywhere.batch_parse_sms(
+            [f"Transaction: {description} at {merchant}" for description, merchant in misses.values()]
+        )
+        answers = {
+            request_key: self._cache_response(request_key, result['category'])
+            if result and 'category' in result else "Other"
+            for request_key, result in zip(misses, results)
+        }
+        return [category or answers[request_key]
+                for category, request_key in zip(categories, request_keys)]
+    
+    @staticmethod
+    def _cache_misses(request_keys: List[str], cached: List[Optional[str]], rows: List[Any]) -> Dict[str, Any]:
+        """Rows without a cached answer, keyed by request so each goes to the model once."""
+        misses = {}
+        for request_key, answer, row in zip(request_keys, cached, rows):
+            if answer is None:
+                misses.setdefault(request_key, row)
+        return misses
+    
+    async def _agenerate_many(self, prompts: List[str], max_tokens: int = 500) -> List[Optional[str]]:
+        """Generate for many prompts, with at most OLLAMA_NUM_PARALLEL requests in flight."""
+        semaphore = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+        
+        async def generate(prompt: str) -> Optional[str]:
+            async with semaphore:
+                return await self.agenerate(prompt, max_tokens)
+        
+        return await asyncio.gather(*map(generate, prompts))
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
+        """Async form of _generate_ollama over the shared httpx client."""
+        try:
+            response = await self._async_client().post(
+                f"{self.ollama_url}/api/generate",
+                content=self._generate_body(prompt, max_tokens),
+                headers=JSON_HEADERS,
+                timeout=30
+            )
+            if response.status_code == 200:
+                return json_loads(response.content).get('response', '').strip()
+        except:
+            pass
+        return None
+    
+    def _async_client(self) -> "httpx.AsyncClient":
+        """Return the httpx client, creating it in the running event loop."""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=40)
+            )
+        return self._aclient
+    
+    def _run_batch(self, batch):
+        """Run a batch coroutine to completion, closing the client it used."""
+        async def run():
+            try:
+                return await batch
+            finally:
+                # The client's connections belong to this event loop
+                if self._aclient is not None:
+                    await self._aclient.aclose()
+                    self._aclient = None
+        
+        return run_sync(run())
+    
     def summarize_document(self, text: str, max_length: int = 200) -> str:
-        """Summarize document."""
+        """Summarize document (summaries are cached per text and length)."""
         if len(text) > 4000:
             text = text[:4000]
         
+        request_key = self._request_key("summary", text, str(max_length))
+        cached = self._cached_response(request_key)
+        if cached is not None:
+            return cached
+        
         if self.backend == "runanywhere":
             result = self.runanywhere.summarize(text, max_length)
             if result:
-                return result
+                return self._cache_response(request_key, result)
         
         if self.backend == "ollama":
-            prompt = f"Summarize in {max_length} words:\n\n{text}"
+            prompt = SUMMARY_PROMPT.format(max_length=max_length, text=text)
             result = self._generate_ollama(prompt)
-            return result or "Summary unavailable"
+            if result:
+                return self._cache_response(request_key, result)
         
         return "Summary unavailable"
     
+    def summarize_document_stream(self, text: str, max_length: int = 200) -> Iterator[str]:
+        """Summarize document, yielding the summary as Ollama generates it."""
+        if len(text) > 4000:
+            text = text[:4000]
+        
+        request_key = self._request_key("summary", text, str(max_length))
+        cached = self._cached_response(request_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if self.backend != "ollama":
+            yield self.summarize_document(text, max_length)
+            return
+        
+        chunks = []
+        for chunk in self._generate_ollama_stream(SUMMARY_PROMPT.format(max_length=max_length, text=text)):
+            chunks.append(chunk)
+            yield chunk
+        
+        summary = "".join(chunks).strip()
+        if summary:
+            self._cache_response(request_key, summary)
+        else:
+            yield "Summary unavailable"
+    
     def answer_document_question(self, text: str, question: str) -> str:
         """Answer question about document."""
         if self.backend == "ollama":
-            prompt = f"Document:\n{text}\n\nQuestion: {question}\n\nAnswer:"
-            return self._generate_ollama(prompt) or "Cannot answer"
+            return self._generate_ollama(self._question_prompt(text, question)) or "Cannot answer"
         
         return "Q&A unavailable"
     
+    def answer_document_question_stream(self, text: str, question: str) -> Iterator[str]:
+        """Answer question about document, yielding the answer as it is generated."""
+        if self.backend != "ollama":
+            yield "Q&A unavailable"
+            return
+        
+        answered = False
+        for chunk in self._generate_ollama_stream(self._question_prompt(text, question)):
+            answered = True
+            yield chunk
+        
+        if not answered:
+            yield "Cannot answer"
+    
+    @staticmethod
+    def _question_prompt(text: str, question: str) -> str:
+        """Build the Ollama prompt for document Q&A."""
+        return f"Document:\n{text}\n\nQuestion: {question}\n\nAnswer:"
+    
     def _generate_ollama(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
         """Generate using Ollama."""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ollama_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, 
-                      "stream": False, "options": {"num_predict": max_tokens}},
+                data=self._generate_body(prompt, max_tokens),
+                headers=JSON_HEADERS,
                 timeout=30
             )
             if response.status_code == 200:
-                return response.json().get('response', '').strip()
+                return json_loads(response.content).get('response', '').strip()
         except:
             pass
         return None
+    
+    def _generate_body(self, prompt: str, max_tokens: int, stream: bool = False) -> bytes:
+        """Serialize an /api/generate request."""
+        return json_dumps({"model": self.model, "prompt": prompt,
+                           "stream": stream, "options": {"num_predict": max_tokens}})
+    
+    def _generate_ollama_stream(self, prompt: str, max_tokens: int = 500) -> Iterator[str]:
+        """
+        Generate using Ollama, yielding text as the model produces it.
+        
+        Ollama streams one JSON object per line; the timeout applies to each
+        read, so long answers aren't cut off as a whole.
+        
+        Args:
+            prompt: Prompt text
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Response text fragments (nothing if the request fails)
+        """
+        try:
+            with self.session.post(
+                f"{self.ollama_url}/api/generate",
+                data=self._generate_body(prompt, max_tokens, stream=True),
+                headers=JSON_HEADERS,
+                stream=True,
+                timeout=30
+            ) as response:
+                if response.status_code != 200:
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json_loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+    
+    # ========== Response Cache ==========
+    
+    def _request_key(self, task: str, *inputs: str) -> str:
+        """Identify a request by backend, model, task and inputs."""
+        return "\x1f".join((self.backend, self.model, task) + inputs)
+    
+    def _cached_response(self, request_key: str) -> Optional[str]:
+        """Return the stored response to a request, from memory or the database."""
+        memory_key = hashlib.blake2b(request_key.encode(), digest_size=16).digest()
+        response = self._cache.get(memory_key)
+        if response is not None:
+            self._cache.move_to_end(memory_key)
+            return response
+        
+        if self.cache is None:
+            return None
+        response = self.cache.get_cached_llm_response(request_key)
+        if response is not None:
+            self._remember(memory_key, response)
+        return response
+    
+    def _cache_response(self, request_key: str, response: str) -> str:
+        """Store a response in memory and the cache store, and return it."""
+        self._remember(hashlib.blake2b(request_key.encode(), digest_size=16).digest(), response)
+        if self.cache is not None:
+            self.cache.cache_llm_response(request_key, response)
+        return response
+    
+    def _remember(self, memory_key: bytes, response: str) -> None:
+        """Add a response to the in-memory LRU, evicting the oldest."""
+        self._cache[memory_key] = response
+        self._cache.move_to_end(memory_key)
+        if len(self._cache) > LLM_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def with_cache(self, cache: Any) -> "LocalLLMHandler":
+        """
+        Get a view of this handler that stores responses in another cache store.
+        
+        The view shares the backend, HTTP connections and in-memory LRU, so
+        a module can keep its responses in its own database without probing
+        the backends again.
+        """
+        if cache is self.cache:
+            return self
+        handler = copy.copy(self)
+        handler.cache = cache
+        return handler
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections (they are reopened on next use)."""
+        self.session.close()
+        if self.runanywhere is not None:
+            self.runanywhere.close()
 
 
 _llm_handler = None
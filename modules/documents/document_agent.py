@@ -3,34 +3,83 @@ Document Analyzer Module - Secure local document processing.
 Analyzes documents on-device with no cloud uploads.
 """
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Mapping
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import os
+import re
 import docx
-import PyPDF2
+
+# pypdf is the maintained successor of PyPDF2, with the same reader API
+try:
+    from pypdf import PdfReader
+except ImportError:
+    from PyPDF2 import PdfReader
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from database import PrivacyDatabase
+from database import PrivacyDatabase, get_shared_database
 from llm_handler import get_llm_handler
 from config import DOCUMENT_CONFIG
-from utils import safe_filename, validate_file_size
+from utils import get_spacy_nlp, safe_filename, validate_file_size
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF (runs in a worker process)."""
+    with open(file_path, 'rb') as f:
+        pages = PdfReader(f).pages
+        return [pages[i].extract_text() for i in range(start, stop)]
+
+
+_pdf_extractor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_extractor() -> ProcessPoolExecutor:
+    """
+    Get the process pool for long PDFs, starting it on first use.
+    
+    The pool is shared by every document instead of started per file, and
+    its workers are spawned rather than forked: by now the process runs the
+    database and logging threads, and a child forked while one of them holds
+    a lock could deadlock.
+    """
+    global _pdf_extractor
+    if _pdf_extractor is None:
+        _pdf_extractor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                             mp_context=multiprocessing.get_context("spawn"))
+    return _pdf_extractor
+
+
+def _text_chunks(text: str, size: int) -> Iterator[str]:
+    """Split text into pieces of at most size characters, breaking at whitespace where possible."""
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            split = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+            if split > start:
+                end = split
+        yield text[start:end]
+        start = end
 
 
 class DocumentAgent:
     """Privacy-first document analyzer with local NLP."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize the document agent."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
-        self.llm = get_llm_handler()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
+        # Responses are cached in this module's database
+        self.llm = get_llm_handler().with_cache(self.db)
         self.config = DOCUMENT_CONFIG
         
         # Try to load spaCy model for NER
         try:
-            import spacy
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = get_spacy_nlp()
             self.spacy_available = True
         except:
             print("⚠ spaCy model not found. Run: python -m spacy download en_core_web_sm")
@@ -51,31 +100,114 @@ class DocumentAgent:
         """
         file_path = Path(file_path)
         
-        # Validate file
+        # Validate file, reusing the stored result if it is unchanged
+        result, fast_key = self._check_file(file_path)
+        if result is not None:
+            return result
+        
+        # Extract text
+        text = self._extract_text(file_path)
+        if not text:
+            return {"error": "Could not extract text from document"}
+        
+        # Extract entities
+        entities = None
+        if extract_entities and self.spacy_available:
+            entities = self._extract_entities(text)
+        
+        return self._store_document(file_path, text, fast_key, extract_summary, entities)
+    
+    def process_documents(self, file_paths: Iterable[str], extract_summary: bool = True,
+                          extract_entities: bool = True) -> List[Dict[str, Any]]:
+        """
+        Process many document files.
+        
+        Entities for all new documents are extracted in one spaCy nlp.pipe
+        run (batched, and split across processes when there are enough
+        documents) instead of one pipeline call per file.
+        
+        Args:
+            file_paths: Paths to document files
+            extract_summary: Generate summaries using LLM
+            extract_entities: Extract named entities
+            
+        Returns:
+            One processing result per path, in order
+        """
+        results = []
+        pending = []  # (result index, path, fast key, text) still to process
+        for file_path in map(Path, file_paths):
+            result, fast_key = self._check_file(file_path)
+            if result is None:
+                text = self._extract_text(file_path)
+                if text:
+                    pending.append((len(results), file_path, fast_key, text))
+                else:
+                    result = {"error": "Could not extract text from document"}
+            results.append(result)
+        
+        entities = [None] * len(pending)
+        if extract_entities and self.spacy_available and pending:
+            # Every document's chunks go through one pipe, tagged with the
+            # document's position so the results can be regrouped
+            chunks = [(chunk, i) for i, (_, _, _, text) in enumerate(pending)
+                      for chunk in _text_chunks(text, self.config['ner_chunk_size'])]
+            batch_size = self.config['ner_batch_size']
+            # Worker processes each load the model, so only fork for several batches
+            n_process = max(1, min(len(chunks) // batch_size, (os.cpu_count() or 1) // 2))
+            docs = self.nlp.pipe(chunks, as_tuples=True, batch_size=batch_size, n_process=n_process)
+            for i, group in itertools.groupby(docs, key=lambda item: item[1]):
+                entities[i] = self._entities_from_docs(doc for doc, _ in group)
+        
+        for (index, file_path, fast_key, text), doc_entities in zip(pending, entities):
+            results[index] = self._store_document(file_path, text, fast_key, extract_summary, doc_entities)
+        
+        return results
+    
+    def _check_file(self, file_path: Path):
+        """
+        Validate a document file and look for its stored result.
+        
+        Returns:
+            (error or cached result, None) if the file needs no processing,
+            otherwise (None, fast key for add_document)
+        """
         if not file_path.exists():
-            return {"error": "File not found"}
+            return {"error": "File not found"}, None
         
         if file_path.suffix.lower() not in self.config['supported_formats']:
-            return {"error": f"Unsupported format. Supported: {', '.join(self.config['supported_formats'])}"}
+            return {"error": f"Unsupported format. Supported: {', '.join(self.config['supported_formats'])}"}, None
         
         if not validate_file_size(file_path, self.config['max_file_size_mb']):
-            return {"error": f"File too large. Max size: {self.config['max_file_size_mb']}MB"}
+            return {"error": f"File too large. Max size: {self.config['max_file_size_mb']}MB"}, None
         
-        # Extract text
-        text = self._extract_text(file_path)
-        if not text:
-            return {"error": "Could not extract text from document"}
+        # Unchanged files (same path, size and mtime) reuse their stored
+        # result instead of repeating text extraction, summary and NER
+        stat = file_path.stat()
+        fast_key = (str(file_path.absolute()), stat.st_size, stat.st_mtime_ns)
+        cached = self.db.get_document_by_fastkey(fast_key)
+        if cached is not None:
+            return {
+                "id": cached['id'],
+                "filename": cached['filename'],
+                "file_type": cached['file_type'],
+                "text_length": len(cached['content']),
+                "summary": cached.get('summary'),
+                "entities": cached.get('entities'),
+                "processed_at": cached['processed_at'].isoformat(),
+                "cached": True
+            }, None
         
+        return None, fast_key
+    
+    def _store_document(self, file_path: Path, text: str, fast_key, extract_summary: bool,
+                        entities: Optional[List[str]]) -> Dict[str, Any]:
+        """Summarize extracted text if asked, then store the document."""
         # Generate summary
         summary = None
         if extract_summary and self.llm.available:
             summary = self.llm.summarize_document(text, max_length=self.config['summary_max_length'])
         
-        # Extract entities
-        entities = None
-        if extract_entities and self.spacy_available:
-            entities = self._extract_entities(text)
-        
         # Store in database
         doc_id = self.db.add_document(
             filename=file_path.name,
@@ -83,7 +215,8 @@ class DocumentAgent:
             content=text,
             file_type=file_path.suffix,
             summary=summary,
-            entities=entities
+            entities=entities,
+            fast_key=fast_key
         )
         
         return {
@@ -99,60 +232,78 @@ class DocumentAgent:
     def _extract_text(self, file_path: Path) -> Optional[str]:
         """Extract text from various document formats."""
         try:
-            if file_path.suffix.lower() == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            
-            elif file_path.suffix.lower() == '.pdf':
-                text = []
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text.append(page_text)
-                return '\n'.join(text)
-            
-            elif file_path.suffix.lower() in ['.docx', '.doc']:
-                doc = docx.Document(file_path)
-                return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-            
+            return '\n'.join(self._iter_text(file_path))
         except Exception as e:
             print(f"Error extracting text: {e}")
             return None
+    
+    def _iter_text(self, file_path: Path) -> Iterator[str]:
+        """
+        Yield a document's text piece by piece: pages for PDF, paragraphs
+        for Word and the whole file for plain text.
+        
+        Pages are extracted as they are consumed, so no list of page texts
+        is built next to the joined result.
+        """
+        suffix = file_path.suffix.lower()
+        if suffix == '.txt':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                yield f.read()
+        
+        elif suffix == '.pdf':
+            with open(file_path, 'rb') as f:
+                pages = PdfReader(f).pages
+                # PDF text extraction is pure Python, so long PDFs are split into
+                # contiguous page ranges extracted in separate processes
+                workers = min(os.cpu_count() or 1, len(pages) // self.config['pdf_pages_per_worker'])
+                if workers > 1:
+                    page_texts = self._extract_pdf_parallel(file_path, len(pages), workers)
+                else:
+                    page_texts = (page.extract_text() for page in pages)
+                
+                for page_text in page_texts:
+                    if page_text:
+                        yield page_text
         
-        return None
+        elif suffix in ['.docx', '.doc']:
+            for paragraph in docx.Document(file_path).paragraphs:
+                yield paragraph.text
+    
+    @staticmethod
+    def _extract_pdf_parallel(file_path: Path, page_count: int, workers: int) -> Iterator[str]:
+        """Yield page texts in order, extracted by the shared PDF worker processes."""
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        ranges = _get_pdf_extractor().map(_extract_pdf_pages, itertools.repeat(str(file_path)),
+                                          bounds[:-1], bounds[1:])
+        for page_texts in ranges:
+            yield from page_texts
     
     def _extract_entities(self, text: str) -> List[str]:
         """Extract named entities using spaCy."""
         if not self.spacy_available:
             return []
         
-        # Limit text length for processing
-        if len(text) > 100000:
-            text = text[:100000]
-        
-        doc = self.nlp(text)
-        
-        # Extract entities of interest
-        entities = []
-        for ent in doc.ents:
-            if ent.label_ in self.config['pii_entities']:
-                entities.append({
-                    "text": ent.text,
-                    "label": ent.label_
-                })
-        
-        # Remove duplicates
+        # The whole text is processed in chunks, which keeps spaCy's memory
+        # use flat on large documents
+        chunks = _text_chunks(text, self.config['ner_chunk_size'])
+        return self._entities_from_docs(self.nlp.pipe(chunks, batch_size=8))
+    
+    def _entities_from_docs(self, docs: Iterable) -> List[str]:
+        """Collect the unique entities of interest from processed spaCy docs."""
+        pii_entities = self.config['pii_entities']
         seen = set()
         unique_entities = []
-        for ent in entities:
-            key = (ent['text'], ent['label'])
-            if key not in seen:
-                seen.add(key)
-                unique_entities.append(ent['text'])
+        for doc in docs:
+            for ent in doc.ents:
+                key = (ent.text, ent.label_)
+                if ent.label_ in pii_entities and key not in seen:
+                    seen.add(key)
+                    unique_entities.append(ent.text)
+                    # Limit to top 50 (later chunks are then never processed)
+                    if len(unique_entities) == 50:
+                        return unique_entities
         
-        return unique_entities[:50]  # Limit to top 50
+        return unique_entities
     
     def query_document(self, document_id: int, question: str) -> str:
         """
@@ -166,8 +317,7 @@ class DocumentAgent:
             Answer from LLM
         """
         # Get document from database
-        documents = self.db.get_documents(limit=1000)
-        document = next((d for d in documents if d['id'] == document_id), None)
+        document = self.db.get_document(document_id)
         
         if not document:
             return "Document not found"
@@ -178,18 +328,43 @@ class DocumentAgent:
         
         return self.llm.answer_document_question(document['content'], question)
     
-    def get_documents(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get list of processed documents."""
+    def query_document_stream(self, document_id: int, question: str) -> Iterator[str]:
+        """Ask a question about a processed document, yielding the answer as it is generated."""
+        document = self.get_document_by_id(document_id)
+        
+        if not document:
+            yield "Document not found"
+        elif not self.llm.available:
+            yield "LLM not available for Q&A. Please install Ollama."
+        else:
+            yield from self.llm.answer_document_question_stream(document['content'], question)
+    
+    def get_documents(self, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """Get list of processed documents (limit=None for all)."""
         return self.db.get_documents(limit=limit)
     
+    def count_documents(self) -> int:
+        """Count all processed documents."""
+        return self.db.count_documents()
+    
+    def iter_documents(self) -> Iterator[Mapping[str, Any]]:
+        """Lazily yield every processed document (used by exports)."""
+        return self.db.iter_documents()
+    
     def get_document_by_id(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific document by ID."""
-        documents = self.db.get_documents(limit=1000)
-        return next((d for d in documents if d['id'] == document_id), None)
+        return self.db.get_document(document_id)
     
     def search_documents(self, query: str) -> List[Dict[str, Any]]:
         """
-        Search documents by content (simple text search).
+        Search documents by content.
+        
+        Candidates are the most recent documents plus older ones the blind
+        search index finds by whole word; the case-insensitive substring
+        check below decides the match, so partial words still find the
+        recent documents.
+        It runs as one compiled pattern search per field, so large document
+        bodies aren't copied into lowercase first.
         
         Args:
             query: Search query
@@ -197,22 +372,15 @@ class DocumentAgent:
         Returns:
             Matching documents
         """
-        all_docs = self.db.get_documents(limit=500)
-        query_lower = query.lower()
-        
-        matching = []
-        for doc in all_docs:
-            # Search in filename, summary, and content
-            if (query_lower in doc['filename'].lower() or
-                (doc.get('summary') and query_lower in doc['summary'].lower()) or
-                query_lower in doc['content'].lower()):
-                matching.append(doc)
-        
-        return matching
+        all_docs = self.db.search_documents(query, limit=500)
+        search = re.compile(re.escape(query), re.IGNORECASE).search
+        
+        # Search in filename, summary, and content (only decrypted if needed)
+        return [doc for doc in all_docs
+                if search(doc['filename']) or search(doc.get('summary') or '') or search(doc['content'])]
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 if __name__ == "__main__":
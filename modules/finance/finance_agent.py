@@ -3,28 +3,114 @@ Finance Tracker Module - SMS parsing and spending analysis.
 All transaction processing happens on-device with no cloud uploads.
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from heapq import nlargest
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+import itertools
 import re
+import time
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from database import PrivacyDatabase
+from database import PrivacyDatabase, get_shared_database
 from llm_handler import get_llm_handler
 from config import FINANCE_CONFIG
 from utils import extract_amount, format_currency
 
+# pyahocorasick is optional - keyword categorization falls back to regexes
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# SMS parsing tables, compiled once at import instead of on every message
+CREDIT_PATTERN = re.compile(r'credit|received|deposited', re.IGNORECASE)
+
+# Account number, dates and merchant are all found in one scan of the SMS;
+# each alternative reports itself through its named group (match.lastgroup).
+# Account and merchant values are captured inside lookaheads so the scan
+# doesn't step over a date (or another field) that starts within them.
+SMS_FIELDS_PATTERN = re.compile(
+    r'(?:a\/c|account|A\/C)\s*(?:XX|xx)?(?=(?P<account>\d+))'
+    r'|(?P<date_slash>\d{2}/\d{2}/\d{4})'
+    r'|(?P<date_dash>\d{2}-\d{2}-\d{4})'
+    r'|(?P<date_month>\d{2}-[A-Z]{3}-\d{2})'
+    r'|(?:at|to|from)\s+(?=(?P<merchant>[A-Z][A-Z\s&]+?)(?:\s+on|\s+dated|\.|\,|\s+INR|\s+Rs))'
+    r'|(?:merchant|vendor):\s*(?=(?P<vendor>[A-Z][A-Z\s&]+))'
+)
+# Groups tried in this order when more than one kind was found
+MERCHANT_GROUPS = ('merchant', 'vendor')
+DATE_FORMATS = {
+    'date_slash': '%d/%m/%Y',
+    'date_dash': '%d-%m-%Y',
+    'date_month': '%d-%b-%y',
+}
+WHITESPACE_RUN = re.compile(r'\s+')
+
+# Descriptions are trimmed to this many characters for LLM categorization;
+# shorter (or all-digit) ones aren't worth an LLM request
+DESCRIPTION_KEY_LENGTH = 128
+MIN_LLM_DESCRIPTION_LENGTH = 4
+
+# Keyword fallback for categorization: category -> one pattern matching any
+# of its keywords. When a description hits several categories, the first in
+# this priority order wins, most specific first (a pharmacy at a mall is
+# Healthcare; "amazon" plus "coffee" is Food & Dining, not Shopping)
+CATEGORY_KEYWORDS = {
+    "Bills & Utilities": ["electricity", "water", "internet", "mobile", "recharge"],
+    "Healthcare": ["hospital", "pharmacy", "doctor", "medical", "health"],
+    "Education": ["school", "college", "course", "tuition", "books"],
+    "Transportation": ["uber", "ola", "metro", "bus", "petrol", "fuel", "parking"],
+    "Entertainment": ["movie", "netflix", "spotify", "game", "concert"],
+    "Food & Dining": ["restaurant", "cafe", "coffee", "zomato", "swiggy", "food", "dining"],
+    "Shopping": ["amazon", "flipkart", "mall", "store", "shopping"],
+}
+CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+)
+KEYWORD_CATEGORIES = tuple(CATEGORY_KEYWORDS)
+
+# With pyahocorasick, every keyword (-> its category's position in
+# KEYWORD_CATEGORIES) is found in one scan of the lowercased description
+if AHOCORASICK_AVAILABLE:
+    KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for rank, keywords in enumerate(CATEGORY_KEYWORDS.values()):
+        for keyword in keywords:
+            KEYWORD_AUTOMATON.add_word(keyword, rank)
+    KEYWORD_AUTOMATON.make_automaton()
+
+# Categories an LLM answer is accepted from (set lookup per transaction)
+DEFAULT_CATEGORIES = frozenset(FINANCE_CONFIG['default_categories'])
+
+
+
+def _normalize_description(description: str) -> str:
+    """Lowercase, whitespace-collapsed description, so repeated SMS templates share LLM cache entries."""
+    return WHITESPACE_RUN.sub(' ', description.strip().lower())[:DESCRIPTION_KEY_LENGTH]
+
+
+def _worth_llm_call(description: str) -> bool:
+    """Whether a normalized description carries enough text for the LLM to categorize."""
+    return len(description) >= MIN_LLM_DESCRIPTION_LENGTH and not description.isdigit()
+
 
 class FinanceAgent:
     """Privacy-first finance tracker with SMS parsing."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize the finance agent."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
-        self.llm = get_llm_handler()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
+        # Responses are cached in this module's database
+        self.llm = get_llm_handler().with_cache(self.db)
         self.config = FINANCE_CONFIG
+        
+        # (days, rounded totals, top categories) -> (expiry, insight)
+        self._insights: Dict[Tuple, Tuple[float, str]] = {}
     
     def parse_sms(self, sms_text: str) -> Optional[Dict[str, Any]]:
         """
@@ -42,18 +128,11 @@ class FinanceAgent:
             return None
         
         # Determine transaction type (debit/credit)
-        transaction_type = "debit"
-        if any(word in sms_text.lower() for word in ["credited", "credit", "received", "deposited"]):
-            transaction_type = "credit"
+        transaction_type = "credit" if CREDIT_PATTERN.search(sms_text) else "debit"
         
-        # Extract merchant/description
-        merchant = self._extract_merchant(sms_text)
-        
-        # Extract date (default to now if not found)
-        timestamp = self._extract_date(sms_text) or datetime.now()
-        
-        # Extract account number
-        account = self._extract_account_number(sms_text)
+        # Extract merchant, date (default to now if not found) and account number
+        merchant, timestamp, account = self._extract_fields(sms_text)
+        timestamp = timestamp or datetime.now()
         
         return {
             "amount": amount,
@@ -64,49 +143,34 @@ class FinanceAgent:
             "raw_sms": sms_text
         }
     
-    def _extract_merchant(self, text: str) -> Optional[str]:
-        """Extract merchant name from SMS."""
-        patterns = [
-            r'(?:at|to|from)\s+([A-Z][A-Z\s&]+?)(?:\s+on|\s+dated|\.|\,|\s+INR|\s+Rs)',
-            r'(?:merchant|vendor):\s*([A-Z][A-Z\s&]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                merchant = match.group(1).strip()
-                # Clean up merchant name
-                merchant = re.sub(r'\s+', ' ', merchant)
-                return merchant
+    @staticmethod
+    def _extract_fields(text: str) -> Tuple[Optional[str], Optional[datetime], Optional[str]]:
+        """
+        Extract merchant name, date and account number from SMS in one regex pass.
         
-        return None
-    
-    def _extract_date(self, text: str) -> Optional[datetime]:
-        """Extract date from SMS."""
-        patterns = [
-            (r'(\d{2})/(\d{2})/(\d{4})', '%d/%m/%Y'),
-            (r'(\d{2})-(\d{2})-(\d{4})', '%d-%m-%Y'),
-            (r'(\d{2})-([A-Z]{3})-(\d{2})', '%d-%b-%y'),
-        ]
-        
-        for pattern, fmt in patterns:
-            match = re.search(pattern, text)
-            if match:
+        Returns:
+            Tuple of (merchant, date, account number); each is None if not found
+        """
+        # First match of each kind, as separate searches per pattern would find
+        found = {}
+        for match in SMS_FIELDS_PATTERN.finditer(text):
+            found.setdefault(match.lastgroup, match.group(match.lastgroup))
+        
+        merchant = next((found[group] for group in MERCHANT_GROUPS if group in found), None)
+        if merchant:
+            # Clean up merchant name
+            merchant = WHITESPACE_RUN.sub(' ', merchant.strip())
+        
+        date = None
+        for group, fmt in DATE_FORMATS.items():
+            if group in found:
                 try:
-                    date_str = match.group(0)
-                    return datetime.strptime(date_str, fmt)
+                    date = datetime.strptime(found[group], fmt)
+                    break
                 except ValueError:
                     continue
         
-        return None
-    
-    def _extract_account_number(self, text: str) -> Optional[str]:
-        """Extract account number from SMS."""
-        pattern = r'(?:a\/c|account|A\/C)\s*(?:XX|xx)?(\d+)'
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1)
-        return None
+        return merchant, date, found.get('account')
     
     def add_transaction(self, amount: float, transaction_type: str, 
                        merchant: str = None, description: str = None,
@@ -128,8 +192,10 @@ class FinanceAgent:
         Returns:
             Transaction details with ID
         """
+        # One clock read serves the default timestamp and the budget check
+        now = datetime.now()
         if timestamp is None:
-            timestamp = datetime.now()
+            timestamp = now
         
         # Auto-categorize if not provided
         if category is None and auto_categorize:
@@ -150,7 +216,7 @@ class FinanceAgent:
         )
         
         # Check budget alerts
-        alert = self._check_budget_alert(category)
+        alert = self._check_budget_alert(category, now)
         
         return {
             "id": txn_id,
@@ -186,53 +252,126 @@ class FinanceAgent:
             account_number=parsed['account_number']
         )
     
+    def add_from_sms_batch(self, sms_texts: Iterable[str]) -> Dict[str, Any]:
+        """
+        Parse and add many SMS messages, committing them in batches.
+        
+        Each batch of messages is categorized with one concurrent LLM batch
+        and written with a single executemany and commit instead of one
+        request and one commit per message.
+        
+        Args:
+            sms_texts: Bank SMS texts
+            
+        Returns:
+            Counts of added and unparseable messages, plus one entry per
+            message in input order under 'transactions' - the added
+            transaction's amount, type and category, or None if it
+            couldn't be parsed
+        """
+        added = 0
+        skipped = 0
+        transactions = []
+        sms_texts = iter(sms_texts)
+        batch_size = self.config['sms_ingest_batch_size']
+        while True:
+            batch = list(itertools.islice(sms_texts, batch_size))
+            if not batch:
+                break
+            
+            parsed_all = [self.parse_sms(sms_text) for sms_text in batch]
+            parsed_batch = [parsed for parsed in parsed_all if parsed is not None]
+            skipped += len(parsed_all) - len(parsed_batch)
+            
+            debits = [parsed['raw_sms'] or parsed['merchant'] or ""
+                      for parsed in parsed_batch if parsed['transaction_type'] != "credit"]
+            debit_categories = iter(self._categorize_transactions(debits))
+            rows = [(parsed['timestamp'], parsed['amount'], parsed['transaction_type'],
+                     "Income" if parsed['transaction_type'] == "credit" else next(debit_categories),
+                     parsed['merchant'], parsed['raw_sms'], parsed['account_number'], None)
+                    for parsed in parsed_batch]
+            added += self.db.ingest_transactions(rows)
+            
+            categories = iter(row[3] for row in rows)
+            transactions.extend(
+                None if parsed is None else {
+                    "amount": parsed['amount'],
+                    "type": parsed['transaction_type'],
+                    "category": next(categories),
+                }
+                for parsed in parsed_all
+            )
+        
+        return {"added": added, "skipped": skipped, "transactions": transactions}
+    
     def _categorize_transaction(self, description: str) -> str:
-        """Categorize transaction using LLM or rules."""
-        # Try LLM first
-        if self.llm.available and description:
+        """Categorize transaction by keywords, asking the LLM only when none match."""
+        # Keywords first - a hit makes the LLM request unnecessary
+        category = self._categorize_by_keywords(description)
+        if category != "Other" or not self.llm.available:
+            return category
+        
+        description = _normalize_description(description)
+        if _worth_llm_call(description):
             category = self.llm.categorize_transaction(description)
-            if category in self.config['default_categories']:
+            if category in DEFAULT_CATEGORIES:
                 return category
         
-        # Fallback to keyword matching
-        description_lower = description.lower()
-        
-        keyword_map = {
-            "Food & Dining": ["restaurant", "cafe", "coffee", "zomato", "swiggy", "food", "dining"],
-            "Transportation": ["uber", "ola", "metro", "bus", "petrol", "fuel", "parking"],
-            "Shopping": ["amazon", "flipkart", "mall", "store", "shopping"],
-            "Entertainment": ["movie", "netflix", "spotify", "game", "concert"],
-            "Bills & Utilities": ["electricity", "water", "internet", "mobile", "recharge"],
-            "Healthcare": ["hospital", "pharmacy", "doctor", "medical", "health"],
-            "Education": ["school", "college", "course", "tuition", "books"],
-        }
+        return "Other"
+    
+    def _categorize_transactions(self, descriptions: List[str]) -> List[str]:
+        """Categorize many transactions, sending the LLM requests as one batch."""
+        # Keywords first - only descriptions without a hit go to the LLM
+        categories = [self._categorize_by_keywords(description) for description in descriptions]
         
-        for category, keywords in keyword_map.items():
-            if any(keyword in description_lower for keyword in keywords):
+        if self.llm.available:
+            normalized = [_normalize_description(description) for description in descriptions]
+            pending = [i for i, category in enumerate(categories)
+                       if category == "Other" and _worth_llm_call(normalized[i])]
+            results = self.llm.categorize_transactions_batch([(normalized[i], "") for i in pending])
+            for i, category in zip(pending, results):
+                if category in DEFAULT_CATEGORIES:
+                    categories[i] = category
+        
+        return categories
+    
+    @staticmethod
+    def _categorize_by_keywords(description: str) -> str:
+        """Categorize transaction by keyword matching (the highest-priority category hit wins)."""
+        if AHOCORASICK_AVAILABLE:
+            ranks = [rank for _, rank in KEYWORD_AUTOMATON.iter(description.lower())]
+            return KEYWORD_CATEGORIES[min(ranks)] if ranks else "Other"
+        
+        for category, pattern in CATEGORY_PATTERNS:
+            if pattern.search(description):
                 return category
         
         return "Other"
     
-    def _check_budget_alert(self, category: str) -> Optional[str]:
-        """Check if spending exceeds budget threshold."""
-        # Get current month spending
-        start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        end_of_month = datetime.now()
-        
-        spending = self.db.get_spending_by_category(start_of_month, end_of_month)
-        
-        # Find category spend
-        category_spend = next((s['total'] for s in spending if s['category'] == category), 0)
+    def _check_budget_alert(self, category: str, now: Optional[datetime] = None) -> Optional[str]:
+        """Check if spending exceeds budget threshold (as of now, or the caller's clock read)."""
+        # Get current month spending for the category (one rollup row, not a
+        # scan of the month's transactions)
+        category_spend = self.db.get_month_spending(category, now or datetime.now())
         
         # Check against budget (would need to get budget from db)
         # For now, return None - can implement budget checking later
         return None
     
-    def get_transactions(self, days: int = 30, category: str = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent transactions."""
-        start_date = datetime.now() - timedelta(days=days)
+    def get_transactions(self, days: Optional[int] = 30, category: str = None,
+                         limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """Get recent transactions (days=None / limit=None for everything)."""
+        start_date = datetime.now() - timedelta(days=days) if days is not None else None
         return self.db.get_transactions(start_date=start_date, category=category, limit=limit)
     
+    def count_transactions(self) -> int:
+        """Count all stored transactions."""
+        return self.db.count_transactions()
+    
+    def iter_transactions(self) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every transaction (used by exports)."""
+        return self.db.iter_transactions()
+    
     def get_spending_summary(self, days: int = 30) -> Dict[str, Any]:
         """
         Get spending summary and statistics.
@@ -243,21 +382,17 @@ class FinanceAgent:
         Returns:
             Spending statistics by category
         """
-        start_date = datetime.now() - timedelta(days=days)
         end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
         
         # Get spending by category
         spending = self.db.get_spending_by_category(start_date, end_date)
         
-        # Calculate totals
-        total_debit = sum(s['total'] for s in spending)
-        
-        # Get income (credits)
-        transactions = self.db.get_transactions(start_date=start_date, end_date=end_date, limit=1000)
-        total_credit = sum(t['amount'] for t in transactions if t['transaction_type'] == 'credit')
+        # Calculate totals in SQL rather than summing fetched rows
+        total_credit, total_debit, transaction_count = self.db.get_period_totals(start_date, end_date)
         
         # Top categories
-        top_categories = sorted(spending, key=lambda x: x['total'], reverse=True)[:5]
+        top_categories = nlargest(5, spending, key=itemgetter('total'))
         
         return {
             "period_days": days,
@@ -266,7 +401,7 @@ class FinanceAgent:
             "net": total_credit - total_debit,
             "by_category": spending,
             "top_categories": top_categories,
-            "transaction_count": len(transactions)
+            "transaction_count": transaction_count
         }
     
     def get_insights(self, days: int = 30) -> str:
@@ -276,6 +411,21 @@ class FinanceAgent:
         if summary['transaction_count'] == 0:
             return "Start tracking transactions to see personalized insights!"
         
+        # Reuse a recent insight while the figures it describes are unchanged
+        insight_key = (
+            days, round(summary['total_spent']), round(summary['total_income']),
+            tuple(c['category'] for c in summary['top_categories'])
+        )
+        cached = self._insights.get(insight_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        insight = self._generate_insight(days, summary)
+        self._insights[insight_key] = (time.monotonic() + self.config['insights_cache_ttl'], insight)
+        return insight
+    
+    def _generate_insight(self, days: int, summary: Dict[str, Any]) -> str:
+        """Ask the LLM for an insight on a spending summary, with a rule-based fallback."""
         # Create data summary for LLM
         data_summary = f"""
         Period: {days} days
@@ -306,8 +456,7 @@ class FinanceAgent:
         self.db.set_budget(category, monthly_limit)
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 if __name__ == "__main__":
@@ -3,26 +3,56 @@ Mental Health Journal Module - Mood tracking and analysis.
 Processes journal entries entirely on-device with local LLM and sentiment analysis.
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from textblob import TextBlob
+from typing import List, Dict, Any, Optional, Iterator
+import re
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from database import PrivacyDatabase
+from database import PrivacyDatabase, get_shared_database
 from llm_handler import get_llm_handler
 from config import JOURNAL_CONFIG
 
+# pyahocorasick is optional - trigger detection falls back to substring checks
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Lexicon-based sentiment scorer, loaded once and shared by every agent
+_VADER = SentimentIntensityAnalyzer()
+
+# Weekday names indexed like SQLite's strftime('%w') (0 = Sunday)
+DAY_NAMES = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+# Lowercased trigger words -> their position in the config list, so one scan
+# of an entry finds them all
+if AHOCORASICK_AVAILABLE:
+    TRIGGER_AUTOMATON = ahocorasick.Automaton()
+    for index, trigger in enumerate(JOURNAL_CONFIG['trigger_words']):
+        TRIGGER_AUTOMATON.add_word(trigger.lower(), index)
+    TRIGGER_AUTOMATON.make_automaton()
+else:
+    # Without it, one alternation regex does the scan; the lookahead lets a
+    # match start at every position, as the substring checks did
+    TRIGGER_RANKS = {}
+    for index, trigger in enumerate(JOURNAL_CONFIG['trigger_words']):
+        TRIGGER_RANKS.setdefault(trigger.lower(), index)
+    TRIGGER_PATTERN = re.compile("(?=(" + "|".join(map(re.escape, TRIGGER_RANKS)) + "))")
+
 
 class JournalAgent:
     """Mental health journaling companion with local mood analysis."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize the journal agent."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
-        self.llm = get_llm_handler()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
+        # Responses are cached in this module's database
+        self.llm = get_llm_handler().with_cache(self.db)
         self.config = JOURNAL_CONFIG
     
     def add_entry(self, content: str, tags: List[str] = None) -> Dict[str, Any]:
@@ -36,7 +66,7 @@ class JournalAgent:
         Returns:
             Entry details with mood analysis
         """
-        # Perform sentiment analysis using TextBlob
+        # Perform sentiment analysis using VADER
         sentiment_score = self._analyze_sentiment(content)
         mood_category = self._categorize_mood(sentiment_score)
         
@@ -75,13 +105,12 @@ class JournalAgent:
     
     def _analyze_sentiment(self, text: str) -> float:
         """
-        Analyze sentiment using TextBlob.
+        Analyze sentiment using VADER.
         
         Returns:
-            Sentiment polarity score (-1.0 to 1.0)
+            Sentiment polarity score (-1.0 to 1.0, VADER's compound score)
         """
-        blob = TextBlob(text)
-        return blob.sentiment.polarity
+        return _VADER.polarity_scores(text)['compound']
     
     def _categorize_mood(self, sentiment_score: float) -> str:
         """Categorize mood based on sentiment score."""
@@ -97,15 +126,14 @@ class JournalAgent:
             return "very_negative"
     
     def _detect_triggers(self, text: str) -> List[str]:
-        """Detect concerning trigger words."""
+        """Detect concerning trigger words (in config order, each once)."""
         text_lower = text.lower()
-        detected = []
-        
-        for trigger in self.config['trigger_words']:
-            if trigger.lower() in text_lower:
-                detected.append(trigger)
+        if AHOCORASICK_AVAILABLE:
+            found = {index for _, index in TRIGGER_AUTOMATON.iter(text_lower)}
+        else:
+            found = {TRIGGER_RANKS[match.group(1)] for match in TRIGGER_PATTERN.finditer(text_lower)}
         
-        return detected
+        return [self.config['trigger_words'][index] for index in sorted(found)]
     
     def _generate_feedback(self, mood: str, triggers: List[str]) -> str:
         """Generate supportive feedback based on mood."""
@@ -122,64 +150,76 @@ class JournalAgent:
         else:
             return "Thank you for trusting me with your feelings. Remember, difficult times are temporary."
     
-    def get_entries(self, days: int = 7, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_entries(self, days: Optional[int] = 7, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
         """
         Retrieve recent journal entries.
         
         Args:
-            days: Number of days to look back
-            limit: Maximum entries to return
+            days: Number of days to look back (None for all history)
+            limit: Maximum entries to return (None for no cap)
             
         Returns:
             List of journal entries
         """
-        start_date = datetime.now() - timedelta(days=days)
+        start_date = datetime.now() - timedelta(days=days) if days is not None else None
         return self.db.get_journal_entries(start_date=start_date, limit=limit)
     
-    def get_mood_trends(self, days: int = 30) -> Dict[str, Any]:
+    def count_entries(self) -> int:
+        """Count all stored journal entries."""
+        return self.db.count_journal_entries()
+    
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every journal entry (used by exports)."""
+        return self.db.iter_journal_entries()
+    
+    def get_mood_trends(self, days: int = 30, include_entries: bool = False) -> Dict[str, Any]:
         """
         Analyze mood trends over time.
         
         Args:
             days: Number of days to analyze
+            include_entries: Also return the decrypted entries for the period
             
         Returns:
             Mood statistics and trends
         """
-        stats = self.db.get_mood_statistics(days=days)
-        entries = self.get_entries(days=days, limit=1000)
+        start_date = datetime.now() - timedelta(days=days)
+        aggregates = self.db.get_mood_aggregates(start_date)
         
-        # Calculate additional metrics
-        if entries:
-            avg_sentiment = sum(e['sentiment_score'] for e in entries) / len(entries)
-            
-            # Calculate mood distribution
+        # Calculate metrics from the per-(weekday, mood) rows SQLite aggregated
+        if aggregates:
             mood_counts = {}
-            for entry in entries:
-                mood = entry['mood_category']
-                mood_counts[mood] = mood_counts.get(mood, 0) + 1
+            mood_sums = {}
+            day_counts = [0] * 7
+            day_sums = [0.0] * 7
+            for weekday, mood, count, total in aggregates:
+                mood_counts[mood] = mood_counts.get(mood, 0) + count
+                mood_sums[mood] = mood_sums.get(mood, 0.0) + total
+                day_counts[weekday] += count
+                day_sums[weekday] += total
             
-            # Detect patterns (simple day-of-week analysis)
-            day_moods = {}
-            for entry in entries:
-                day = datetime.fromisoformat(entry['timestamp']).strftime('%A')
-                if day not in day_moods:
-                    day_moods[day] = []
-                day_moods[day].append(entry['sentiment_score'])
+            total_entries = sum(day_counts)
             
+            # Detect patterns (simple day-of-week analysis)
             day_averages = {
-                day: sum(scores) / len(scores) 
-                for day, scores in day_moods.items()
+                DAY_NAMES[day]: day_sums[day] / day_counts[day]
+                for day in range(7) if day_counts[day]
             }
             
-            return {
+            trends = {
                 "period_days": days,
-                "total_entries": len(entries),
-                "average_sentiment": round(avg_sentiment, 3),
+                "total_entries": total_entries,
+                "average_sentiment": round(sum(day_sums) / total_entries, 3),
                 "mood_distribution": mood_counts,
                 "day_of_week_averages": day_averages,
-                "statistics": stats['statistics']
+                "statistics": [
+                    {'mood_category': mood, 'count': count, 'avg_sentiment': mood_sums[mood] / count}
+                    for mood, count in mood_counts.items()
+                ]
             }
+            if include_entries:
+                trends["entries"] = self.get_entries(days=days, limit=None)
+            return trends
         
         return {
             "period_days": days,
@@ -229,8 +269,7 @@ class JournalAgent:
             return f"Your mood has been fairly balanced over the past {days} days. Journaling is a great way to maintain self-awareness!"
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import json
 
-from database import PrivacyDatabase
+from database import get_shared_database
 from utils import create_table
 
 
@@ -14,8 +14,7 @@ class PrivacyAuditor:
     
     def __init__(self):
         """Initialize the privacy auditor."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
+        self.db = get_shared_database()
     
     def get_audit_report(self, days: int = 30) -> Dict[str, Any]:
         """
@@ -27,32 +26,22 @@ class PrivacyAuditor:
         Returns:
             Audit report with statistics
         """
-        logs = self.db.get_audit_log(days=days)
+        by_module, by_action, total_events = self.db.get_audit_summary(days=days)
         
-        if not logs:
+        if not total_events:
             return {
                 "period_days": days,
                 "total_events": 0,
                 "message": "No audit events in this period"
             }
         
-        # Calculate statistics
-        by_module = {}
-        by_action = {}
-        
-        for log in logs:
-            module = log['module']
-            action = log['action_type']
-            
-            by_module[module] = by_module.get(module, 0) + 1
-            by_action[action] = by_action.get(action, 0) + 1
-        
+        # Counts come from SQL; only the last 10 events are read and decrypted
         return {
             "period_days": days,
-            "total_events": len(logs),
+            "total_events": total_events,
             "by_module": by_module,
             "by_action": by_action,
-            "recent_events": logs[:10]  # Last 10 events
+            "recent_events": self.db.get_audit_log(days=days, limit=10)
         }
     
     def print_audit_report(self, days: int = 7):
@@ -85,8 +74,7 @@ class PrivacyAuditor:
                 print(f"  Details: {event['details']}")
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the shared connection is closed at exit)."""
 
 
 if __name__ == "__main__":
@@ -2,12 +2,131 @@
 RunAnywhere SDK Integration for Vault
 Replaces Ollama with RunAnywhere AI for on-device inference
 """
+import asyncio
+import re
+import textwrap
 import requests
-from typing import Optional, Dict, Any, List
-import json
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+from utils import create_http_session, get_spacy_nlp, json_dumps, json_loads, run_sync
+
+# Optional async client for concurrent batch calls (sequential requests
+# otherwise); it also streams audio file uploads
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
 
 # RunAnywhere SDK configuration
 RUNANYWHERE_API_URL = "http://localhost:8000"  # Local RunAnywhere server
+RUNANYWHERE_MAX_CONCURRENCY = 32  # Requests in flight at once during batch calls
+RUNANYWHERE_BATCH_SIZE = 32  # Prompts per /structured/batch request
+DOCUMENT_CHUNK_CHARS = 1800  # Document text sent per entity extraction request
+
+# Whitespace after sentence-ending punctuation, where documents are chunked
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+# Request bodies are serialized to bytes up front (with orjson when
+# installed) and sent with this header
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Structured-output schemas, built once and sent with every request
+SENTIMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sentiment": {"type": "string", "enum": ["positive", "negative", "neutral"]},
+        "score": {"type": "number", "minimum": -1, "maximum": 1},
+        "mood": {"type": "string", "enum": ["very_positive", "positive", "neutral", "negative", "very_negative"]},
+        "emotions": {"type": "array", "items": {"type": "string"}},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+    },
+    "required": ["sentiment", "score", "mood"]
+}
+
+SMS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "amount": {"type": "number"},
+        "type": {"type": "string", "enum": ["debit", "credit"]},
+        "merchant": {"type": "string"},
+        "date": {"type": "string"},
+        "account": {"type": "string"},
+        "category": {"type": "string", "enum": [
+            "Food & Dining", "Transportation", "Shopping", 
+            "Entertainment", "Bills & Utilities", "Healthcare",
+            "Education", "Income", "Transfer", "Other"
+        ]}
+    },
+    "required": ["amount", "type"]
+}
+
+DOCUMENT_ENTITIES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "people": {"type": "array", "items": {"type": "string"}},
+        "organizations": {"type": "array", "items": {"type": "string"}},
+        "dates": {"type": "array", "items": {"type": "string"}},
+        "amounts": {"type": "array", "items": {"type": "string"}},
+        "locations": {"type": "array", "items": {"type": "string"}},
+        "key_terms": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+KEY_TERMS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "key_terms": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["key_terms"]
+}
+
+# spaCy NER labels -> DOCUMENT_ENTITIES_SCHEMA fields; with spaCy installed
+# only key terms are left for the model
+SPACY_ENTITY_FIELDS = {
+    "PERSON": "people",
+    "ORG": "organizations",
+    "DATE": "dates",
+    "MONEY": "amounts",
+    "GPE": "locations",
+    "LOC": "locations",
+}
+
+
+def _split_document(text: str, max_chars: int = DOCUMENT_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of whole sentences, each at most max_chars long.
+    
+    A sentence longer than max_chars is wrapped at word boundaries.
+    
+    Args:
+        text: Document text
+        max_chars: Chunk size limit
+        
+    Returns:
+        Chunks in document order (none for blank text)
+    """
+    chunks = []
+    current = []
+    size = 0
+    
+    for sentence in SENTENCE_BREAK.split(text.strip()):
+        if not sentence:
+            continue
+        pieces = [sentence] if len(sentence) <= max_chars else textwrap.wrap(sentence, max_chars)
+        for piece in pieces:
+            # +1 for the space joining it to the previous sentence
+            if current and size + 1 + len(piece) > max_chars:
+                chunks.append(" ".join(current))
+                current = []
+                size = 0
+            size += len(piece) + (1 if current else 0)
+            current.append(piece)
+    
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
 
 
 class RunAnywhereHandler:
@@ -24,12 +143,21 @@ class RunAnywhereHandler:
             api_url: RunAnywhere API endpoint (localhost)
         """
         self.api_url = api_url
+        # One keep-alive connection pool for every SDK call
+        self.session = create_http_session()
+        # httpx client for batch calls, created inside their event loop
+        self._aclient = None
+        # Cleared once the server shows it has no /structured/batch endpoint
+        self._batch_endpoint = True
+        # spaCy NER model for document entities, looked up on first use
+        self._nlp = None
+        self._nlp_checked = False
         self.available = self._check_availability()
     
     def _check_availability(self) -> bool:
         """Check if RunAnywhere SDK is running."""
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=2)
+            response = self.session.get(f"{self.api_url}/health", timeout=2)
             if response.status_code == 200:
                 print("[OK] RunAnywhere SDK is running")
                 return True
@@ -55,26 +183,30 @@ class RunAnywhereHandler:
             return None
         
         try:
-            payload = {
-                "prompt": prompt,
-                "schema": schema,
-                "max_tokens": 500
-            }
-            
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/structured",
-                json=payload,
+                data=self._structured_payload(prompt, schema),
+                headers=JSON_HEADERS,
                 timeout=5
             )
             
             if response.status_code == 200:
-                return response.json()
+                return json_loads(response.content)
             return None
             
         except Exception as e:
             print(f"RunAnywhere error: {e}")
             return None
     
+    @staticmethod
+    def _structured_payload(prompt: str, schema: Dict[str, Any]) -> bytes:
+        """Serialized request body for the /structured endpoint."""
+        return json_dumps({
+            "prompt": prompt,
+            "schema": schema,
+            "max_tokens": 500
+        })
+    
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """
         Analyze sentiment with structured output.
@@ -88,25 +220,16 @@ class RunAnywhereHandler:
                 "confidence": float
             }
         """
-        schema = {
-            "type": "object",
-            "properties": {
-                "sentiment": {"type": "string", "enum": ["positive", "negative", "neutral"]},
-                "score": {"type": "number", "minimum": -1, "maximum": 1},
-                "mood": {"type": "string", "enum": ["very_positive", "positive", "neutral", "negative", "very_negative"]},
-                "emotions": {"type": "array", "items": {"type": "string"}},
-                "confidence": {"type": "number", "minimum": 0, "maximum": 1}
-            },
-            "required": ["sentiment", "score", "mood"]
-        }
-        
-        prompt = f"""Analyze the sentiment and mood of this journal entry:
+        return self.structured_output(self._sentiment_prompt(text), SENTIMENT_SCHEMA)
+    
+    @staticmethod
+    def _sentiment_prompt(text: str) -> str:
+        """Build the sentiment analysis prompt for a journal entry."""
+        return f"""Analyze the sentiment and mood of this journal entry:
 
 "{text}"
 
 Provide sentiment analysis with emotions detected."""
-        
-        return self.structured_output(prompt, schema)
     
     def parse_sms_transaction(self, sms_text: str) -> Optional[Dict[str, Any]]:
         """
@@ -122,30 +245,16 @@ Provide sentiment analysis with emotions detected."""
                 "category": str
             }
         """
-        schema = {
-            "type": "object",
-            "properties": {
-                "amount": {"type": "number"},
-                "type": {"type": "string", "enum": ["debit", "credit"]},
-                "merchant": {"type": "string"},
-                "date": {"type": "string"},
-                "account": {"type": "string"},
-                "category": {"type": "string", "enum": [
-                    "Food & Dining", "Transportation", "Shopping", 
-                    "Entertainment", "Bills & Utilities", "Healthcare",
-                    "Education", "Income", "Transfer", "Other"
-                ]}
-            },
-            "required": ["amount", "type"]
-        }
-        
-        prompt = f"""Parse this bank SMS transaction:
+        return self.structured_output(self._sms_prompt(sms_text), SMS_SCHEMA)
+    
+    @staticmethod
+    def _sms_prompt(sms_text: str) -> str:
+        """Build the transaction parsing prompt for a bank SMS."""
+        return f"""Parse this bank SMS transaction:
 
 "{sms_text}"
 
 Extract amount, transaction type, merchant, date, account number, and categorize the spending."""
-        
-        return self.structured_output(prompt, schema)
     
     def extract_document_entities(self, text: str) -> Optional[Dict[str, Any]]:
         """
@@ -160,26 +269,221 @@ Extract amount, transaction type, merchant, date, account number, and categorize
                 "locations": ["New York"],
                 "key_terms": ["contract", "agreement"]
             }
+            
+            With spaCy installed, everything but key terms comes from its
+            local NER and the model is only asked for key terms (key_terms is
+            empty if the server is down). Long documents are sent in
+            sentence-aligned chunks of up to DOCUMENT_CHUNK_CHARS
+            (concurrently with httpx installed) and the entities merged, so
+            nothing past the first chunk is lost.
         """
-        schema = {
-            "type": "object",
-            "properties": {
-                "people": {"type": "array", "items": {"type": "string"}},
-                "organizations": {"type": "array", "items": {"type": "string"}},
-                "dates": {"type": "array", "items": {"type": "string"}},
-                "amounts": {"type": "array", "items": {"type": "string"}},
-                "locations": {"type": "array", "items": {"type": "string"}},
-                "key_terms": {"type": "array", "items": {"type": "string"}}
-            }
-        }
+        chunks = _split_document(text) or [text]
+        nlp = self._entity_model()
+        if nlp is None:
+            return self._merge_entities(
+                self._structured_chunks(chunks, self._entities_prompt, DOCUMENT_ENTITIES_SCHEMA)
+            )
+        
+        entities = {field: {} for field in DOCUMENT_ENTITIES_SCHEMA["properties"]}
+        for doc in nlp.pipe(chunks, batch_size=8):
+            for ent in doc.ents:
+                field = SPACY_ENTITY_FIELDS.get(ent.label_)
+                if field is not None:
+                    # Dicts as ordered sets: first-seen order, no duplicates
+                    entities[field][ent.text] = None
         
-        prompt = f"""Extract all entities from this document:
+        key_terms = self._merge_entities(
+            self._structured_chunks(chunks, self._key_terms_prompt, KEY_TERMS_SCHEMA)
+        )
+        entities["key_terms"] = dict.fromkeys(key_terms["key_terms"]) if key_terms else {}
+        return {field: list(values) for field, values in entities.items()}
+    
+    def _entity_model(self):
+        """The shared spaCy NER model, or None if spaCy or its model isn't installed."""
+        if not self._nlp_checked:
+            self._nlp_checked = True
+            try:
+                self._nlp = get_spacy_nlp()
+            except Exception:
+                self._nlp = None
+        return self._nlp
+    
+    def _structured_chunks(self, chunks: List[str], prompt, schema: Dict[str, Any]) -> List[Optional[Dict]]:
+        """structured_output(prompt(chunk), schema) for every chunk, concurrently with httpx."""
+        if not self.available:
+            return [None] * len(chunks)
+        if HTTPX_AVAILABLE and len(chunks) > 1:
+            async def call(chunk):
+                return await self.astructured_output(prompt(chunk), schema)
+            
+            return self._run_batch(self._agather(call, chunks))
+        return [self.structured_output(prompt(chunk), schema) for chunk in chunks]
+    
+    @staticmethod
+    def _entities_prompt(text: str) -> str:
+        """Build the entity extraction prompt for (a chunk of) a document."""
+        return f"""Extract all entities from this document:
 
-"{text[:2000]}"  # Limit for performance
+"{text}"
 
 Identify people, organizations, dates, monetary amounts, locations, and key legal/business terms."""
+    
+    @staticmethod
+    def _key_terms_prompt(text: str) -> str:
+        """Build the key term extraction prompt for (a chunk of) a document."""
+        return f"""Extract the key legal and business terms from this document:
+
+"{text}"
+
+List only the terms themselves."""
+    
+    @staticmethod
+    def _merge_entities(results: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Combine per-chunk entity results, dropping duplicates (None if every chunk failed)."""
+        results = [result for result in results if result]
+        if not results:
+            return None
         
-        return self.structured_output(prompt, schema)
+        merged = {}
+        for field in DOCUMENT_ENTITIES_SCHEMA["properties"]:
+            # dict.fromkeys keeps first-seen order
+            values = (value for result in results for value in result.get(field) or ())
+            merged[field] = list(dict.fromkeys(values))
+        return merged
+    
+    # ========== Batch Operations ==========
+    
+    def batch_parse_sms(self, sms_texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse many bank SMS messages (see parse_sms_transaction).
+        
+        Messages go RUNANYWHERE_BATCH_SIZE at a time to the server's
+        /structured/batch endpoint. Servers without it get one request per
+        message; with httpx installed, up to RUNANYWHERE_MAX_CONCURRENCY of
+        those are in flight at once instead of waiting for each response in
+        turn.
+        
+        Args:
+            sms_texts: Bank SMS texts
+            
+        Returns:
+            One parse result (or None) per message, in order
+        """
+        if not self.available:
+            return [None] * len(sms_texts)
+        
+        results = []
+        while self._batch_endpoint and len(results) < len(sms_texts):
+            group = sms_texts[len(results):len(results) + RUNANYWHERE_BATCH_SIZE]
+            parsed = self._structured_batch([self._sms_prompt(sms_text) for sms_text in group], SMS_SCHEMA)
+            if parsed is None:
+                break
+            results.extend(parsed)
+        
+        remaining = sms_texts[len(results):]
+        if not remaining:
+            return results
+        if not HTTPX_AVAILABLE:
+            return results + [self.parse_sms_transaction(sms_text) for sms_text in remaining]
+        return results + self._run_batch(self._agather(self.aparse_sms_transaction, remaining))
+    
+    def _structured_batch(self, prompts: List[str], schema: Dict[str, Any]) -> Optional[List[Optional[Dict]]]:
+        """
+        Structured output for several prompts in one /structured/batch request.
+        
+        Args:
+            prompts: Prompts sharing the same schema
+            schema: JSON schema for each output
+            
+        Returns:
+            One output (None where the server gave none) per prompt, or None
+            if the request failed or the server has no batch endpoint
+        """
+        try:
+            response = self.session.post(
+                f"{self.api_url}/structured/batch",
+                data=json_dumps({"prompts": prompts, "schema": schema, "max_tokens": 500}),
+                headers=JSON_HEADERS,
+                # The server works through the whole group before answering
+                timeout=5 * len(prompts)
+            )
+            
+            if response.status_code in (404, 405, 501):
+                self._batch_endpoint = False
+                return None
+            if response.status_code != 200:
+                return None
+            outputs = json_loads(response.content)
+            
+        except Exception as e:
+            print(f"RunAnywhere error: {e}")
+            return None
+        
+        if not isinstance(outputs, list) or len(outputs) != len(prompts):
+            return None
+        return [output if isinstance(output, dict) else None for output in outputs]
+    
+    async def aanalyze_sentiment(self, text: str) -> Optional[Dict[str, Any]]:
+        """Async form of analyze_sentiment (needs httpx)."""
+        return await self.astructured_output(self._sentiment_prompt(text), SENTIMENT_SCHEMA)
+    
+    async def aparse_sms_transaction(self, sms_text: str) -> Optional[Dict[str, Any]]:
+        """Async form of parse_sms_transaction (needs httpx)."""
+        return await self.astructured_output(self._sms_prompt(sms_text), SMS_SCHEMA)
+    
+    async def astructured_output(self, prompt: str, schema: Dict[str, Any]) -> Optional[Dict]:
+        """Async form of structured_output over the shared httpx client."""
+        if not self.available:
+            return None
+        
+        try:
+            response = await self._async_client().post(
+                f"{self.api_url}/structured",
+                content=self._structured_payload(prompt, schema),
+                headers=JSON_HEADERS,
+                timeout=5
+            )
+            
+            if response.status_code == 200:
+                return json_loads(response.content)
+            return None
+            
+        except Exception as e:
+            print(f"RunAnywhere error: {e}")
+            return None
+    
+    @staticmethod
+    async def _agather(call, items: List[Any]) -> List[Any]:
+        """Await call(item) for every item, with at most RUNANYWHERE_MAX_CONCURRENCY in flight."""
+        semaphore = asyncio.Semaphore(RUNANYWHERE_MAX_CONCURRENCY)
+        
+        async def limited(item):
+            async with semaphore:
+                return await call(item)
+        
+        return await asyncio.gather(*map(limited, items))
+    
+    def _async_client(self) -> "httpx.AsyncClient":
+        """Return the httpx client, creating it in the running event loop."""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=RUNANYWHERE_MAX_CONCURRENCY,
+                                    keepalive_expiry=75)
+            )
+        return self._aclient
+    
+    def _run_batch(self, batch):
+        """Run a batch coroutine to completion, closing the client it used."""
+        async def run():
+            try:
+                return await batch
+            finally:
+                # The client's connections belong to this event loop
+                if self._aclient is not None:
+                    await self._aclient.aclose()
+                    self._aclient = None
+        
+        return run_sync(run())
     
     def summarize(self, text: str, max_length: int = 200) -> Optional[str]:
         """Generate summary of text."""
@@ -192,26 +496,30 @@ Identify people, organizations, dates, monetary amounts, locations, and key lega
                 "max_tokens": max_length * 2
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/generate",
-                json=payload,
+                data=json_dumps(payload),
+                headers=JSON_HEADERS,
                 timeout=10
             )
             
             if response.status_code == 200:
-                return response.json().get("text", "")
+                return json_loads(response.content).get("text", "")
             return None
             
         except Exception as e:
             print(f"Summarization error: {e}")
             return None
     
-    def voice_to_text(self, audio_data: bytes) -> Optional[str]:
+    def voice_to_text(self, audio: Union[bytes, str, Path]) -> Optional[str]:
         """
         Convert voice to text using RunAnywhere Voice Pipeline.
         
         Args:
-            audio_data: Audio bytes
+            audio: Audio bytes, or the path of an audio file. With httpx
+                installed a file is streamed from disk in chunks instead of
+                being read into memory first (requests buffers the whole
+                multipart body).
             
         Returns:
             Transcribed text
@@ -220,15 +528,19 @@ Identify people, organizations, dates, monetary amounts, locations, and key lega
             return None
         
         try:
-            files = {"audio": audio_data}
-            response = requests.post(
-                f"{self.api_url}/voice/transcribe",
-                files=files,
-                timeout=5
-            )
+            url = f"{self.api_url}/voice/transcribe"
+            if isinstance(audio, (str, Path)):
+                with open(audio, "rb") as audio_file:
+                    files = {"audio": audio_file}
+                    if HTTPX_AVAILABLE:
+                        response = httpx.post(url, files=files, timeout=5)
+                    else:
+                        response = self.session.post(url, files=files, timeout=5)
+            else:
+                response = self.session.post(url, files={"audio": audio}, timeout=5)
             
             if response.status_code == 200:
-                return response.json().get("text", "")
+                return json_loads(response.content).get("text", "")
             return None
             
         except Exception as e:
@@ -241,12 +553,16 @@ Identify people, organizations, dates, monetary amounts, locations, and key lega
             return {"available": False}
         
         try:
-            response = requests.get(f"{self.api_url}/stats")
+            response = self.session.get(f"{self.api_url}/stats")
             if response.status_code == 200:
-                return response.json()
+                return json_loads(response.content)
             return {}
         except:
             return {}
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections (they are reopened on next use)."""
+        self.session.close()
 
 
 # Global instance
@@ -67,8 +67,10 @@ def main():
     # Step 5: Check Ollama
     print("\n[5/5] Checking Ollama installation...")
     try:
-        import requests
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
+        from utils import create_http_session
+        # One pooled connection, retried once if Ollama is still starting up
+        with create_http_session(pool_size=1, retries=1) as session:
+            response = session.get("http://localhost:11434/api/tags", timeout=2)
         if response.status_code == 200:
             models = response.json().get('models', [])
             if models:
@@ -79,7 +81,8 @@ def main():
                 print("  Run: ollama pull llama3.2:3b")
         else:
             print("⚠ Ollama is not responding")
-    except:        print("⚠ Ollama is not installed or not running")
+    except:
+        print("⚠ Ollama is not installed or not running")
         print("\n  To install Ollama:")
         print("    Visit: https://ollama.ai")
         print("    After installation, run: ollama pull llama3.2:3b")
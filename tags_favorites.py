@@ -2,17 +2,30 @@
 Tags and favorites system for Vault.
 Add tags to entries, transactions, and documents. Mark items as favorites.
 """
-from typing import List, Optional
-from database import PrivacyDatabase
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from database import PrivacyDatabase, get_shared_database
+
+
+INSERT_FAVORITE_SQL = """
+    INSERT OR IGNORE INTO favorites (module, item_id)
+    VALUES (?, ?)
+"""
+
+
+# Seconds a favorites lookup is reused. This manager's own writes clear the
+# cache at once; the TTL only bounds how long writes made through another
+# connection or manager can go unseen.
+FAVORITES_CACHE_TTL = 5.0
 
 
 class TagsManager:
     """Manage tags across all modules."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize tags manager."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
     
     def add_tags_to_journal(self, entry_id: int, tags: List[str]) -> bool:
         """Add tags to a journal entry."""
@@ -22,12 +35,8 @@ class TagsManager:
     
     def get_all_tags(self) -> Dict[str, List[str]]:
         """Get all unique tags from all modules."""
-        journal_tags = set()
-        
-        # Get journal tags
-        entries = self.db.get_journal_entries(limit=10000)
-        for entry in entries:
-            journal_tags.update(entry.get('tags', []))
+        # Counted in SQL from the plaintext tags column; no entry is decrypted
+        journal_tags = {tag for tag, _ in self.db.get_journal_tag_counts()}
         
         return {
             'journal': sorted(list(journal_tags)),
@@ -36,34 +45,27 @@ class TagsManager:
     
     def search_by_tag(self, tag: str) -> List:
         """Find all items with a specific tag."""
-        entries = self.db.get_journal_entries(limit=10000)
-        return [e for e in entries if tag.lower() in [t.lower() for t in e.get('tags', [])]]
+        return self.db.get_journal_entries_by_tag(tag, limit=10000)
     
     def get_popular_tags(self, limit: int = 10) -> List[tuple]:
         """Get most frequently used tags."""
-        tag_counts = {}
-        
-        entries = self.db.get_journal_entries(limit=10000)
-        for entry in entries:
-            for tag in entry.get('tags', []):
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        
-        # Sort by count
-        sorted_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)
-        return sorted_tags[:limit]
+        # Sorted and limited in SQL
+        return self.db.get_journal_tag_counts(limit=limit)
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 class FavoritesManager:
     """Manage favorites/bookmarks."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[PrivacyDatabase] = None):
         """Initialize favorites manager."""
-        self.db = PrivacyDatabase()
-        self.db.connect()
+        # Share the caller's connection when given one, otherwise the process-wide one
+        self.db = db if db is not None else get_shared_database()
+        # module (None for all) -> (expiry, rows) and module -> (expiry, item IDs)
+        self._favorite_rows: Dict[Optional[str], Tuple[float, List[tuple]]] = {}
+        self._favorite_ids: Dict[str, Tuple[float, Set[int]]] = {}
         self._create_favorites_table()
     
     def _create_favorites_table(self):
@@ -93,16 +95,34 @@ class FavoritesManager:
         """
         try:
             cursor = self.db.conn.cursor()
-            cursor.execute("""
-                INSERT OR IGNORE INTO favorites (module, item_id)
-                VALUES (?, ?)
-            """, (module, item_id))
+            cursor.execute(INSERT_FAVORITE_SQL, (module, item_id))
             self.db.conn.commit()
+            self._invalidate_cache()
             return True
         except Exception as e:
             print(f"Error adding favorite: {e}")
             return False
     
+    def add_favorites_bulk(self, items: Iterable[Tuple[str, int]]) -> bool:
+        """
+        Mark many items as favorites in a single transaction.
+        
+        Args:
+            items: (module, item_id) pairs
+            
+        Returns:
+            True if successful (all or none of the items are added)
+        """
+        try:
+            # One commit (and one WAL sync) for the whole batch
+            with self.db.conn:
+                self.db.conn.executemany(INSERT_FAVORITE_SQL, items)
+            self._invalidate_cache()
+            return True
+        except Exception as e:
+            print(f"Error adding favorites: {e}")
+            return False
+    
     def remove_favorite(self, module: str, item_id: int) -> bool:
         """Remove an item from favorites."""
         try:
@@ -112,6 +132,7 @@ class FavoritesManager:
                 WHERE module = ? AND item_id = ?
             """, (module, item_id))
             self.db.conn.commit()
+            self._invalidate_cache()
             return True
         except Exception as e:
             print(f"Error removing favorite: {e}")
@@ -127,37 +148,53 @@ class FavoritesManager:
         Returns:
             List of favorite items
         """
+        rows = self._load_favorites(module)
+        return [
+            {'id': fav_id, 'module': fav_module, 'item_id': item_id, 'created_at': created_at}
+            for fav_id, fav_module, item_id, created_at in rows
+        ]
+    
+    def is_favorite(self, module: str, item_id: int) -> bool:
+        """Check if an item is favorited."""
+        # One query per module and TTL window, however many items a list checks
+        cached = self._favorite_ids.get(module)
+        if cached is None or cached[0] <= time.monotonic():
+            ids = {row[2] for row in self._load_favorites(module) if row[1] == module}
+            cached = (time.monotonic() + FAVORITES_CACHE_TTL, ids)
+            self._favorite_ids[module] = cached
+        return item_id in cached[1]
+    
+    def _load_favorites(self, module: Optional[str]) -> List[tuple]:
+        """Favorite rows for a module (or all), newest first, from the cache when fresh."""
+        cached = self._favorite_rows.get(module)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        
         cursor = self.db.conn.cursor()
         
         if module:
             cursor.execute("""
-                SELECT * FROM favorites
+                SELECT id, module, item_id, created_at FROM favorites
                 WHERE module = ?
                 ORDER BY created_at DESC
             """, (module,))
         else:
             cursor.execute("""
-                SELECT * FROM favorites
+                SELECT id, module, item_id, created_at FROM favorites
                 ORDER BY created_at DESC
             """)
         
         rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        self._favorite_rows[module] = (time.monotonic() + FAVORITES_CACHE_TTL, rows)
+        return rows
     
-    def is_favorite(self, module: str, item_id: int) -> bool:
-        """Check if an item is favorited."""
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT COUNT(*) FROM favorites
-            WHERE module = ? AND item_id = ?
-        """, (module, item_id))
-        
-        count = cursor.fetchone()[0]
-        return count > 0
+    def _invalidate_cache(self):
+        """Drop cached favorites after a write."""
+        self._favorite_rows.clear()
+        self._favorite_ids.clear()
     
     def close(self):
-        """Close database connection."""
-        self.db.close()
+        """Release the database (a no-op: the connection is the caller's or the shared one)."""
 
 
 if __name__ == "__main__":
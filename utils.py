@@ -1,21 +1,82 @@
 """
 Utility functions for the Privacy-First Personal Agent.
 """
+import asyncio
+import atexit
 import logging
 import logging.handlers
+import queue
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
+import json
 import re
+import socket
+import threading
 
-from config import LOG_CONFIG, LOGS_DIR
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import LOG_CONFIG, LOGS_DIR, NLP_CONFIG
+
+# orjson is optional - fall back to the stdlib json module if it's missing.
+# Either way json_dumps returns bytes (ready to encrypt) and json_loads
+# accepts str or bytes.
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj: Any) -> bytes:
+        """Serialize to JSON bytes."""
+        return json.dumps(obj).encode()
+    json_loads = json.loads
+
+# Sockets to the local model servers: small JSON requests go out at once
+# (Nagle's algorithm off) and idle pooled connections get TCP keepalives.
+# Replaces urllib3's defaults, which only set TCP_NODELAY.
+HTTP_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+# Pipeline components entity extraction doesn't use (the NER component
+# carries its own tok2vec, so the shared one only feeds tagger and parser)
+UNUSED_SPACY_COMPONENTS = ["tok2vec", "tagger", "parser", "lemmatizer", "attribute_ruler"]
+
+# spaCy model shared by the document agent and RunAnywhereHandler, loaded on first use
+_nlp = None
+
+
+class SocketOptionsAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections are opened with HTTP_SOCKET_OPTIONS."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTP_SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
 
 
 def setup_logging(name: str = "privacy_agent") -> logging.Logger:
-    """Set up logging configuration."""
+    """
+    Set up logging configuration.
+    
+    The logger itself only enqueues records; a background listener thread
+    formats them and writes to the console and the log file, so callers
+    never wait on that I/O.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(LOG_CONFIG['level'])
     
+    if logger.handlers:
+        return logger
+    
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
@@ -33,59 +94,171 @@ def setup_logging(name: str = "privacy_agent") -> logging.Logger:
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
     
-    if not logger.handlers:
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Drain queued records before the interpreter exits
+    atexit.register(listener.stop)
     
     return logger
 
 
+def create_http_session(pool_size: int = 10, retries: int = 0):
+    """
+    HTTP session for the local model servers (Ollama, RunAnywhere).
+    
+    Requests made through one session reuse keep-alive connections instead
+    of opening a new TCP connection per call.
+    
+    Args:
+        pool_size: Connections kept open per host
+        retries: Retries for refused connections and 502/503/504 responses
+            from idempotent requests, with a short backoff. Off by default so
+            availability checks fail fast.
+        
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    max_retries = Retry(
+        total=retries, backoff_factor=0.1, status_forcelist=(502, 503, 504), raise_on_status=False
+    ) if retries else 0
+    adapter = SocketOptionsAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_spacy_nlp():
+    """
+    Load the spaCy model once per process, with only the NER components.
+    
+    Raises:
+        ImportError or OSError if spaCy or the model isn't installed
+    """
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(NLP_CONFIG['spacy_model'], disable=UNUSED_SPACY_COMPONENTS)
+    return _nlp
+
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code and return its result.
+    
+    asyncio.run() refuses to start inside a running event loop (e.g. when
+    sync code is called from the async CLI), so in that case the coroutine
+    gets its own loop on a short-lived thread while the caller waits.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result (its exception is re-raised)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    outcome = {}
+    
+    def run():
+        try:
+            outcome['result'] = asyncio.run(coro)
+        except BaseException as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=run, name="vault-sync-batch")
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
 def format_currency(amount: float) -> str:
     """Format amount as currency."""
     return f"₹{amount:,.2f}"
 
 
+# Date formats tried in order by parse_date()
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%Y/%m/%d",
+    "%d-%b-%Y",
+    "%d %B %Y",
+)
+
+# Month-first dates also parse day-first whenever the day is 12 or less, so
+# that format is never tried ahead of its turn
+AMBIGUOUS_DATE_FORMATS = frozenset({"%m/%d/%Y"})
+
+# Format of the last successful parse; date streams (SMS, imports) rarely mix
+# formats, so it is tried first to skip the failing strptime calls before it
+_last_date_format = None
+
+
 def parse_date(date_str: str) -> datetime:
     """Parse date string in various formats."""
-    formats = [
-        "%Y-%m-%d",
-        "%d-%m-%Y",
-        "%d/%m/%Y",
-        "%m/%d/%Y",
-        "%Y/%m/%d",
-        "%d-%b-%Y",
-        "%d %B %Y",
-    ]
+    global _last_date_format
     
-    for fmt in formats:
+    last = _last_date_format
+    if last is not None:
         try:
-            return datetime.strptime(date_str, fmt)
+            return datetime.strptime(date_str, last)
         except ValueError:
+            pass
+    
+    for fmt in DATE_FORMATS:
+        if fmt == last:
             continue
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+        if fmt not in AMBIGUOUS_DATE_FORMATS:
+            _last_date_format = fmt
+        return parsed
     
     raise ValueError(f"Could not parse date: {date_str}")
 
 
+# Text clean-up patterns, compiled once at import
+WHITESPACE_RUN = re.compile(r'\s+')
+SPECIAL_CHARS = re.compile(r'[^\w\s.,!?-]')
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+
 def clean_text(text: str) -> str:
     """Clean and normalize text."""
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_RUN.sub(' ', text)
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    text = SPECIAL_CHARS.sub('', text)
     return text.strip()
 
 
+# Amount formats tried in order by extract_amount(), compiled once at import
+AMOUNT_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'₹\s*([\d,]+\.?\d*)',
+    r'Rs\.?\s*([\d,]+\.?\d*)',
+    r'INR\s*([\d,]+\.?\d*)',
+    r'([\d,]+\.?\d*)\s*(?:₹|Rs|INR)',
+))
+
+
 def extract_amount(text: str) -> float:
     """Extract amount from text (supports ₹, Rs., INR)."""
-    patterns = [
-        r'₹\s*([\d,]+\.?\d*)',
-        r'Rs\.?\s*([\d,]+\.?\d*)',
-        r'INR\s*([\d,]+\.?\d*)',
-        r'([\d,]+\.?\d*)\s*(?:₹|Rs|INR)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             amount_str = match.group(1).replace(',', '')
             try:
@@ -128,34 +301,46 @@ def validate_file_size(file_path: Path, max_size_mb: int = 50) -> bool:
 def safe_filename(filename: str) -> str:
     """Create a safe filename by removing invalid characters."""
     # Remove invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = INVALID_FILENAME_CHARS.sub('_', filename)
     # Limit length
     name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
     name = name[:200]
     return f"{name}.{ext}" if ext else name
 
 
+# colorama and tabulate are imported on first use, so commands that never
+# print color or tables don't pay for them at startup; the color table is
+# built once with them
+_color_codes = None
+_tabulate = None
+
+
 def color_text(text: str, color: str) -> str:
     """Color text for terminal output (Windows compatible)."""
-    from colorama import Fore, Style
-    
-    colors = {
-        'red': Fore.RED,
-        'green': Fore.GREEN,
-        'yellow': Fore.YELLOW,
-        'blue': Fore.BLUE,
-        'cyan': Fore.CYAN,
-        'magenta': Fore.MAGENTA,
-    }
+    global _color_codes
+    if _color_codes is None:
+        from colorama import Fore, Style
+        _color_codes = ({
+            'red': Fore.RED,
+            'green': Fore.GREEN,
+            'yellow': Fore.YELLOW,
+            'blue': Fore.BLUE,
+            'cyan': Fore.CYAN,
+            'magenta': Fore.MAGENTA,
+        }, Style.RESET_ALL)
     
+    colors, reset = _color_codes
     color_code = colors.get(color.lower(), '')
-    return f"{color_code}{text}{Style.RESET_ALL}"
+    return f"{color_code}{text}{reset}"
 
 
 def create_table(headers: List[str], rows: List[List[Any]]) -> str:
     """Create a formatted table from data."""
-    from tabulate import tabulate
-    return tabulate(rows, headers=headers, tablefmt="simple")
+    global _tabulate
+    if _tabulate is None:
+        from tabulate import tabulate
+        _tabulate = tabulate
+    return _tabulate(rows, headers=headers, tablefmt="simple")
 
 
 if __name__ == "__main__":
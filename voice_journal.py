@@ -3,31 +3,37 @@ Voice Journaling Module using RunAnywhere SDK Voice Pipeline
 Enables users to record voice journal entries with on-device transcription
 """
 import io
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Union
 from pathlib import Path
 
 try:
-    from runanywhere_handler import RunAnywhereHandler
+    from runanywhere_handler import get_runanywhere_handler
     VOICE_AVAILABLE = True
 except ImportError:
     VOICE_AVAILABLE = False
 
+# Transcriptions are I/O-bound (upload, then waiting on the server), so a few
+# run at once on a pool shared by every agent. Threads start on first use.
+VOICE_TRANSCRIBE_WORKERS = 4
+_transcriber = ThreadPoolExecutor(max_workers=VOICE_TRANSCRIBE_WORKERS, thread_name_prefix="vault-voice")
+
 
 class VoiceJournalAgent:
     """Voice journaling with on-device transcription."""
     
     def __init__(self):
         """Initialize voice journal agent."""
-        self.handler = RunAnywhereHandler() if VOICE_AVAILABLE else None
+        self.handler = get_runanywhere_handler() if VOICE_AVAILABLE else None
         self.available = self.handler and self.handler.available if VOICE_AVAILABLE else False
     
-    def transcribe_audio(self, audio_data: bytes) -> Optional[str]:
+    def transcribe_audio(self, audio_data: Union[bytes, Path]) -> Optional[str]:
         """
         Transcribe audio to text using RunAnywhere Voice Pipeline.
         
         Args:
-            audio_data: Raw audio bytes (WAV format)
+            audio_data: Raw audio bytes (WAV format), or the path of a WAV file
             
         Returns:
             Transcribed text or None
@@ -66,17 +72,15 @@ class VoiceJournalAgent:
             if not audio_path.exists():
                 return {"success": False, "error": "Audio file not found"}
             
-            audio_data = audio_path.read_bytes()
-            
-            # Transcribe
-            text = self.transcribe_audio(audio_data)
+            # Transcribe (the file is uploaded from disk, not read in first)
+            text = self.transcribe_audio(audio_path)
             
             if text:
                 return {
                     "success": True,
                     "text": text,
                     "timestamp": datetime.now().isoformat(),
-                    "duration_seconds": len(audio_data) / (16000 * 2),  # Approximate
+                    "duration_seconds": audio_path.stat().st_size / (16000 * 2),  # Approximate
                     "word_count": len(text.split())
                 }
             else:
@@ -84,6 +88,31 @@ class VoiceJournalAgent:
                 
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    def record_voice_entry_async(self, audio_file_path: str) -> "Future[Dict[str, Any]]":
+        """
+        Start record_voice_entry on the shared transcription pool.
+        
+        Args:
+            audio_file_path: Path to audio file
+            
+        Returns:
+            Future resolving to the record_voice_entry result
+        """
+        return _transcriber.submit(self.record_voice_entry, audio_file_path)
+    
+    def record_voice_entries(self, audio_file_paths: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Transcribe several recordings, up to VOICE_TRANSCRIBE_WORKERS at a time.
+        
+        Args:
+            audio_file_paths: Paths to audio files
+            
+        Returns:
+            One record_voice_entry result per path, in order
+        """
+        futures = [self.record_voice_entry_async(path) for path in audio_file_paths]
+        return [future.result() for future in futures]
 
 
 # Example usage